@@ -0,0 +1,36 @@
+import shutil
+
+import pytest
+from sqlalchemy.orm import joinedload
+
+from database import models
+from routers.pdf_generator import WKHTMLTOPDF_PATH, get_pdfkit_config, get_student_cv_data, jinja_env
+
+
+@pytest.fixture
+def student_profile(db):
+    return db.query(models.StudentProfile).options(
+        joinedload(models.StudentProfile.user),
+        joinedload(models.StudentProfile.student_skills).joinedload(models.StudentSkill.skill)
+    ).filter(models.StudentProfile.id == 1).one()
+
+
+def render_cv_html(student_profile) -> str:
+    """Same steps as generate_cv_pdf, up to the HTML."""
+    return jinja_env.get_template("cv_template.html").render(get_student_cv_data(student_profile).dict())
+
+
+def bench_cv_render_html(benchmark, student_profile):
+    html = benchmark(render_cv_html, student_profile)
+    assert student_profile.user.email in html
+
+
+def bench_cv_render_pdf(benchmark, student_profile):
+    if not (WKHTMLTOPDF_PATH or shutil.which("wkhtmltopdf")):
+        pytest.skip("wkhtmltopdf is not installed")
+    import pdfkit
+
+    html = render_cv_html(student_profile)
+    pdf = benchmark(pdfkit.from_string, html, False, configuration=get_pdfkit_config(),
+                    options={'enable-local-file-access': None, 'quiet': ''})
+    assert pdf.startswith(b"%PDF")
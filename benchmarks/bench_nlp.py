@@ -0,0 +1,24 @@
+import random
+
+from services.nlp_service import extract_skills_from_chunks, extract_skills_from_text, get_nlp, SKILL_ONTOLOGY
+
+# A deterministic ~2-page resume mixing ontology skills into filler prose
+_rng = random.Random(7)
+_FILLER = ("worked with a cross-functional team to deliver features on schedule and documented the results "
+           "for stakeholders across the department while mentoring junior members").split()
+RESUME_TEXT = "\n".join(
+    " ".join(_rng.choice(_FILLER) for _ in range(25)) + f" using {_rng.choice(list(SKILL_ONTOLOGY))}."
+    for _ in range(60)
+)
+
+
+def bench_extract_skills_uncached(benchmark):
+    get_nlp() # Model loading is start-up cost, not per-call cost
+    skills = benchmark(extract_skills_from_chunks, [RESUME_TEXT])
+    assert skills
+
+
+def bench_extract_skills_cached(benchmark):
+    extract_skills_from_text(RESUME_TEXT) # Prime the cache; every timed call is a memory hit
+    skills = benchmark(extract_skills_from_text, RESUME_TEXT)
+    assert skills
@@ -0,0 +1,37 @@
+import pytest
+
+from services.learning_index import learning_resource_index
+from services.recommendation_engine import load_open_opportunity_skills, load_student_skill_ids, rank_opportunities
+from services.skill_hierarchy import skill_hierarchy
+
+BATCH_STUDENTS = 200 # One precompute_recommendations chunk
+
+
+@pytest.fixture
+def scoring_inputs(db):
+    opportunity_skills = load_open_opportunity_skills(db)
+    student_skills = load_student_skill_ids(db, range(1, BATCH_STUDENTS + 1))
+    skills_with_resources = learning_resource_index.skills_with_resources(db)
+    # Build the hierarchy closure and requirement matrix outside the timed loop
+    rank_opportunities(db, student_skills[1], opportunity_skills, skills_with_resources)
+    return opportunity_skills, student_skills, skills_with_resources
+
+
+def bench_rank_opportunities_one_student(benchmark, db, scoring_inputs):
+    opportunity_skills, student_skills, skills_with_resources = scoring_inputs
+    benchmark(rank_opportunities, db, student_skills[1], opportunity_skills, skills_with_resources)
+
+
+def bench_rank_opportunities_batch(benchmark, db, scoring_inputs):
+    opportunity_skills, student_skills, skills_with_resources = scoring_inputs
+
+    def rank_batch():
+        return [rank_opportunities(db, skill_ids, opportunity_skills, skills_with_resources)
+                for skill_ids in student_skills.values()]
+
+    benchmark(rank_batch)
+
+
+def bench_skill_credits(benchmark, db, scoring_inputs):
+    _, student_skills, _ = scoring_inputs
+    benchmark(skill_hierarchy.credits, db, student_skills[1])
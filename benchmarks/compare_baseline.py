@@ -0,0 +1,103 @@
+import sys
+import os
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+
+# Compares a pytest-benchmark run with a baseline and exits non-zero on regression.
+#   cd benchmarks && pytest --benchmark-json=results.json
+#   python compare_baseline.py results.json            # compare; exit 1 on regression
+#   python compare_baseline.py results.json --save     # record results.json as the new baseline
+# Medians are compared, since they are the least noisy statistic pytest-benchmark reports.
+# Timings only compare on the same machine, so baseline.json is not committed: record one
+# with --save on the machine (or CI runner) that will run the comparisons, e.g. from the
+# main branch before benchmarking a change. The baseline records which machine it came from.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = float(os.getenv("BENCH_REGRESSION_THRESHOLD", 0.20)) # Allowed slowdown (0.20 = 20%)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(path: str) -> dict:
+    """Reads a --benchmark-json file into {benchmark fullname: stats}."""
+    with open(path) as f:
+        report = json.load(f)
+    return {
+        bench["fullname"]: {"median": bench["stats"]["median"], "ops": bench["stats"]["ops"], "rounds": bench["stats"]["rounds"]}
+        for bench in report["benchmarks"]
+    }
+
+
+def save_baseline(results: dict, path: str):
+    baseline = {
+        "commit": git_commit(),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {"node": platform.node(), "processor": platform.processor() or platform.machine(),
+                    "python": platform.python_version()},
+        "benchmarks": results,
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Saved {len(results)} benchmarks as the baseline for commit {baseline['commit']} to {path}")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Prints a comparison table and returns the number of regressions."""
+    previous = baseline["benchmarks"]
+    print(f"Baseline: commit {baseline.get('commit')} on {baseline.get('machine', {}).get('node')} ({baseline.get('created_at')})")
+    print(f"Current:  commit {git_commit()} on {platform.node()}; allowed slowdown {threshold:.0%}\n")
+    print(f"{'benchmark':<70} {'baseline':>12} {'current':>12} {'change':>9}")
+
+    regressions = []
+    for name in sorted(set(results) | set(previous)):
+        if name not in previous:
+            print(f"{name:<70} {'-':>12} {results[name]['median'] * 1000:>10.3f}ms {'new':>9}")
+            continue
+        if name not in results:
+            print(f"{name:<70} {previous[name]['median'] * 1000:>10.3f}ms {'-':>12} {'missing':>9}")
+            continue
+        before, after = previous[name]["median"], results[name]["median"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append((name, change))
+            flag = "  <-- REGRESSION"
+        print(f"{name:<70} {before * 1000:>10.3f}ms {after * 1000:>10.3f}ms {change:>+8.1%}{flag}")
+
+    if regressions:
+        print(f"\n!!! {len(regressions)} benchmark(s) regressed by more than {threshold:.0%}:", file=sys.stderr)
+        for name, change in regressions:
+            print(f"!!!   {name}: {change:+.1%}", file=sys.stderr)
+    else:
+        print("\nNo regressions.")
+    return len(regressions)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare pytest-benchmark results with the stored baseline.")
+    parser.add_argument("results", help="JSON written by pytest --benchmark-json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown of the median (0.2 = 20%%)")
+    parser.add_argument("--save", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    current = load_results(args.results)
+    if args.save:
+        save_baseline(current, args.baseline)
+        sys.exit(0)
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; baselines are machine-specific and not committed, "
+              f"record one on this machine with --save", file=sys.stderr)
+        sys.exit(2)
+    with open(args.baseline) as f:
+        stored = json.load(f)
+    sys.exit(1 if compare(current, stored, args.threshold) else 0)
@@ -0,0 +1,38 @@
+import sys
+import os
+import tempfile
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Benchmarks run against their own seeded SQLite database (or BENCH_DATABASE_URL), never the
+# DATABASE_URL from .env. This has to happen before anything imports database.connection.
+_workdir = tempfile.mkdtemp(prefix="cognitive_navigator_bench_")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'bench.db')}")
+os.environ["NLP_CACHE_PATH"] = os.path.join(_workdir, "nlp_results.sqlite3")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+BENCH_STUDENTS = int(os.getenv("BENCH_STUDENTS", 2000))
+BENCH_SEED = int(os.getenv("BENCH_SEED", 42))
+
+
+@pytest.fixture(scope="session")
+def seeded_engine():
+    from database.connection import engine
+    from seed_data import seed
+
+    seed(engine, BENCH_STUDENTS, BENCH_SEED, drop=True)
+    return engine
+
+
+@pytest.fixture
+def db(seeded_engine):
+    from database.connection import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
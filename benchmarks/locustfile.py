@@ -0,0 +1,93 @@
+import os
+import random
+
+from locust import HttpUser, between, task
+
+from seed_data import BENCH_PASSWORD, EMAIL_DOMAIN, FACULTY_PER_STUDENT, OPPORTUNITIES_PER_STUDENT
+
+# HTTP load test against a server running on a database seeded by seed_data.py.
+# Usage: locust -f benchmarks/locustfile.py --host http://localhost:8000 \
+#            --users 200 --spawn-rate 20 --run-time 5m --headless --csv results/load
+# BENCH_STUDENTS must match the value the database was seeded with.
+
+BENCH_STUDENTS = int(os.getenv("BENCH_STUDENTS", 2000))
+BENCH_FACULTY = max(1, int(BENCH_STUDENTS * FACULTY_PER_STUDENT))
+BENCH_OPPORTUNITIES = max(1, int(BENCH_STUDENTS * OPPORTUNITIES_PER_STUDENT))
+
+SAMPLE_TEXTS = [
+    "Built dashboards in python and sql for the data analysis team.",
+    "Led a scrum team delivering a react and nodejs web app; strong communication and teamwork.",
+    "Research assistant in machine learning; experience with cloud computing on aws.",
+]
+
+
+class BenchUser(HttpUser):
+    abstract = True
+    email_prefix = ""
+    population = 1
+
+    def on_start(self):
+        self.index = random.randrange(self.population)
+        response = self.client.post("/api/auth/token", json={
+            "email": f"{self.email_prefix}{self.index}@{EMAIL_DOMAIN}", "password": BENCH_PASSWORD,
+        }, name="/api/auth/token")
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    def random_opportunity_id(self) -> int:
+        return random.randint(1, BENCH_OPPORTUNITIES)
+
+
+class StudentUser(BenchUser):
+    weight = 10
+    wait_time = between(1, 3)
+    email_prefix = "student"
+    population = BENCH_STUDENTS
+
+    @task(5)
+    def recommendations(self):
+        self.client.get("/api/recommendations/for-student/me")
+
+    @task(3)
+    def browse_opportunities(self):
+        self.client.get("/api/opportunities/", params={"limit": 20, "skip": random.randint(0, 5) * 20})
+
+    @task(3)
+    def view_opportunity(self):
+        self.client.get(f"/api/opportunities/{self.random_opportunity_id()}", name="/api/opportunities/{opportunity_id}")
+
+    @task(2)
+    def learning_paths(self):
+        self.client.get("/api/learning-paths/me")
+
+    @task(1)
+    def profile(self):
+        self.client.get("/api/students/profiles/me")
+
+    @task(1)
+    def trending(self):
+        self.client.get("/api/analytics/trending", params={"hours": 168})
+
+    @task(1)
+    def extract_skills(self):
+        # The seed gives student i user id BENCH_FACULTY + 2 + i (admin first, then faculty)
+        user_id = BENCH_FACULTY + 2 + self.index
+        self.client.post(f"/api/students/profiles/{user_id}/extract-skills",
+                         params={"text_to_analyze": random.choice(SAMPLE_TEXTS)},
+                         name="/api/students/profiles/{user_id}/extract-skills")
+
+
+class FacultyUser(BenchUser):
+    weight = 1
+    wait_time = between(2, 5)
+    email_prefix = "faculty"
+    population = BENCH_FACULTY
+
+    @task(3)
+    def candidates(self):
+        self.client.get(f"/api/opportunities/{self.random_opportunity_id()}/candidates",
+                        name="/api/opportunities/{opportunity_id}/candidates")
+
+    @task(1)
+    def department_progress(self):
+        self.client.get("/api/learning-paths/departments/Computer Science/progress",
+                        name="/api/learning-paths/departments/{department}/progress")
@@ -0,0 +1,213 @@
+import sys
+import os
+import argparse
+import datetime
+import random
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Deterministic synthetic dataset for benchmarks and load tests. The same --seed and
+# --students always produce the same rows (and ids), so results are comparable across commits.
+# Usage: DATABASE_URL=sqlite:///bench.db python benchmarks/seed_data.py --students 5000 --drop
+# Every user's password is BENCH_PASSWORD; emails are student{i}@bench.example,
+# faculty{i}@bench.example and admin@bench.example.
+
+BENCH_PASSWORD = "benchmark"
+EMAIL_DOMAIN = "bench.example"
+INSERT_BATCH_SIZE = 1000
+
+# Per-student ratios, roughly those of a university deployment
+FACULTY_PER_STUDENT = 0.02
+OPPORTUNITIES_PER_STUDENT = 0.05
+RESOURCES_PER_STUDENT = 0.1
+SKILLS_PER_STUDENT = 0.05
+MIN_SKILLS, MAX_SKILLS = 60, 3000
+SKILLS_PER_PROFILE = (4, 15)
+SKILLS_PER_OPPORTUNITY = (2, 7)
+SKILLS_PER_RESOURCE = (1, 3)
+LEARNING_PATHS_PER_STUDENT = (0, 4)
+OPEN_OPPORTUNITY_SHARE = 0.8
+
+DEPARTMENTS = ["Computer Science", "Software Engineering", "Data Science", "Information Systems",
+               "Electrical Engineering", "Business Analytics", "Mathematics", "Design"]
+FIRST_NAMES = ["Amal", "Nimal", "Kasun", "Dilini", "Sachini", "Ruwan", "Ishara", "Tharindu", "Nadeesha", "Chamari",
+               "Alex", "Sam", "Jordan", "Priya", "Wei", "Maria", "Omar", "Lena", "Kofi", "Yuki"]
+LAST_NAMES = ["Perera", "Fernando", "Silva", "Jayasinghe", "Bandara", "Wickramasinghe", "Herath", "Dissanayake",
+              "Smith", "Garcia", "Chen", "Khan", "Novak", "Okafor", "Tanaka", "Rossi"]
+SKILL_AREAS = ["Programming", "Data Science", "AI/ML", "Database", "Frontend", "Backend", "DevOps",
+               "Soft Skills", "Security", "Design"]
+
+
+def _batches(rows, size=INSERT_BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _popular(rng: random.Random, weights, ids, k: int):
+    """k distinct ids, skewed towards popular ones (a few skills appear everywhere)."""
+    chosen = set()
+    while len(chosen) < min(k, len(ids)):
+        chosen.update(rng.choices(ids, weights=weights, k=k - len(chosen)))
+    return sorted(chosen)
+
+
+def build_dataset(students: int, seed: int = 42, password_hash: str = "") -> dict:
+    """Generates every row as plain dicts keyed by table name. Ids are assigned here."""
+    from services.nlp_service import SKILL_ONTOLOGY
+
+    rng = random.Random(seed)
+    # Fixed reference time, so reruns generate the same rows
+    now = datetime.datetime(2025, 1, 1, 9, 0, 0)
+    # Except for open deadlines: those count from when the data is seeded, so open postings
+    # are open when the benchmarks run and expire on the usual schedule (the deadline
+    # scheduler and the opportunity catalog drop postings past their deadline)
+    seeded_at = datetime.datetime.now().replace(microsecond=0)
+    data = {name: [] for name in (
+        "roles", "users", "user_roles", "student_profiles", "faculty_org_profiles", "skills", "student_skills",
+        "opportunities", "opportunity_required_skills", "learning_resources", "resource_associated_skills",
+        "student_learning_paths",
+    )}
+
+    roles = ["student", "faculty", "industry_partner", "admin"]
+    data["roles"] = [{"id": i + 1, "name": name, "description": f"{name} role"} for i, name in enumerate(roles)]
+    role_ids = {name: i + 1 for i, name in enumerate(roles)}
+
+    # Skills: the NLP ontology first (so extracted skills resolve), then a synthetic forest
+    # where every non-root skill has a parent among the earlier ones.
+    skill_count = max(MIN_SKILLS, min(MAX_SKILLS, int(students * SKILLS_PER_STUDENT)))
+    for name, info in SKILL_ONTOLOGY.items():
+        data["skills"].append({"id": len(data["skills"]) + 1, "name": name, "category": info["category"], "parent_skill_id": None})
+    while len(data["skills"]) < skill_count:
+        skill_id = len(data["skills"]) + 1
+        parent = rng.randint(1, skill_id - 1) if rng.random() < 0.7 else None
+        data["skills"].append({
+            "id": skill_id, "name": f"{rng.choice(SKILL_AREAS).lower()} skill {skill_id}",
+            "category": rng.choice(SKILL_AREAS), "parent_skill_id": parent,
+        })
+    skill_ids = [s["id"] for s in data["skills"]]
+    skill_weights = [1.0 / (rank + 1) for rank in range(len(skill_ids))] # Zipf-like popularity
+
+    def add_user(email: str):
+        user_id = len(data["users"]) + 1
+        data["users"].append({
+            "id": user_id, "email": email, "password_hash": password_hash,
+            "first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES),
+            "created_at": now - datetime.timedelta(days=rng.randint(0, 720)), "updated_at": now,
+        })
+        return user_id
+
+    admin_id = add_user(f"admin@{EMAIL_DOMAIN}")
+    data["user_roles"].append({"user_id": admin_id, "role_id": role_ids["admin"]})
+
+    faculty_ids = []
+    for i in range(max(1, int(students * FACULTY_PER_STUDENT))):
+        user_id = add_user(f"faculty{i}@{EMAIL_DOMAIN}")
+        faculty_ids.append(user_id)
+        data["user_roles"].append({"user_id": user_id, "role_id": role_ids["faculty"]})
+        data["faculty_org_profiles"].append({
+            "id": i + 1, "user_id": user_id, "organization_name": "Benchmark University",
+            "department": rng.choice(DEPARTMENTS), "contact_email": f"faculty{i}@{EMAIL_DOMAIN}",
+        })
+
+    for i in range(students):
+        user_id = add_user(f"student{i}@{EMAIL_DOMAIN}")
+        profile_id = i + 1
+        data["user_roles"].append({"user_id": user_id, "role_id": role_ids["student"]})
+        department = rng.choice(DEPARTMENTS)
+        data["student_profiles"].append({
+            "id": profile_id, "user_id": user_id, "academic_id": f"BENCH{i:07d}", "department": department,
+            "major": department, "gpa": round(rng.uniform(2.0, 4.0), 2),
+            "bio": None if rng.random() < 0.5 else "Synthetic benchmark student.",
+        })
+        for skill_id in _popular(rng, skill_weights, skill_ids, rng.randint(*SKILLS_PER_PROFILE)):
+            data["student_skills"].append({
+                "student_profile_id": profile_id, "skill_id": skill_id,
+                "proficiency_level": rng.choice(["beginner", "intermediate", "advanced", "expert"]),
+                "inferred_from": "benchmark_seed",
+            })
+
+    for i in range(max(1, int(students * OPPORTUNITIES_PER_STUDENT))):
+        opportunity_id = i + 1
+        is_open = rng.random() < OPEN_OPPORTUNITY_SHARE
+        data["opportunities"].append({
+            "id": opportunity_id, "posted_by_user_id": rng.choice(faculty_ids),
+            "title": f"Benchmark opportunity {opportunity_id}", "description": "Synthetic opportunity for benchmarks.",
+            "type": rng.choice(["internship", "research", "training"]), "department": rng.choice(DEPARTMENTS),
+            "location": "Campus",
+            "application_deadline": seeded_at + datetime.timedelta(days=rng.randint(7, 120)) if is_open
+            else now - datetime.timedelta(days=rng.randint(1, 60)),
+            "num_positions": rng.randint(1, 10), "status": "open" if is_open else rng.choice(["closed", "archived"]),
+            "created_at": now - datetime.timedelta(days=rng.randint(0, 90)), "updated_at": now,
+        })
+        for skill_id in _popular(rng, skill_weights, skill_ids, rng.randint(*SKILLS_PER_OPPORTUNITY)):
+            data["opportunity_required_skills"].append({
+                "opportunity_id": opportunity_id, "skill_id": skill_id, "is_mandatory": rng.random() < 0.7,
+            })
+
+    for i in range(max(1, int(students * RESOURCES_PER_STUDENT))):
+        resource_id = i + 1
+        data["learning_resources"].append({
+            "id": resource_id, "title": f"Benchmark resource {resource_id}", "description": "Synthetic learning resource.",
+            "url": f"https://learn.{EMAIL_DOMAIN}/resources/{resource_id}",
+            "type": rng.choice(["course", "webinar", "article", "tutorial", "book"]),
+            "estimated_time_to_complete_min": rng.choice([15, 30, 60, 120, 300, 600]),
+            "difficulty_level": rng.choice(["beginner", "intermediate", "advanced"]), "created_at": now,
+        })
+        for skill_id in _popular(rng, skill_weights, skill_ids, rng.randint(*SKILLS_PER_RESOURCE)):
+            data["resource_associated_skills"].append({"resource_id": resource_id, "skill_id": skill_id})
+
+    resource_skills = {}
+    for row in data["resource_associated_skills"]:
+        resource_skills.setdefault(row["resource_id"], row["skill_id"])
+    resource_ids = sorted(resource_skills)
+    for profile in data["student_profiles"]:
+        for resource_id in rng.sample(resource_ids, min(len(resource_ids), rng.randint(*LEARNING_PATHS_PER_STUDENT))):
+            status = rng.choice(["assigned", "in_progress", "completed", "skipped"])
+            data["student_learning_paths"].append({
+                "id": len(data["student_learning_paths"]) + 1, "student_profile_id": profile["id"],
+                "resource_id": resource_id, "target_skill_id": resource_skills[resource_id], "status": status,
+                "assigned_at": now - datetime.timedelta(days=rng.randint(1, 60)),
+                "completed_at": now if status == "completed" else None,
+            })
+    return data
+
+
+def seed(engine, students: int, seed: int = 42, drop: bool = False) -> dict:
+    """Creates the schema and inserts the dataset. Returns row counts per table."""
+    from database.connection import Base
+    from database import models # Register the models with Base
+    from utils.security import get_password_hash
+
+    if drop:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        if conn.execute(models.User.__table__.select().limit(1)).first() is not None:
+            raise RuntimeError("The target database already has users; pass --drop to recreate it.")
+
+    # bcrypt is deliberately slow, so every synthetic user shares one hash
+    data = build_dataset(students, seed, password_hash=get_password_hash(BENCH_PASSWORD))
+    tables = Base.metadata.tables
+    with engine.begin() as conn:
+        # Dict order is dependency order (parents before children)
+        for name, rows in data.items():
+            for batch in _batches(rows):
+                conn.execute(tables[name].insert(), batch)
+    return {name: len(rows) for name, rows in data.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a database with a deterministic synthetic dataset.")
+    parser.add_argument("--students", type=int, default=int(os.getenv("BENCH_STUDENTS", 2000)))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="Drop and recreate every table first (destroys existing data)")
+    args = parser.parse_args()
+
+    from database.connection import engine
+
+    counts = seed(engine, args.students, args.seed, args.drop)
+    print(f"Seeded {engine.url.render_as_string(hide_password=True)} (seed {args.seed}):")
+    for name, count in counts.items():
+        print(f"  {name:<30} {count:>9}")
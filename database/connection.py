@@ -4,6 +4,8 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from database.replicas import REPLICA_DATABASE_URLS, ReplicaPool
+
 load_dotenv() # Load environment variables
 
 # Get database URL from environment variables
@@ -12,14 +14,23 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 if not SQLALCHEMY_DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable not set.")
 
-# Create the SQLAlchemy engine
-# For MySQL, charset='utf8mb4' is recommended for full Unicode support
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True, # Ensures connections are still alive
-    pool_recycle=3600, # Recycle connections after 1 hour
-    connect_args={"charset": "utf8mb4"} # Specific for mysql-connector-python
-)
+def _create_engine(url: str):
+    # For MySQL, charset='utf8mb4' is recommended for full Unicode support.
+    # Other backends (e.g. the SQLite database used by benchmarks/) reject that argument.
+    connect_args = {"charset": "utf8mb4"} if url.startswith("mysql") else {} # Specific for mysql-connector-python
+    return create_engine(
+        url,
+        pool_pre_ping=True, # Ensures connections are still alive
+        pool_recycle=3600, # Recycle connections after 1 hour
+        connect_args=connect_args
+    )
+
+# Create the SQLAlchemy engine (the primary: every write and any read that must be current)
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+
+# Read replicas (REPLICA_DATABASE_URLS, comma-separated) used by read-only handlers through
+# utils.read_routing.get_read_db
+replica_pool = ReplicaPool([_create_engine(url) for url in REPLICA_DATABASE_URLS])
 
 # Create a SessionLocal class
 # Each instance of SessionLocal will be a database session.
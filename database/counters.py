@@ -0,0 +1,47 @@
+from typing import Dict, Sequence, Tuple
+
+from sqlalchemy import Table, and_, bindparam, select, tuple_
+from sqlalchemy.orm import Session
+
+# Keys per SELECT when checking which counter rows already exist
+KEY_CHUNK_SIZE = 500
+
+
+def increment_counters(db: Session, table: Table, key_columns: Sequence[str], deltas: Dict[Tuple, int], count_column: str = "count"):
+    """
+    Adds deltas to counter rows keyed by key_columns: one executemany UPDATE for the keys
+    that exist and one multi-row INSERT for the rest. The caller commits and is
+    responsible for serializing writers of the same keys.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    key_cols = [table.c[name] for name in key_columns]
+    keys = list(deltas)
+    existing = set()
+    for start in range(0, len(keys), KEY_CHUNK_SIZE):
+        chunk = keys[start:start + KEY_CHUNK_SIZE]
+        existing.update(tuple(row) for row in db.execute(
+            select(*key_cols).where(tuple_(*key_cols).in_(chunk))
+        ))
+
+    updates = [
+        {**{f"k_{name}": value for name, value in zip(key_columns, key)}, "delta": deltas[key]}
+        for key in keys if key in existing
+    ]
+    if updates:
+        counter = table.c[count_column]
+        db.execute(
+            table.update()
+            .where(and_(*(col == bindparam(f"k_{col.name}") for col in key_cols)))
+            .values({count_column: counter + bindparam("delta")}),
+            updates,
+        )
+
+    inserts = [
+        {**dict(zip(key_columns, key)), count_column: deltas[key]}
+        for key in keys if key not in existing
+    ]
+    if inserts:
+        db.execute(table.insert(), inserts)
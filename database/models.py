@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Date, DECIMAL, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Date, DECIMAL, Enum, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.mysql import JSON # For MySQL JSON type
 from .connection import Base
@@ -110,12 +110,18 @@ class Opportunity(Base):
     num_positions = Column(Integer)
     status = Column(Enum('open', 'closed', 'archived'), default='open')
     created_at = Column(DateTime, default=datetime.datetime.now)
-    updated_at = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now)
+    updated_at = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now, index=True) # Polled by the opportunity catalog
 
     posted_by_user = relationship("User", back_populates="posted_opportunities")
     required_skills = relationship("OpportunityRequiredSkill", back_populates="opportunity")
     applications = relationship("StudentApplication", back_populates="opportunity")
 
+class OpportunityTombstone(Base):
+    # Deleted opportunities, so the opportunity catalogs of other workers drop them on their next poll
+    __tablename__ = "opportunity_tombstones"
+    opportunity_id = Column(Integer, primary_key=True) # No foreign key: the row is gone
+    deleted_at = Column(DateTime, default=datetime.datetime.now, nullable=False, index=True)
+
 class OpportunityRequiredSkill(Base):
     __tablename__ = "opportunity_required_skills"
     opportunity_id = Column(Integer, ForeignKey("opportunities.id", ondelete="CASCADE"), primary_key=True)
@@ -135,11 +141,18 @@ class StudentApplication(Base):
     applied_at = Column(DateTime, default=datetime.datetime.now)
     cover_letter_url = Column(String(255))
     submission_details = Column(JSON) # For MySQL 5.7.8+
+    version = Column(Integer, nullable=False, default=1) # Bumped on every status change (optimistic concurrency)
+    updated_at = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now)
 
     student_profile = relationship("StudentProfile", back_populates="applications")
     opportunity = relationship("Opportunity", back_populates="applications")
     feedback = relationship("Feedback", back_populates="related_application", uselist=False)
 
+    __table_args__ = (
+        # One application per student and opportunity, even when two applies race
+        UniqueConstraint("student_profile_id", "opportunity_id", name="uq_student_applications_student_opportunity"),
+    )
+
 class LearningResource(Base):
     __tablename__ = "learning_resources"
     id = Column(Integer, primary_key=True, index=True)
@@ -189,6 +202,10 @@ class Notification(Base):
 
     user = relationship("User", back_populates="notifications")
 
+    __table_args__ = (
+        Index("ix_notifications_user_read", "user_id", "is_read"), # Unread counts per user
+    )
+
 class Feedback(Base):
     __tablename__ = "feedback"
     id = Column(Integer, primary_key=True, index=True)
@@ -212,4 +229,93 @@ class UserActionLog(Base):
     entity_id = Column(Integer)
     timestamp = Column(DateTime, default=datetime.datetime.now)
 
-    user = relationship("User", back_populates="user_actions")
\ No newline at end of file
+    user = relationship("User", back_populates="user_actions")
+
+
+class StudentRecommendation(Base):
+    # Materialized opportunity recommendations, written by scripts/precompute_recommendations.py
+    __tablename__ = "student_recommendations"
+    student_profile_id = Column(Integer, ForeignKey("student_profiles.id", ondelete="CASCADE"), primary_key=True)
+    opportunity_id = Column(Integer, ForeignKey("opportunities.id", ondelete="CASCADE"), primary_key=True)
+    match_score = Column(DECIMAL(5, 2), nullable=False)
+    missing_skill_ids = Column(JSON) # List of skill ids the student still lacks
+    growth_skill_id = Column(Integer, ForeignKey("skills.id", ondelete="SET NULL")) # Missing skill with learning resources, if any
+    computed_at = Column(DateTime, default=datetime.datetime.now, index=True)
+
+    student_profile = relationship("StudentProfile")
+    opportunity = relationship("Opportunity")
+
+class StudentRecommendationRun(Base):
+    # When a student's recommendations were last materialized; with no student_recommendations
+    # rows it means "computed, nothing to recommend" rather than "never computed"
+    __tablename__ = "student_recommendation_runs"
+    student_profile_id = Column(Integer, ForeignKey("student_profiles.id", ondelete="CASCADE"), primary_key=True)
+    computed_at = Column(DateTime, default=datetime.datetime.now, nullable=False, index=True)
+
+class ActionRollupHourly(Base):
+    # Counts from user_actions_log per hour, maintained by services/analytics_rollups.py
+    __tablename__ = "action_rollups_hourly"
+    entity_type = Column(String(100), primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    action_type = Column(String(100), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True, index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class ActionRollupDaily(Base):
+    # Same as ActionRollupHourly, bucketed per day
+    __tablename__ = "action_rollups_daily"
+    entity_type = Column(String(100), primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    action_type = Column(String(100), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True, index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class RollupWatermark(Base):
+    # Highest source row id already folded into the rollups, per source table
+    __tablename__ = "rollup_watermarks"
+    name = Column(String(100), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now)
+
+class OpportunityApplicationCount(Base):
+    # Applications per (opportunity, status), kept in step by services/application_workflow.py
+    __tablename__ = "opportunity_application_counts"
+    opportunity_id = Column(Integer, ForeignKey("opportunities.id", ondelete="CASCADE"), primary_key=True)
+    application_status = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class LearningProgressCount(Base):
+    # Learning path counts per status for a student, skill or department, kept by services/learning_progress.py
+    __tablename__ = "learning_progress_counts"
+    scope = Column(String(20), primary_key=True) # 'student', 'skill', 'department' or 'department_skill'
+    scope_key = Column(String(120), primary_key=True) # student_profile_id, skill_id, department or 'department|skill_id' (up to 100 + 1 + 11)
+    status = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class ResumeJob(Base):
+    # Uploaded resume waiting for (or done with) skill extraction by services/resume_pipeline.py
+    __tablename__ = "resume_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    student_profile_id = Column(Integer, ForeignKey("student_profiles.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(Enum('queued', 'processing', 'completed', 'failed'), default='queued', index=True)
+    original_filename = Column(String(255))
+    size_bytes = Column(Integer)
+    content_hash = Column(String(64)) # SHA-256 of the file, the extraction cache key
+    extracted_skills = Column(JSON) # Skill names found in the resume
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+class ResumeFileChunk(Base):
+    # The uploaded file of a resume job in pieces of up to 1 MB, readable from every API host and worker
+    __tablename__ = "resume_file_chunks"
+    job_id = Column(Integer, ForeignKey("resume_jobs.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    data = Column(LargeBinary(1024 * 1024), nullable=False) # MEDIUMBLOB on MySQL
+
+class CatalogVersion(Base):
+    # Change counters for small reference tables cached in every worker (services/skill_catalog.py)
+    __tablename__ = "catalog_versions"
+    name = Column(String(50), primary_key=True) # e.g. 'skills'
+    version = Column(Integer, nullable=False, default=0)
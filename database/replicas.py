@@ -0,0 +1,91 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Read replicas for read-only handlers. With REPLICA_DATABASE_URLS unset the pool is empty
+# and every read goes to the primary, exactly as before.
+# To try it locally, seed one SQLite file and copy it as the "replica":
+#   DATABASE_URL=sqlite:///primary.db python benchmarks/seed_data.py --drop && cp primary.db replica.db
+#   DATABASE_URL=sqlite:///primary.db REPLICA_DATABASE_URLS=sqlite:///replica.db uvicorn main:app
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_INTERVAL_SECONDS = float(os.getenv("REPLICA_HEALTH_INTERVAL_SECONDS", 5))
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", 30)) # How long a failed replica is skipped
+
+
+class ReplicaPool:
+    """
+    Round-robin over the healthy replica engines. A replica is re-checked with SELECT 1 at
+    most every REPLICA_HEALTH_INTERVAL_SECONDS (by whichever request picks it next), and one
+    that fails a check or raises a connection error is skipped for REPLICA_RETRY_SECONDS.
+    """
+
+    def __init__(self, engines: List[Engine], health_interval: float = REPLICA_HEALTH_INTERVAL_SECONDS,
+                 retry_after: float = REPLICA_RETRY_SECONDS):
+        self.engines = list(engines)
+        self.health_interval = health_interval
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._down_until = [0.0] * len(self.engines)
+        self._checked_at = [0.0] * len(self.engines)
+        for index, replica in enumerate(self.engines):
+            event.listen(replica, "handle_error", self._on_error(index))
+
+    def _on_error(self, index: int):
+        def handle_error(context):
+            if context.is_disconnect:
+                self.mark_down(index, context.original_exception)
+        return handle_error
+
+    def mark_down(self, index: int, reason=None):
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_after
+        logger.warning("Read replica %s marked down for %.0fs: %s",
+                       self.engines[index].url.render_as_string(hide_password=True), self.retry_after, reason)
+
+    def _healthy(self, index: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._down_until[index]:
+                return False
+            if now - self._checked_at[index] < self.health_interval:
+                return True
+            # Claim the check so concurrent requests don't all run it
+            self._checked_at[index] = now
+        try:
+            with self.engines[index].connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            self.mark_down(index, e)
+            return False
+
+    def pick(self) -> Optional[Engine]:
+        """The next healthy replica, or None when there is none (read from the primary)."""
+        if not self.engines:
+            return None
+        start = next(self._turn)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self._healthy(index):
+                return self.engines[index]
+        return None
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "url": replica.url.render_as_string(hide_password=True),
+                "healthy": now >= down_until,
+            } for replica, down_until in zip(self.engines, self._down_until)]
@@ -1,5 +1,6 @@
 import os
 from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
@@ -8,7 +9,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import database connection and models
-from database.connection import engine, Base, get_db
+from database.connection import engine, Base, get_db, replica_pool
 from database import models
 
 # Import routers
@@ -18,6 +19,28 @@ from routers.students import router as students_router
 from routers.opportunities import router as opportunities_router
 from routers.recommendations import router as recommendations_router
 from routers.pdf_generator import router as pdf_generator_router
+from routers.analytics import router as analytics_router
+from routers.notifications import router as notifications_router
+from routers.applications import router as applications_router
+from routers.learning_paths import router as learning_paths_router
+from routers.profiling import router as profiling_router
+from routers.exports import router as exports_router
+from routers.pdf_generator import get_pdfkit_config
+
+from services.action_log import action_log_writer
+from services.analytics_rollups import rollup_scheduler
+from services.notification_hub import notification_writer
+from services.deadline_scheduler import deadline_scheduler
+from services.opportunity_catalog import opportunity_catalog
+from services.resume_pipeline import resume_worker
+from services.skill_analytics import skill_analytics
+from services import nlp_service
+from utils.action_tracking import track_views
+from utils.admission import admission_control
+from utils.metrics import registry
+from utils.profiling import profile_requests
+from utils.query_stats import instrument_requests
+from utils.read_routing import track_writes
 
 # Create tables if they don't exist (for development/hackathon convenience)
 # In production, you'd typically use Alembic for migrations.
@@ -45,6 +68,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Log opportunity/resource views to user_actions_log (buffered, written in batches)
+app.middleware("http")(track_views)
+# Keep a user's reads on the primary for a few seconds after their own writes (read replicas)
+app.middleware("http")(track_writes)
+# Per-stage timers and opt-in sampling profiles (X-Profile header, see utils/profiling.py)
+app.middleware("http")(profile_requests)
+# Rate limits, concurrency limits and load shedding for login, skill extraction and PDFs
+app.middleware("http")(admission_control)
+# Per-request SQL count/time: Server-Timing header, /metrics histograms, query budgets.
+# Registered last so it is outermost and times the whole request.
+app.middleware("http")(instrument_requests)
+
+# Heavy resources (spaCy pipeline, pdfkit configuration) load on first use. Production
+# workers set WARM_UP_ON_STARTUP=true to load them before taking traffic instead.
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "false").lower() == "true"
+
+def warm_up():
+    """Loads the lazily initialized resources up front."""
+    nlp_service.warm_up()
+    try:
+        get_pdfkit_config()
+    except OSError as e:
+        # CV generation reports this per request; the rest of the API works without it
+        print(f"wkhtmltopdf not available, PDF generation disabled: {e}")
+
+@app.on_event("startup")
+def start_background_writers():
+    if WARM_UP_ON_STARTUP:
+        warm_up()
+    action_log_writer.start()
+    notification_writer.start()
+    rollup_scheduler.start()
+    deadline_scheduler.start()
+    opportunity_catalog.start()
+    resume_worker.start()
+    skill_analytics.start()
+
+@app.on_event("shutdown")
+def stop_background_writers():
+    # Flush buffered events before the worker exits
+    action_log_writer.stop()
+    notification_writer.stop()
+    rollup_scheduler.stop()
+    deadline_scheduler.stop()
+    opportunity_catalog.stop()
+    resume_worker.stop()
+    skill_analytics.stop()
+
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users_router, prefix="/api/users", tags=["Users"])
@@ -52,18 +123,42 @@ app.include_router(students_router, prefix="/api/students", tags=["Students"])
 app.include_router(opportunities_router, prefix="/api/opportunities", tags=["Opportunities"])
 app.include_router(recommendations_router, prefix="/api/recommendations", tags=["Recommendations"])
 app.include_router(pdf_generator_router, prefix="/api/pdf", tags=["PDF Generation"])
+app.include_router(analytics_router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(notifications_router, prefix="/api/notifications", tags=["Notifications"])
+app.include_router(applications_router, prefix="/api/applications", tags=["Applications"])
+app.include_router(learning_paths_router, prefix="/api/learning-paths", tags=["Learning Paths"])
+app.include_router(profiling_router, prefix="/api/profiling", tags=["Profiling"])
+app.include_router(exports_router, prefix="/api/exports", tags=["Exports"])
 
 
 @app.get("/")
 def read_root():
     return {"message": "Smart Platform for Academic and Professional Growth API!"}
 
+def _background_stats():
+    """Scrape-time view of the counters kept by the extraction cache and batch writers."""
+    cache = nlp_service.extraction_cache.stats()
+    yield ("nlp_extraction_cache_lookups_total", "Skill extraction cache lookups by result.", "counter", [
+        ({"result": result}, cache[key]) for result, key in (("memory_hit", "memory_hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))
+    ])
+    yield ("batch_writer_events_total", "Events handled by the buffered batch writers.", "counter", [
+        ({"writer": writer.name, "outcome": outcome}, count)
+        for writer in (action_log_writer, notification_writer) for outcome, count in writer.stats.items()
+    ])
+
+registry.register_collector(_background_stats)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus metrics of this worker process."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Example of a simple health check endpoint
 @app.get("/health")
 def health_check(db: Session = Depends(get_db)):
     try:
         # Try to query the database to ensure connection is active
         db.execute("SELECT 1")
-        return {"status": "ok", "database": "connected"}
+        return {"status": "ok", "database": "connected", "replicas": replica_pool.status()}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database connection error: {e}")
\ No newline at end of file
@@ -0,0 +1,177 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional
+
+from database.connection import get_db
+from database import models
+from schemas import analytics as analytics_schemas
+from routers.auth import get_current_user
+from services import analytics_rollups
+from services.nlp_service import extraction_cache
+from services.skill_analytics import GROUP_COLUMNS, PROFICIENCY_CODES, SkillCount, open_posting_demand, skill_analytics
+from services.skill_catalog import skill_catalog
+from utils.read_routing import get_read_db
+
+router = APIRouter()
+
+# Most skills one distribution request may ask for
+MAX_DISTRIBUTION_SKILLS = 50
+
+
+def _require_cohort_viewer(user: models.User):
+    # Cohort analytics are for department heads (faculty) and admins
+    if not any(role.role.name in ["faculty", "admin"] for role in user.roles):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view skill analytics.")
+
+
+def _min_level(min_proficiency: Optional[str]) -> int:
+    if min_proficiency is None:
+        return 0
+    if min_proficiency not in PROFICIENCY_CODES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"min_proficiency must be one of {', '.join(PROFICIENCY_CODES)}.")
+    return PROFICIENCY_CODES[min_proficiency]
+
+
+def _skill_names(db: Session, skill_ids: Iterable[int]):
+    return {skill_id: skill.name for skill_id, skill in skill_catalog.skills_by_id(db, set(skill_ids)).items()}
+
+
+def _coverage(count: SkillCount, names) -> analytics_schemas.SkillCoverage:
+    return analytics_schemas.SkillCoverage(
+        skill_id=count.skill_id,
+        skill_name=names.get(count.skill_id),
+        holders=count.holders,
+        percentage=round(count.holders / count.students * 100, 2) if count.students else 0.0,
+    )
+
+@router.get("/trending", response_model=analytics_schemas.TrendingResponse)
+def get_trending(
+    entity_type: str = Query("opportunity", description="Entity type to rank (opportunity, resource, ...)"),
+    action_type: Optional[str] = Query(None, description="Only count this action type, e.g. 'opportunity_view'"),
+    hours: int = Query(24, ge=1, le=24 * 90, description="Size of the trailing window in hours"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Most active entities over a trailing window.
+    Served from the hourly/daily rollups only; the raw action log is never scanned here.
+    """
+    items = analytics_rollups.trending(db, entity_type, hours, limit, action_type)
+    return analytics_schemas.TrendingResponse(
+        entity_type=entity_type,
+        window_hours=hours,
+        items=[analytics_schemas.TrendingEntity(entity_type=entity_type, entity_id=entity_id, count=count)
+               for entity_id, count in items]
+    )
+
+
+@router.get("/nlp-cache", response_model=analytics_schemas.NlpCacheStats)
+def get_nlp_cache_stats(current_user: models.User = Depends(get_current_user)):
+    """Hit/miss counters of this worker's skill extraction cache. Admins only."""
+    if not any(role.role.name == "admin" for role in current_user.roles):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view cache statistics.")
+    return extraction_cache.stats()
+
+
+@router.get("/skills/distribution", response_model=analytics_schemas.SkillDistributionResponse)
+def get_skill_distribution(
+    skill_id: List[int] = Query(..., description="Skills to report on (repeat the parameter for several)"),
+    group_by: Optional[str] = Query(None, description="Group students by department or major"),
+    department: Optional[str] = Query(None, description="Only students in this department"),
+    major: Optional[str] = Query(None, description="Only students with this major"),
+    min_proficiency: Optional[str] = Query(None, description="Only count skills held at this level or above"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Share of students holding each skill, per department/major or overall,
+    e.g. the percentage of CS majors with SQL. Faculty and admins only.
+    """
+    _require_cohort_viewer(current_user)
+    if group_by is not None and group_by not in GROUP_COLUMNS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"group_by must be one of {', '.join(GROUP_COLUMNS)}.")
+    skill_ids = list(dict.fromkeys(skill_id))
+    if len(skill_ids) > MAX_DISTRIBUTION_SKILLS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_DISTRIBUTION_SKILLS} skills per request.")
+    min_level = _min_level(min_proficiency)
+
+    snapshot = skill_analytics.snapshot(db)
+    cohort = snapshot.cohort(department, major)
+    groups = snapshot.group_counts(skill_ids, group_by, cohort, min_level) if cohort is not None else []
+    names = _skill_names(db, skill_ids)
+    return analytics_schemas.SkillDistributionResponse(
+        group_by=group_by,
+        min_proficiency=min_proficiency,
+        as_of=snapshot.built_at,
+        groups=[
+            analytics_schemas.SkillDistributionGroup(
+                group=group.group, students=group.students, skills=[_coverage(count, names) for count in group.skills]
+            )
+            for group in groups
+        ]
+    )
+
+
+@router.get("/skills/top", response_model=analytics_schemas.CohortSkillsResponse)
+def get_top_skills(
+    department: Optional[str] = Query(None, description="Only students in this department"),
+    major: Optional[str] = Query(None, description="Only students with this major"),
+    min_proficiency: Optional[str] = Query(None, description="Only count skills held at this level or above"),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """The skills held by most students of a cohort. Faculty and admins only."""
+    _require_cohort_viewer(current_user)
+    min_level = _min_level(min_proficiency)
+
+    snapshot = skill_analytics.snapshot(db)
+    cohort = snapshot.cohort(department, major)
+    counts = snapshot.top_skills(cohort, limit, min_level) if cohort is not None else []
+    names = _skill_names(db, [count.skill_id for count in counts])
+    return analytics_schemas.CohortSkillsResponse(
+        department=department,
+        major=major,
+        min_proficiency=min_proficiency,
+        students=int(cohort.sum()) if cohort is not None else 0,
+        as_of=snapshot.built_at,
+        skills=[_coverage(count, names) for count in counts]
+    )
+
+
+@router.get("/skills/gaps", response_model=analytics_schemas.SkillGapsResponse)
+def get_skill_gaps(
+    department: Optional[str] = Query(None, description="Only students in, and postings of, this department"),
+    major: Optional[str] = Query(None, description="Only students with this major"),
+    min_proficiency: Optional[str] = Query(None, description="Only count skills held at this level or above"),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    The skills most demanded by open postings that the cohort lacks: postings requiring
+    the skill times the share of students without it. Faculty and admins only.
+    """
+    _require_cohort_viewer(current_user)
+    min_level = _min_level(min_proficiency)
+
+    snapshot = skill_analytics.snapshot(db)
+    cohort = snapshot.cohort(department, major)
+    gaps = snapshot.gaps(cohort, open_posting_demand(department), limit, min_level) if cohort is not None else []
+    names = _skill_names(db, [gap.skill_id for gap in gaps])
+    return analytics_schemas.SkillGapsResponse(
+        department=department,
+        major=major,
+        students=int(cohort.sum()) if cohort is not None else 0,
+        as_of=snapshot.built_at,
+        gaps=[
+            analytics_schemas.SkillGap(
+                **_coverage(SkillCount(gap.skill_id, gap.holders, gap.students), names).dict(),
+                open_postings=gap.open_postings,
+                mandatory_postings=gap.mandatory_postings,
+                gap_score=gap.gap_score,
+            )
+            for gap in gaps
+        ]
+    )
@@ -0,0 +1,168 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from database.connection import get_db
+from database import models
+from schemas import application as application_schemas
+from routers.auth import get_current_user
+from services import application_workflow
+from services.deadline_scheduler import close_full_opportunities
+
+router = APIRouter()
+
+
+def _get_student_profile(db: Session, current_user: models.User) -> models.StudentProfile:
+    if not any(role.role.name == "student" for role in current_user.roles):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a student.")
+    student_profile = db.query(models.StudentProfile).filter(models.StudentProfile.user_id == current_user.id).first()
+    if not student_profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student profile not found.")
+    return student_profile
+
+
+def _get_reviewable_opportunity(db: Session, opportunity_id: int, current_user: models.User) -> models.Opportunity:
+    opportunity = db.query(models.Opportunity).filter(models.Opportunity.id == opportunity_id).first()
+    if not opportunity:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Opportunity not found")
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    if opportunity.posted_by_user_id != current_user.id and not is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to review applications for this opportunity")
+    return opportunity
+
+
+@router.post("/", response_model=application_schemas.ApplicationResponse, status_code=status.HTTP_201_CREATED)
+def apply_to_opportunity(
+    application_data: application_schemas.ApplicationCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Apply to an open opportunity as the current student."""
+    student_profile = _get_student_profile(db, current_user)
+
+    opportunity = db.query(models.Opportunity).filter(models.Opportunity.id == application_data.opportunity_id).first()
+    if not opportunity or opportunity.status != 'open':
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Open opportunity not found")
+
+    existing = db.query(models.StudentApplication.id).filter(
+        models.StudentApplication.student_profile_id == student_profile.id,
+        models.StudentApplication.opportunity_id == opportunity.id,
+    ).first()
+    if existing:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Already applied to this opportunity")
+
+    application_workflow.lock_opportunities(db, [opportunity.id])
+    application = models.StudentApplication(
+        student_profile_id=student_profile.id,
+        opportunity_id=opportunity.id,
+        application_status="applied",
+        cover_letter_url=application_data.cover_letter_url,
+        submission_details=application_data.submission_details,
+        version=1,
+    )
+    db.add(application)
+    try:
+        # The unique constraint catches a concurrent apply that passed the check above too
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Already applied to this opportunity")
+    application_workflow.update_status_counts(db, {(opportunity.id, "applied"): 1})
+    db.commit()
+    db.refresh(application)
+    return application
+
+
+@router.get("/me", response_model=List[application_schemas.ApplicationResponse])
+def list_my_applications(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """List the current student's applications."""
+    student_profile = _get_student_profile(db, current_user)
+    return db.query(models.StudentApplication).filter(
+        models.StudentApplication.student_profile_id == student_profile.id
+    ).order_by(models.StudentApplication.applied_at.desc()).all()
+
+
+@router.post("/{application_id}/withdraw", response_model=application_schemas.BulkTransitionResult)
+def withdraw_application(
+    application_id: int,
+    version: int = Query(..., description="Version of the application the student last saw"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Withdraw one of the current student's applications."""
+    student_profile = _get_student_profile(db, current_user)
+    result = application_workflow.transition(
+        db, {application_id: version}, "withdrawn", allowed_student_profile_id=student_profile.id
+    )
+    if result.conflicts:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Application was changed; reload and try again.")
+    if result.invalid:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Application cannot be withdrawn.")
+    return application_schemas.BulkTransitionResult(updated=result.updated)
+
+
+@router.get("/opportunity/{opportunity_id}", response_model=List[application_schemas.ApplicationResponse])
+def list_opportunity_applications(
+    opportunity_id: int,
+    application_status: Optional[str] = Query(None, description="Filter by application status"),
+    skip: int = 0,
+    limit: int = Query(100, le=1000),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """List applications to an opportunity. Only the poster or an admin can review them."""
+    _get_reviewable_opportunity(db, opportunity_id, current_user)
+    query = db.query(models.StudentApplication).filter(models.StudentApplication.opportunity_id == opportunity_id)
+    if application_status:
+        query = query.filter(models.StudentApplication.application_status == application_status)
+    return query.order_by(models.StudentApplication.id).offset(skip).limit(limit).all()
+
+
+@router.get("/opportunity/{opportunity_id}/counts", response_model=application_schemas.ApplicationStatusCounts)
+def get_application_counts(
+    opportunity_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Applications per status for an opportunity, read from the counter table."""
+    _get_reviewable_opportunity(db, opportunity_id, current_user)
+    return application_schemas.ApplicationStatusCounts(
+        opportunity_id=opportunity_id,
+        counts=application_workflow.status_counts(db, opportunity_id)
+    )
+
+
+@router.post("/bulk-transition", response_model=application_schemas.BulkTransitionResult)
+def bulk_transition_applications(
+    transition_data: application_schemas.BulkTransitionRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Move many applications to a new status at once.
+    Applications changed since the reviewer loaded them come back as conflicts;
+    the rest are updated. Reviewers can only touch applications to their own postings
+    (admins can touch any).
+    """
+    if transition_data.to_status not in application_workflow.TRANSITIONS \
+            or transition_data.to_status in application_workflow.STUDENT_ONLY_STATUSES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cannot move applications to '{transition_data.to_status}'.")
+
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    allowed_opportunity_ids = None
+    if not is_admin:
+        allowed_opportunity_ids = {row[0] for row in db.query(models.Opportunity.id).filter(
+            models.Opportunity.posted_by_user_id == current_user.id
+        ).all()}
+
+    expected_versions = {item.id: item.version for item in transition_data.applications}
+    result = application_workflow.transition(
+        db, expected_versions, transition_data.to_status, allowed_opportunity_ids=allowed_opportunity_ids
+    )
+    # Postings that just filled their last position stop taking applications
+    if result.accepted_by_opportunity:
+        close_full_opportunities(db, result.accepted_by_opportunity)
+    return application_schemas.BulkTransitionResult(
+        updated=result.updated, conflicts=result.conflicts, invalid=result.invalid
+    )
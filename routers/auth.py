@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from datetime import timedelta
 
 from database.connection import get_db
 from database import models
 from schemas import auth as auth_schemas, user as user_schemas, oauth2_scheme
+from services.candidate_index import candidate_index
 from utils.security import get_password_hash, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 
 router = APIRouter()
@@ -48,6 +49,7 @@ def register_user(user_data: auth_schemas.UserCreate, db: Session = Depends(get_
         student_profile = models.StudentProfile(user_id=new_user.id)
         db.add(student_profile)
         db.commit()
+        candidate_index.upsert_student(student_profile.id, new_user.id, None, None, None)
     elif user_data.role_name in ["faculty", "industry_partner"]:
         faculty_org_profile = models.FacultyOrgProfile(user_id=new_user.id)
         db.add(faculty_org_profile)
@@ -85,7 +87,10 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if email is None or user_id is None:
         raise credentials_exception
     token_data = auth_schemas.TokenData(email=email)
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    # Roles are loaded with the user: nearly every endpoint checks current_user.roles -> role.name
+    user = db.query(models.User).options(
+        joinedload(models.User.roles).joinedload(models.UserRole.role)
+    ).filter(models.User.id == user_id).first()
     if user is None:
         raise credentials_exception
     return user
@@ -0,0 +1,42 @@
+import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from database import models
+from routers.auth import get_current_user
+from services.data_export import EXPORTS, FORMATS, MEDIA_TYPES, export_chunks, open_export_session, parquet_available
+
+router = APIRouter()
+
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    fmt: str = Query("csv", alias="format", description="csv or parquet (needs pyarrow on the server)"),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Streams a full export of profiles, applications or skills as CSV or Parquet.
+    Rows are read and written batch by batch, so any size can be exported. Admins only.
+    """
+    if not any(role.role.name == "admin" for role in current_user.roles):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to export data.")
+    if dataset not in EXPORTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown export. Available: {', '.join(EXPORTS)}.")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"format must be one of {', '.join(FORMATS)}.")
+    if fmt == "parquet" and not parquet_available():
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Parquet export needs pyarrow installed on the server.")
+
+    def stream():
+        # The session lives as long as the response body, not the request handler
+        db = open_export_session()
+        try:
+            yield from export_chunks(db, dataset, fmt)
+        finally:
+            db.close()
+
+    filename = f"{dataset}-{datetime.date.today().isoformat()}.{fmt}"
+    return StreamingResponse(stream(), media_type=MEDIA_TYPES[fmt], headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
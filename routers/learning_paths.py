@@ -0,0 +1,156 @@
+import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session, joinedload
+from typing import List
+
+from database.connection import get_db
+from database import models
+from schemas import learning_path as learning_path_schemas
+from routers.auth import get_current_user
+from services import learning_progress
+from services.skill_catalog import skill_catalog
+
+router = APIRouter()
+
+
+def _get_student_profile(db: Session, current_user: models.User) -> models.StudentProfile:
+    if not any(role.role.name == "student" for role in current_user.roles):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a student.")
+    student_profile = db.query(models.StudentProfile).filter(models.StudentProfile.user_id == current_user.id).first()
+    if not student_profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student profile not found.")
+    return student_profile
+
+
+@router.post("/me", response_model=List[learning_path_schemas.LearningPathResponse], status_code=status.HTTP_201_CREATED)
+def accept_learning_paths(
+    paths: List[learning_path_schemas.LearningPathAccept],
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Persist recommended learning paths the student accepted, in one multi-row INSERT.
+    Paths the student already has (same resource and target skill) are skipped.
+    """
+    student_profile = _get_student_profile(db, current_user)
+    wanted = {(p.resource_id, p.target_skill_id): p for p in paths}
+    if not wanted:
+        return []
+
+    known_resources = {row[0] for row in db.query(models.LearningResource.id).filter(
+        models.LearningResource.id.in_({resource_id for resource_id, _ in wanted})
+    ).all()}
+    missing = sorted({resource_id for resource_id, _ in wanted} - known_resources)
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Learning resources not found: {missing}")
+    target_skill_ids = {skill_id for _, skill_id in wanted if skill_id is not None}
+    missing = sorted(target_skill_ids - set(skill_catalog.skills_by_id(db, target_skill_ids)))
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Skills not found: {missing}")
+
+    existing = set(db.query(models.StudentLearningPath.resource_id, models.StudentLearningPath.target_skill_id).filter(
+        models.StudentLearningPath.student_profile_id == student_profile.id
+    ).all())
+    new_paths = [p for key, p in wanted.items() if key not in existing]
+
+    def apply(db: Session):
+        if not new_paths:
+            return
+        now = datetime.datetime.now()
+        db.execute(models.StudentLearningPath.__table__.insert(), [
+            {
+                "student_profile_id": student_profile.id,
+                "resource_id": p.resource_id,
+                "target_skill_id": p.target_skill_id,
+                "status": "assigned",
+                "assigned_at": now,
+                "notes": p.notes,
+            }
+            for p in new_paths
+        ])
+        learning_progress.record_changes(db, [
+            (student_profile.id, p.target_skill_id, student_profile.department, None, "assigned") for p in new_paths
+        ])
+
+    learning_progress.commit_with_retry(db, apply)
+    return db.query(models.StudentLearningPath).options(joinedload(models.StudentLearningPath.resource)).filter(
+        models.StudentLearningPath.student_profile_id == student_profile.id
+    ).order_by(models.StudentLearningPath.id).all()
+
+
+@router.get("/me", response_model=List[learning_path_schemas.LearningPathResponse])
+def list_my_learning_paths(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """List the current student's learning paths."""
+    student_profile = _get_student_profile(db, current_user)
+    return db.query(models.StudentLearningPath).options(joinedload(models.StudentLearningPath.resource)).filter(
+        models.StudentLearningPath.student_profile_id == student_profile.id
+    ).order_by(models.StudentLearningPath.id).all()
+
+
+@router.patch("/me/{path_id}", response_model=learning_path_schemas.LearningPathResponse)
+def update_learning_path_status(
+    path_id: int,
+    update: learning_path_schemas.LearningPathStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Record progress on one of the current student's learning paths."""
+    student_profile = _get_student_profile(db, current_user)
+    path = db.query(models.StudentLearningPath).filter(
+        models.StudentLearningPath.id == path_id,
+        models.StudentLearningPath.student_profile_id == student_profile.id,
+    ).first()
+    if not path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Learning path not found.")
+    if update.status == path.status:
+        return path
+    if update.status not in learning_progress.TRANSITIONS.get(path.status, ()):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cannot move a '{path.status}' path to '{update.status}'.")
+
+    old_status = path.status
+
+    def apply(db: Session):
+        # Conditional UPDATE so two concurrent updates cannot both count the same move
+        moved = db.query(models.StudentLearningPath).filter(
+            models.StudentLearningPath.id == path.id,
+            models.StudentLearningPath.status == old_status,
+        ).update({
+            models.StudentLearningPath.status: update.status,
+            models.StudentLearningPath.completed_at: datetime.datetime.now() if update.status == "completed" else None,
+        }, synchronize_session=False)
+        if not moved:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Learning path was changed; reload and try again.")
+        learning_progress.record_changes(db, [
+            (student_profile.id, path.target_skill_id, student_profile.department, old_status, update.status)
+        ])
+
+    learning_progress.commit_with_retry(db, apply)
+    db.refresh(path)
+    return path
+
+
+@router.get("/me/progress", response_model=learning_path_schemas.ProgressSummary)
+def get_my_progress(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """The current student's learning progress, from the precomputed counters."""
+    student_profile = _get_student_profile(db, current_user)
+    return learning_progress.summary(db, "student", str(student_profile.id))
+
+
+@router.get("/skills/{skill_id}/progress", response_model=learning_path_schemas.ProgressSummary)
+def get_skill_progress(skill_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """Learning progress across all students for one target skill."""
+    return learning_progress.summary(db, "skill", str(skill_id))
+
+
+@router.get("/departments/{department}/progress", response_model=learning_path_schemas.DepartmentProgressResponse)
+def get_department_progress(department: str, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """
+    Progress dashboard for a whole department, overall and per target skill.
+    Served from the counters only. Faculty and admins can view it.
+    """
+    if not any(role.role.name in ["faculty", "admin"] for role in current_user.roles):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view department progress.")
+    return learning_path_schemas.DepartmentProgressResponse(
+        department=learning_progress.summary(db, "department", department),
+        skills=learning_progress.department_skill_summaries(db, department)
+    )
@@ -0,0 +1,129 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import List
+
+from database.connection import get_db
+from database import models
+from schemas import notification as notification_schemas
+from routers.auth import get_current_user
+from services.notification_hub import hub, unread_counts
+from utils.security import user_id_from_token
+
+router = APIRouter()
+
+# Idle streams send a comment/ping this often so proxies keep them open
+KEEPALIVE_SECONDS = 15
+
+
+@router.get("/me", response_model=List[notification_schemas.NotificationResponse])
+def list_my_notifications(
+    skip: int = 0,
+    limit: int = Query(50, le=200),
+    unread_only: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """List the current user's notifications, newest first."""
+    query = db.query(models.Notification).filter(models.Notification.user_id == current_user.id)
+    if unread_only:
+        query = query.filter(models.Notification.is_read == False) # noqa: E712
+    return query.order_by(models.Notification.id.desc()).offset(skip).limit(limit).all()
+
+
+@router.get("/me/unread-count", response_model=notification_schemas.UnreadCountResponse)
+def get_my_unread_count(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """Unread notification count, served from the per-user cache."""
+    return {"unread_count": unread_counts.get(db, current_user.id)}
+
+
+@router.post("/me/read-all", response_model=notification_schemas.UnreadCountResponse)
+def mark_all_read(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """Mark every notification of the current user as read."""
+    db.query(models.Notification).filter(
+        models.Notification.user_id == current_user.id,
+        models.Notification.is_read == False, # noqa: E712
+    ).update({models.Notification.is_read: True}, synchronize_session=False)
+    db.commit()
+    unread_counts.reset(current_user.id, 0)
+    return {"unread_count": 0}
+
+
+@router.post("/{notification_id}/read", response_model=notification_schemas.NotificationResponse)
+def mark_read(notification_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """Mark a single notification as read."""
+    notification = db.query(models.Notification).filter(
+        models.Notification.id == notification_id,
+        models.Notification.user_id == current_user.id,
+    ).first()
+    if not notification:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
+    if not notification.is_read:
+        notification.is_read = True
+        db.commit()
+        db.refresh(notification)
+        unread_counts.add(current_user.id, -1)
+    return notification
+
+
+@router.websocket("/ws")
+async def notifications_websocket(websocket: WebSocket, token: str = Query(...)):
+    """Push channel: each new notification is sent as a JSON message."""
+    user_id = user_id_from_token(token)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    queue = hub.subscribe(user_id)
+    receiver = asyncio.ensure_future(websocket.receive())
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, timeout=KEEPALIVE_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                if receiver.result()["type"] == "websocket.disconnect":
+                    break
+                receiver = asyncio.ensure_future(websocket.receive()) # Clients have nothing to say; ignore
+                continue
+            if getter in done:
+                await websocket.send_json(getter.result())
+            else:
+                getter.cancel()
+                await websocket.send_json({"type": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        hub.unsubscribe(user_id, queue)
+
+
+@router.get("/stream")
+async def notifications_stream(request: Request, token: str = Query(...)):
+    """Server-Sent Events channel, for clients that cannot use WebSockets (EventSource cannot set headers, hence the token parameter)."""
+    user_id = user_id_from_token(token)
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+
+    queue = hub.subscribe(user_id)
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: notification\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            hub.unsubscribe(user_id, queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
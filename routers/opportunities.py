@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import datetime
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 
@@ -6,12 +7,26 @@ from database.connection import get_db
 from database import models
 from schemas import opportunity as opportunity_schemas
 from routers.auth import get_current_user
+from services.incremental_recommendations import incremental_engine
+from services.candidate_index import candidate_index
+from services.deadline_scheduler import deadline_scheduler
+from services.opportunity_catalog import opportunity_catalog
+from utils.read_routing import get_read_db
+from services.skill_catalog import skill_catalog
 
 router = APIRouter()
 
+
+def _unknown_skill_ids(db: Session, required_skills) -> List[int]:
+    skill_ids = [s.skill_id for s in required_skills]
+    known = skill_catalog.skills_by_id(db, skill_ids)
+    return [skill_id for skill_id in skill_ids if skill_id not in known]
+
+
 @router.post("/", response_model=opportunity_schemas.OpportunityResponse, status_code=status.HTTP_201_CREATED)
 def create_opportunity(
     opportunity_data: opportunity_schemas.OpportunityCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -22,6 +37,11 @@ def create_opportunity(
     if not is_authorized:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only faculty or industry partners can post opportunities.")
 
+    # Validate every required skill against the skill catalog, before anything is written
+    missing_skill_ids = _unknown_skill_ids(db, opportunity_data.required_skills)
+    if missing_skill_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Skill with ID {missing_skill_ids[0]} not found.")
+
     db_opportunity = models.Opportunity(
         posted_by_user_id=current_user.id,
         **opportunity_data.dict(exclude={"required_skills"})
@@ -32,10 +52,6 @@ def create_opportunity(
 
     # Add required skills
     for skill_req in opportunity_data.required_skills:
-        db_skill = db.query(models.Skill).filter(models.Skill.id == skill_req.skill_id).first()
-        if not db_skill:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Skill with ID {skill_req.skill_id} not found.")
-
         opportunity_skill = models.OpportunityRequiredSkill(
             opportunity_id=db_opportunity.id,
             skill_id=skill_req.skill_id,
@@ -50,20 +66,45 @@ def create_opportunity(
         joinedload(models.Opportunity.required_skills).joinedload(models.OpportunityRequiredSkill.skill)
     ).filter(models.Opportunity.id == db_opportunity.id).first()
 
+    # Score the new posting for students holding its required skills, after responding
+    if db_opportunity.status == 'open':
+        deadline_scheduler.schedule(db_opportunity.id, db_opportunity.application_deadline)
+        background_tasks.add_task(
+            incremental_engine.opportunity_opened,
+            db_opportunity.id,
+            [ors.skill_id for ors in db_opportunity.required_skills]
+        )
+    opportunity_catalog.upsert(db_opportunity)
+
     return db_opportunity
 
 @router.get("/", response_model=List[opportunity_schemas.OpportunityResponse])
 def get_all_opportunities(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     type: Optional[str] = Query(None, description="Filter by opportunity type (internship, research, training)"),
     department: Optional[str] = Query(None, description="Filter by department"),
-    location: Optional[str] = Query(None, description="Filter by location")
+    location: Optional[str] = Query(None, description="Filter by location"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by status (open, closed, archived)")
 ):
     """
     Get a list of all opportunities with optional filters.
+    Open opportunities (status=open) are served from the in-memory opportunity catalog,
+    which leaves out postings past their application deadline.
     """
+    if status_filter == 'open':
+        # Compared case-insensitively, like the MySQL collation the query path relies on
+        records = [
+            record for record in opportunity_catalog.snapshot().live()
+            if (not type or (record.type or "").lower() == type.lower())
+            and (not department or (record.department or "").lower() == department.lower())
+            and (not location or location.lower() in (record.location or "").lower())
+        ]
+        page = records[skip:skip + limit]
+        skills = skill_catalog.skills_by_id(db, {skill_id for record in page for skill_id in record.skill_ids})
+        return opportunity_schemas.opportunity_responses(page, skills)
+
     query = db.query(models.Opportunity).options(
         joinedload(models.Opportunity.required_skills).joinedload(models.OpportunityRequiredSkill.skill)
     )
@@ -74,12 +115,14 @@ def get_all_opportunities(
         query = query.filter(models.Opportunity.department == department)
     if location:
         query = query.filter(models.Opportunity.location.ilike(f"%{location}%"))
+    if status_filter:
+        query = query.filter(models.Opportunity.status == status_filter)
 
     opportunities = query.offset(skip).limit(limit).all()
     return opportunities
 
 @router.get("/{opportunity_id}", response_model=opportunity_schemas.OpportunityResponse)
-def get_opportunity(opportunity_id: int, db: Session = Depends(get_db)):
+def get_opportunity(opportunity_id: int, db: Session = Depends(get_read_db)):
     """
     Get details of a specific opportunity by ID.
     """
@@ -91,10 +134,47 @@ def get_opportunity(opportunity_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Opportunity not found")
     return opportunity
 
+@router.get("/{opportunity_id}/candidates", response_model=List[opportunity_schemas.CandidateStudentResponse])
+def get_opportunity_candidates(
+    opportunity_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    department: Optional[str] = Query(None, description="Only students in this department"),
+    major: Optional[str] = Query(None, description="Only students with this major"),
+    min_gpa: Optional[float] = Query(None, description="Only students with at least this GPA"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Rank the students who best match an opportunity's required skills.
+    Only the poster, faculty, industry partners and admins can search candidates.
+    """
+    opportunity = db.query(models.Opportunity).options(
+        joinedload(models.Opportunity.required_skills)
+    ).filter(models.Opportunity.id == opportunity_id).first()
+    if not opportunity:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Opportunity not found")
+
+    is_authorized = opportunity.posted_by_user_id == current_user.id or any(
+        role.role.name in ["faculty", "industry_partner", "admin"] for role in current_user.roles
+    )
+    if not is_authorized:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view candidates for this opportunity")
+
+    candidates = candidate_index.top_candidates(
+        db,
+        [(ors.skill_id, ors.is_mandatory is not False) for ors in opportunity.required_skills],
+        k=limit,
+        department=department,
+        major=major,
+        min_gpa=min_gpa,
+    )
+    return [opportunity_schemas.CandidateStudentResponse(**c._asdict()) for c in candidates]
+
 @router.put("/{opportunity_id}", response_model=opportunity_schemas.OpportunityResponse)
 def update_opportunity(
     opportunity_id: int,
     updated_data: opportunity_schemas.OpportunityUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -108,16 +188,58 @@ def update_opportunity(
     if opportunity.posted_by_user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this opportunity")
 
-    for field, value in updated_data.dict(exclude_unset=True).items():
+    skills_changed = updated_data.required_skills is not None
+    if skills_changed:
+        missing_skill_ids = _unknown_skill_ids(db, updated_data.required_skills)
+        if missing_skill_ids:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Skill with ID {missing_skill_ids[0]} not found.")
+
+    was_open = opportunity.status == 'open'
+    for field, value in updated_data.dict(exclude_unset=True, exclude={"required_skills"}).items():
         setattr(opportunity, field, value)
 
+    # Replace required skills only when they are part of the update
+    if skills_changed:
+        db.query(models.OpportunityRequiredSkill).filter(
+            models.OpportunityRequiredSkill.opportunity_id == opportunity.id
+        ).delete(synchronize_session=False)
+        for skill_req in updated_data.required_skills:
+            db.add(models.OpportunityRequiredSkill(
+                opportunity_id=opportunity.id,
+                skill_id=skill_req.skill_id,
+                is_mandatory=skill_req.is_mandatory
+            ))
+        # The row itself may be unchanged; other workers' catalogs poll updated_at
+        opportunity.updated_at = datetime.datetime.now()
+
     db.commit()
-    db.refresh(opportunity)
+    # Reload with the required skills and their skills in one query (the response nests them)
+    opportunity = db.query(models.Opportunity).options(
+        joinedload(models.Opportunity.required_skills).joinedload(models.OpportunityRequiredSkill.skill)
+    ).filter(models.Opportunity.id == opportunity.id).first()
+
+    # Keep the deadline timer and materialized recommendations in step with the posting
+    if opportunity.status == 'open':
+        deadline_scheduler.schedule(opportunity.id, opportunity.application_deadline)
+    else:
+        deadline_scheduler.cancel_many([opportunity.id])
+
+    if opportunity.status == 'open' and (not was_open or skills_changed):
+        background_tasks.add_task(
+            incremental_engine.opportunity_opened,
+            opportunity.id,
+            [ors.skill_id for ors in opportunity.required_skills]
+        )
+    elif was_open and opportunity.status != 'open':
+        background_tasks.add_task(incremental_engine.opportunity_closed, opportunity.id)
+    opportunity_catalog.upsert(opportunity)
+
     return opportunity
 
 @router.delete("/{opportunity_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_opportunity(
     opportunity_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -132,5 +254,10 @@ def delete_opportunity(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this opportunity")
 
     db.delete(opportunity)
+    # Other workers' opportunity catalogs pick the delete up from the tombstone
+    db.merge(models.OpportunityTombstone(opportunity_id=opportunity_id, deleted_at=datetime.datetime.now()))
     db.commit()
+    deadline_scheduler.cancel_many([opportunity_id])
+    opportunity_catalog.remove_many([opportunity_id])
+    background_tasks.add_task(incremental_engine.opportunity_closed, opportunity_id)
     return None
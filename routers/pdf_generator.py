@@ -13,6 +13,7 @@ from routers.auth import get_current_user
 from database import models
 from database.connection import get_db
 from sqlalchemy.orm import Session, joinedload
+from utils.profiling import stage
 
 router = APIRouter()
 
@@ -25,13 +26,26 @@ jinja_env = Environment(
 )
 
 # --- PDFKit Configuration (Adjust path for wkhtmltopdf) ---
-# IMPORTANT: Replace this with the actual path to wkhtmltopdf.exe/binary on your system
-# For Linux/macOS, if wkhtmltopdf is in PATH, you might not need to specify the path.
+# Set WKHTMLTOPDF_PATH to the wkhtmltopdf binary if it is not on PATH.
 # Example for Windows: r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
 # Example for Linux/macOS (if not in PATH): "/usr/local/bin/wkhtmltopdf"
-# WKHTMLTOPDF_PATH = os.getenv("WKHTMLTOPDF_PATH", "/usr/local/bin/wkhtmltopdf") # Default for common Linux/macOS
-WKHTMLTOPDF_PATH = r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
-pdfkit_config = pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF_PATH)
+WKHTMLTOPDF_PATH = os.getenv("WKHTMLTOPDF_PATH")
+_pdfkit_config = None
+
+def get_pdfkit_config():
+    """
+    Builds the pdfkit configuration on first use. pdfkit looks the binary up when the
+    configuration is created, so doing it at import would fail every worker on hosts
+    without wkhtmltopdf, even if no PDF is ever generated.
+    """
+    global _pdfkit_config
+    if _pdfkit_config is None:
+        if WKHTMLTOPDF_PATH:
+            _pdfkit_config = pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF_PATH)
+        else:
+            _pdfkit_config = pdfkit.configuration()
+    return _pdfkit_config
+
 # --- Pydantic Schema for CV Data (Matches your sample data structure) ---
 class ExperienceItem(BaseModel):
     role: str
@@ -138,27 +152,32 @@ async def generate_cv_pdf(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to generate this CV.")
 
     # Fetch student profile and related user data
-    student_profile = db.query(models.StudentProfile).options(
-        joinedload(models.StudentProfile.user),
-        joinedload(models.StudentProfile.student_skills).joinedload(models.StudentSkill.skill)
-    ).filter(models.StudentProfile.user_id == user_id).first()
+    with stage("db"):
+        student_profile = db.query(models.StudentProfile).options(
+            joinedload(models.StudentProfile.user),
+            joinedload(models.StudentProfile.student_skills).joinedload(models.StudentSkill.skill)
+        ).filter(models.StudentProfile.user_id == user_id).first()
 
     if not student_profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student profile not found.")
 
     # Prepare data for the template
-    cv_data_for_template = get_student_cv_data(student_profile)
+    with stage("serialization"):
+        cv_data_for_template = get_student_cv_data(student_profile)
 
     # Render HTML from template
-    template = jinja_env.get_template("cv_template.html")
-    html_content = template.render(cv_data_for_template.dict())
+    with stage("render"):
+        template = jinja_env.get_template("cv_template.html")
+        html_content = template.render(cv_data_for_template.dict())
 
     # Convert HTML to PDF
     try:
         # Use a BytesIO buffer to hold the PDF content in memory
-        pdf_output = io.BytesIO()
-        pdfkit.from_string(html_content, pdf_output, configuration=pdfkit_config, options={'enable-local-file-access': None})
-        pdf_output.seek(0) # Rewind the buffer to the beginning
+        # (output_path=False makes pdfkit return the PDF bytes instead of writing a file)
+        with stage("pdf"):
+            pdf_output = io.BytesIO(pdfkit.from_string(
+                html_content, False, configuration=get_pdfkit_config(), options={'enable-local-file-access': None}
+            ))
 
         filename = f"{cv_data_for_template.name.replace(' ', '_')}_CV.pdf"
         
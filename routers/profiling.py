@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from typing import List
+
+from database import models
+from schemas import profiling as profiling_schemas
+from routers.auth import get_current_user
+from utils.profiling import profile_store, profile_window
+
+router = APIRouter()
+
+# Profiles live in the memory of the worker that recorded them; with several workers,
+# fetch a profile from the same worker (X-Profile-Id ids are per worker).
+
+
+def _require_admin(current_user: models.User):
+    if not any(role.role.name == "admin" for role in current_user.roles):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to profile the API.")
+
+
+@router.post("/window", response_class=PlainTextResponse)
+def profile_for_window(
+    seconds: float = Query(10, gt=0, le=60, description="How long to sample every thread of this worker"),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Samples this worker for a time window and returns the collapsed stacks
+    (feed them to flamegraph.pl or speedscope). Admins only.
+    """
+    _require_admin(current_user)
+    profile_id = profile_window(seconds)
+    if profile_id is None:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many profiles are already running on this worker.")
+    return PlainTextResponse(profile_store.get(profile_id).collapsed(), headers={"X-Profile-Id": str(profile_id)})
+
+
+@router.get("/profiles", response_model=List[profiling_schemas.ProfileSummary])
+def list_profiles(current_user: models.User = Depends(get_current_user)):
+    """Recent profiles recorded by this worker, newest first. Admins only."""
+    _require_admin(current_user)
+    return profile_store.summaries()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: int, current_user: models.User = Depends(get_current_user)):
+    """One profile as collapsed stacks ("frame;frame;frame count" per line). Admins only."""
+    _require_admin(current_user)
+    profiler = profile_store.get(profile_id)
+    if profiler is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found on this worker.")
+    return PlainTextResponse(profiler.collapsed())
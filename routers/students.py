@@ -1,16 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from database.connection import get_db
+from database.connection import SessionLocal, get_db
 from database import models
 from schemas import student as student_schemas, skill as skill_schemas
 from routers.auth import get_current_user # Import the dependency
 from services.nlp_service import extract_skills_from_text # Import NLP service
+from services.incremental_recommendations import incremental_engine
+from services.candidate_index import candidate_index
+from services import learning_progress
+from services.student_skills import add_skills_to_profile
+from services import resume_pipeline
+from utils.profiling import stage
+from utils.read_routing import get_read_db
+from utils.dataloader import loaders_for
 from typing import List, Optional
 
 router = APIRouter()
 
 @router.get("/profiles/me", response_model=student_schemas.StudentProfileResponse)
-def read_my_student_profile(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def read_my_student_profile(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_read_db)):
     """Get the current authenticated student's profile."""
     if not any(role.role.name == "student" for role in current_user.roles):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a student.")
@@ -39,19 +49,26 @@ def update_student_profile(
     if not student_profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student profile not found.")
 
+    old_department = student_profile.department
     # Update fields
     for field, value in profile_data.dict(exclude_unset=True).items():
         setattr(student_profile, field, value)
 
     db.add(student_profile)
+    # Keep the department progress counters in step with the student's department
+    learning_progress.move_department(db, student_profile.id, old_department, student_profile.department)
     db.commit()
     db.refresh(student_profile)
+    candidate_index.upsert_student(
+        student_profile.id, student_profile.user_id, student_profile.department, student_profile.major, student_profile.gpa
+    )
     return student_profile
 
 @router.post("/profiles/{user_id}/extract-skills", response_model=List[skill_schemas.StudentSkillResponse])
 def extract_and_add_skills_to_profile(
     user_id: int,
     text_to_analyze: str, # Could be resume content, project description, etc.
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -66,52 +83,127 @@ def extract_and_add_skills_to_profile(
     if not student_profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student profile not found.")
 
-    extracted_skill_names = [s['name'] for s in extract_skills_from_text(text_to_analyze)]
-    added_skills = []
-
-    for skill_name in extracted_skill_names:
-        # Check if skill exists in our ontology, if not, create it (simplified for hackathon)
-        db_skill = db.query(models.Skill).filter(models.Skill.name == skill_name).first()
-        if not db_skill:
-            db_skill = models.Skill(name=skill_name, category="Inferred") # Default category
-            db.add(db_skill)
-            db.commit()
-            db.refresh(db_skill)
-
-        # Check if student already has this skill
-        existing_student_skill = db.query(models.StudentSkill).filter(
-            models.StudentSkill.student_profile_id == student_profile.id,
-            models.StudentSkill.skill_id == db_skill.id
-        ).first()
-
-        if not existing_student_skill:
-            new_student_skill = models.StudentSkill(
-                student_profile_id=student_profile.id,
-                skill_id=db_skill.id,
-                proficiency_level="intermediate", # Default, can be refined
-                inferred_from="text_analysis"
-            )
-            db.add(new_student_skill)
-            db.commit()
-            db.refresh(new_student_skill)
-            added_skills.append(new_student_skill)
-        else:
-            added_skills.append(existing_student_skill) # Include existing ones in response
-
-    # Refresh the profile to get updated skills for the response model
-    db.refresh(student_profile)
-    # Manually load skills for the response model
-    response_skills = []
-    for ss in added_skills:
-        db.refresh(ss) # Ensure relationship is loaded
-        response_skills.append(skill_schemas.StudentSkillResponse(
-            skill_id=ss.skill_id,
-            proficiency_level=ss.proficiency_level,
-            inferred_from=ss.inferred_from,
-            skill=skill_schemas.SkillResponse.from_orm(ss.skill)
-        ))
-
-    return response_skills
+    with stage("nlp"):
+        extracted_skill_names = [s['name'] for s in extract_skills_from_text(text_to_analyze)]
+    with stage("db"):
+        skill_ids, new_skill_ids = add_skills_to_profile(db, student_profile, extracted_skill_names, inferred_from="text_analysis")
+
+    # Rescore only the opportunities that require the newly gained skills, after responding
+    if new_skill_ids:
+        background_tasks.add_task(incremental_engine.student_skills_added, student_profile.id, new_skill_ids)
+
+    # Build the response with two queries however many skills were found: the student's
+    # skill rows (expired by the commit) and the skills themselves through the request's loader
+    if not skill_ids:
+        return []
+    student_skills = {ss.skill_id: ss for ss in db.query(models.StudentSkill).filter(
+        models.StudentSkill.student_profile_id == student_profile.id,
+        models.StudentSkill.skill_id.in_(skill_ids),
+    ).all()}
+    skills = loaders_for(db).skills.load_many(skill_ids)
+    return [
+        skill_schemas.StudentSkillResponse(
+            skill_id=skill_id,
+            proficiency_level=student_skills[skill_id].proficiency_level,
+            inferred_from=student_skills[skill_id].inferred_from,
+            skill=skill_schemas.SkillResponse.from_orm(skills[skill_id])
+        )
+        for skill_id in skill_ids if skill_id in student_skills and skill_id in skills
+    ]
+
+@router.post("/profiles/{user_id}/resume", response_model=student_schemas.ResumeJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def upload_resume(
+    user_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Uploads a resume (PDF, DOCX or plain text) and queues skill extraction from it.
+    The file is stored in the database in chunks; poll the returned job for the result.
+    """
+    if user_id != current_user.id or not any(role.role.name == "student" for role in current_user.roles):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to modify this profile.")
+
+    student_profile = db.query(models.StudentProfile).filter(models.StudentProfile.user_id == user_id).first()
+    if not student_profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student profile not found.")
+
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if extension not in resume_pipeline.ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported resume type. Use one of: {', '.join(sorted(resume_pipeline.ALLOWED_EXTENSIONS))}")
+
+    # Finished jobs' uploads are replaced by this one; queued ones still need theirs
+    finished_job_ids = [row[0] for row in db.query(models.ResumeJob.id).filter(
+        models.ResumeJob.student_profile_id == student_profile.id,
+        models.ResumeJob.status.in_(['completed', 'failed']),
+    ).all()]
+    job = models.ResumeJob(
+        student_profile_id=student_profile.id,
+        status='queued',
+        original_filename=file.filename,
+    )
+    db.add(job)
+    db.flush()
+    try:
+        job.size_bytes, job.content_hash = resume_pipeline.save_upload(db, job.id, file.file)
+    except resume_pipeline.ResumeTooLarge:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Resume is larger than {resume_pipeline.RESUME_MAX_BYTES // (1024 * 1024)} MB.")
+    resume_pipeline.delete_files(db, finished_job_ids) # The jobs keep their status and extracted skills
+    student_profile.resume_url = f"/api/students/profiles/{user_id}/resume"
+    db.commit()
+    db.refresh(job)
+    resume_pipeline.resume_worker.submit(job.id)
+    return job
+
+@router.get("/profiles/{user_id}/resume")
+def download_resume(
+    user_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """The student's latest uploaded resume. Only the student themselves or an admin can download it."""
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    if user_id != current_user.id and not is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this resume.")
+
+    job = db.query(models.ResumeJob).join(
+        models.StudentProfile, models.StudentProfile.id == models.ResumeJob.student_profile_id
+    ).filter(models.StudentProfile.user_id == user_id).order_by(models.ResumeJob.id.desc()).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No resume uploaded.")
+    job_id, filename = job.id, (job.original_filename or "resume").replace('"', '')
+    extension = os.path.splitext(filename)[1].lower()
+
+    def stream():
+        # The session lives as long as the response body, not the request handler
+        stream_db = SessionLocal()
+        try:
+            yield from resume_pipeline.iter_file_chunks(stream_db, job_id)
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(stream(), media_type=resume_pipeline.MEDIA_TYPES.get(extension, "application/octet-stream"), headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
+
+@router.get("/resume-jobs/{job_id}", response_model=student_schemas.ResumeJobResponse)
+def get_resume_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Status of a resume extraction job. Only the owning student or an admin can view it."""
+    job = db.query(models.ResumeJob).filter(models.ResumeJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resume job not found.")
+    is_admin = any(role.role.name == "admin" for role in current_user.roles)
+    owner_user_id = db.query(models.StudentProfile.user_id).filter(models.StudentProfile.id == job.student_profile_id).scalar()
+    if owner_user_id != current_user.id and not is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this job.")
+    return job
+
 @router.delete("/profiles/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_student_profile(
     user_id: int,
@@ -134,8 +226,12 @@ def delete_student_profile(
     # Optional: delete related student skills if cascade not configured
     # db.query(models.StudentSkill).filter(models.StudentSkill.student_profile_id == student_profile.id).delete()
 
+    student_profile_id = student_profile.id
+    # Its learning paths go with it (ON DELETE CASCADE), so take them out of the progress counters
+    learning_progress.remove_student(db, student_profile_id, student_profile.department)
     db.delete(student_profile)
     db.commit()
+    candidate_index.remove_student(student_profile_id)
     return None
 
 # You can add endpoints for managing applications, learning paths here too
\ No newline at end of file
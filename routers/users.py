@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database.connection import get_db
+from utils.read_routing import get_read_db
 from database import models
 from schemas import user as user_schemas
 from routers.auth import get_current_user # Import the dependency
@@ -13,7 +14,7 @@ def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 @router.get("/{user_id}", response_model=user_schemas.UserInDB)
-def read_user(user_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def read_user(user_id: int, db: Session = Depends(get_read_db), current_user: models.User = Depends(get_current_user)):
     """Get details of a specific user by ID (admin/self access)."""
     # Basic authorization: allow user to see their own profile or admin to see any
     if user_id != current_user.id and not any(role.role.name == "admin" for role in current_user.roles):
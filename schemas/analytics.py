@@ -0,0 +1,59 @@
+import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+class TrendingEntity(BaseModel):
+    entity_type: str
+    entity_id: int
+    count: int
+
+class TrendingResponse(BaseModel):
+    entity_type: str
+    window_hours: int
+    items: List[TrendingEntity]
+
+class NlpCacheStats(BaseModel):
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    stores: int
+    memory_entries: int
+    hit_ratio: float
+    ontology_version: str
+
+class SkillCoverage(BaseModel):
+    skill_id: int
+    skill_name: Optional[str] = None
+    holders: int
+    percentage: float # Of the students in the group/cohort
+
+class SkillDistributionGroup(BaseModel):
+    group: Optional[str] = None # None: students without a department/major, or everyone
+    students: int
+    skills: List[SkillCoverage]
+
+class SkillDistributionResponse(BaseModel):
+    group_by: Optional[str] = None
+    min_proficiency: Optional[str] = None
+    as_of: datetime.datetime
+    groups: List[SkillDistributionGroup]
+
+class CohortSkillsResponse(BaseModel):
+    department: Optional[str] = None
+    major: Optional[str] = None
+    min_proficiency: Optional[str] = None
+    students: int
+    as_of: datetime.datetime
+    skills: List[SkillCoverage]
+
+class SkillGap(SkillCoverage):
+    open_postings: int
+    mandatory_postings: int
+    gap_score: float
+
+class SkillGapsResponse(BaseModel):
+    department: Optional[str] = None
+    major: Optional[str] = None
+    students: int
+    as_of: datetime.datetime
+    gaps: List[SkillGap]
@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any
+import datetime
+
+class ApplicationCreate(BaseModel):
+    opportunity_id: int
+    cover_letter_url: Optional[str] = None
+    submission_details: Optional[Dict[str, Any]] = None
+
+class ApplicationResponse(BaseModel):
+    id: int
+    student_profile_id: int
+    opportunity_id: int
+    application_status: str
+    applied_at: datetime.datetime
+    updated_at: Optional[datetime.datetime] = None
+    cover_letter_url: Optional[str] = None
+    submission_details: Optional[Dict[str, Any]] = None
+    version: int
+
+    class Config:
+        from_attributes = True
+
+class ApplicationVersion(BaseModel):
+    id: int
+    version: int # The version the reviewer saw; stale versions are reported as conflicts
+
+class BulkTransitionRequest(BaseModel):
+    to_status: str
+    applications: List[ApplicationVersion]
+
+class BulkTransitionResult(BaseModel):
+    updated: List[int] = []
+    conflicts: List[int] = [] # Changed by someone else since it was read
+    invalid: List[int] = []   # Missing, not allowed for this user, or not a valid transition
+
+class ApplicationStatusCounts(BaseModel):
+    opportunity_id: int
+    counts: Dict[str, int]
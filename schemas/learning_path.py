@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import Optional, List, Dict
+import datetime
+from schemas.learning_resources import LearningResourceBase
+
+class LearningPathAccept(BaseModel):
+    resource_id: int
+    target_skill_id: Optional[int] = None
+    notes: Optional[str] = None # e.g., the AI reason shown with the recommendation
+
+class LearningPathStatusUpdate(BaseModel):
+    status: str # 'in_progress', 'completed' or 'skipped'
+
+class LearningPathResource(LearningResourceBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+class LearningPathResponse(BaseModel):
+    id: int
+    resource_id: int
+    target_skill_id: Optional[int] = None
+    status: str
+    assigned_at: datetime.datetime
+    completed_at: Optional[datetime.datetime] = None
+    notes: Optional[str] = None
+    resource: Optional[LearningPathResource] = None
+
+    class Config:
+        from_attributes = True
+
+class ProgressSummary(BaseModel):
+    scope: str
+    scope_key: str
+    counts: Dict[str, int]
+    total: int
+    completion_rate: float
+
+class DepartmentProgressResponse(BaseModel):
+    department: ProgressSummary
+    skills: List[ProgressSummary]
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional
+import datetime
+
+class NotificationResponse(BaseModel):
+    id: int
+    type: str
+    message: str
+    is_read: bool
+    created_at: datetime.datetime
+    related_entity_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class UnreadCountResponse(BaseModel):
+    unread_count: int
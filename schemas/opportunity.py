@@ -1,7 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Iterable, Mapping, Optional, List
 import datetime
-from schemas.skill import OpportunityRequiredSkillCreate, OpportunityRequiredSkillResponse
+from schemas.skill import OpportunityRequiredSkillCreate, OpportunityRequiredSkillResponse, SkillResponse
 
 class OpportunityBase(BaseModel):
     title: str
@@ -44,3 +44,34 @@ class OpportunityResponse(OpportunityBase):
 
     class Config:
         from_attributes = True
+
+def opportunity_responses(records: Iterable[Any], skills: Mapping[int, Any]) -> List[OpportunityResponse]:
+    """
+    Builds responses for opportunity catalog records (services/opportunity_catalog.py),
+    nesting their required skills from skills (skill id -> skill row or catalog record).
+    """
+    responses = []
+    skill_responses = {}
+    for record in records:
+        fields = record._asdict()
+        skill_ids, mandatory = fields.pop("skill_ids"), fields.pop("mandatory")
+        required_skills = []
+        for skill_id, is_mandatory in zip(skill_ids, mandatory):
+            if skill_id not in skills:
+                continue # Deleted since the catalog was loaded
+            if skill_id not in skill_responses:
+                skill_responses[skill_id] = SkillResponse.from_orm(skills[skill_id])
+            required_skills.append(OpportunityRequiredSkillResponse(
+                skill_id=skill_id, is_mandatory=is_mandatory, skill=skill_responses[skill_id]
+            ))
+        responses.append(OpportunityResponse(**fields, required_skills=required_skills))
+    return responses
+
+class CandidateStudentResponse(BaseModel):
+    student_profile_id: int
+    user_id: int
+    department: Optional[str] = None
+    major: Optional[str] = None
+    gpa: Optional[float] = None
+    match_score: float
+    matched_skill_ids: List[int] = []
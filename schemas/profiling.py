@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Optional
+import datetime
+
+class ProfileSummary(BaseModel):
+    id: int
+    label: str # "GET /api/recommendations/for-student/me" or "window 10s"
+    started_at: Optional[datetime.datetime] = None
+    duration_ms: float
+    samples: int
+    distinct_stacks: int
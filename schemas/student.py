@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List
+import datetime
 from schemas.user import UserInDB
 from schemas.skill import SkillBase, StudentSkillCreate, StudentSkillResponse
 
@@ -23,4 +24,19 @@ class StudentProfileResponse(StudentProfileBase):
     skills: List[StudentSkillResponse] = [] # Nested student skills
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ResumeJobResponse(BaseModel):
+    id: int
+    status: str # 'queued', 'processing', 'completed' or 'failed'
+    original_filename: Optional[str] = None
+    size_bytes: Optional[int] = None
+    extracted_skills: Optional[List[str]] = None
+    error: Optional[str] = None
+    created_at: datetime.datetime
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,96 @@
+import sys
+import os
+import argparse
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, inspect, insert, select
+from sqlalchemy.schema import AddConstraint
+
+from database.connection import engine, SessionLocal
+from database import models
+
+# Rebuilds opportunity_application_counts from student_applications, for databases that had
+# applications before the counters existed (or whose counters drifted). Without it the counts
+# start at 0, go negative as old applications change status, and the deadline scheduler's
+# "positions filled" close misses earlier acceptances. Run it with the API stopped: it
+# replaces every counter row in one transaction.
+
+UNIQUE_CONSTRAINT = next(
+    c for c in models.StudentApplication.__table__.constraints
+    if c.name == "uq_student_applications_student_opportunity"
+)
+
+
+def duplicate_applications(db):
+    """(student_profile_id, opportunity_id, rows) of pairs applied to more than once."""
+    return db.query(
+        models.StudentApplication.student_profile_id,
+        models.StudentApplication.opportunity_id,
+        func.count(),
+    ).group_by(
+        models.StudentApplication.student_profile_id,
+        models.StudentApplication.opportunity_id,
+    ).having(func.count() > 1).all()
+
+
+def backfill_counts(db):
+    """Replaces the counters with one INSERT ... SELECT ... GROUP BY over the applications. Returns the rows written."""
+    counts = models.OpportunityApplicationCount.__table__
+    applications = models.StudentApplication.__table__
+    db.execute(counts.delete())
+    result = db.execute(insert(counts).from_select(
+        ["opportunity_id", "application_status", "count"],
+        select(
+            applications.c.opportunity_id,
+            applications.c.application_status,
+            func.count(),
+        ).group_by(applications.c.opportunity_id, applications.c.application_status),
+    ))
+    db.commit()
+    return result.rowcount
+
+
+def add_unique_constraint():
+    """Adds the one-application-per-student-and-opportunity constraint to a table created without it."""
+    existing = inspect(engine).get_unique_constraints(models.StudentApplication.__tablename__)
+    if any(set(c["column_names"]) == {"student_profile_id", "opportunity_id"} for c in existing):
+        print("Unique constraint already present.")
+        return
+    try:
+        with engine.begin() as connection:
+            connection.execute(AddConstraint(UNIQUE_CONSTRAINT))
+        print("Added unique constraint on (student_profile_id, opportunity_id).")
+    except Exception as e:
+        print(f"Error adding the unique constraint: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild opportunity_application_counts from student_applications")
+    parser.add_argument("--add-constraint", action="store_true",
+                        help="Also add the unique constraint on student_applications when it is missing")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        duplicates = duplicate_applications(db)
+        if duplicates:
+            print(f"{len(duplicates)} student/opportunity pairs have more than one application, e.g.:")
+            for student_profile_id, opportunity_id, rows in duplicates[:10]:
+                print(f"  student_profile_id={student_profile_id} opportunity_id={opportunity_id}: {rows} rows")
+            print("Counting them as they are; remove the extra rows before adding the unique constraint.")
+        written = backfill_counts(db)
+        print(f"Wrote {written} opportunity_application_counts rows.")
+    finally:
+        db.close()
+
+    if args.add_constraint:
+        if duplicates:
+            print("Skipping the unique constraint: duplicates found.")
+        else:
+            add_unique_constraint()
+
+
+if __name__ == "__main__":
+    main()
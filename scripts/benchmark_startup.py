@@ -0,0 +1,75 @@
+import sys
+import os
+import argparse
+import json
+import statistics
+import subprocess
+
+# Measures what a fresh worker pays to import main.py, with the heavy resources left
+# lazy (the default) and with them loaded eagerly through main.warm_up(), which is
+# what every import did before spaCy and pdfkit were initialized on first use.
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # kB on Linux, bytes on macOS
+
+baseline_rss = rss_kb()
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+if {eager!r}:
+    main.warm_up()
+warmed = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - started,
+    "warm_up_s": warmed - imported,
+    "rss_kb": rss_kb(),
+    "baseline_rss_kb": baseline_rss,
+}}))
+"""
+
+
+def run_probe(eager: bool) -> dict:
+    """Imports main in a new interpreter and returns its timings and memory."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(root=PROJECT_ROOT, eager=eager)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    # Anything printed while importing comes first; the measurements are on the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(label: str, runs: list):
+    import_s = statistics.median(r["import_s"] for r in runs)
+    warm_s = statistics.median(r["warm_up_s"] for r in runs)
+    rss_mb = statistics.median(r["rss_kb"] for r in runs) / 1024
+    print(f"{label:<33} import {import_s * 1000:8.1f} ms   warm-up {warm_s * 1000:8.1f} ms   "
+          f"total {(import_s + warm_s) * 1000:8.1f} ms   RSS {rss_mb:7.1f} MB")
+    return import_s + warm_s, rss_mb
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare worker start-up cost with lazy and eager resource loading.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode (the median is reported)")
+    args = parser.parse_args()
+
+    lazy = [run_probe(eager=False) for _ in range(args.runs)]
+    eager = [run_probe(eager=True) for _ in range(args.runs)]
+
+    print(f"Median of {args.runs} fresh interpreters per mode:")
+    eager_s, eager_mb = summarize("eager (before: load at import)", eager)
+    lazy_s, lazy_mb = summarize("lazy (after: load on first use)", lazy)
+    print(f"Saved per worker that never uses NLP/PDF: {(eager_s - lazy_s) * 1000:.1f} ms, {eager_mb - lazy_mb:.1f} MB RSS")
@@ -0,0 +1,50 @@
+import sys
+import os
+import argparse
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.data_export import EXPORTS, FORMATS, EXPORT_BATCH_SIZE, export_chunks, open_export_session, parquet_available
+
+
+def export(dataset, fmt, output, batch_size):
+    """Streams one dataset into output (a path, or - for stdout). Returns the bytes written."""
+    db = open_export_session()
+    written = 0
+    out = sys.stdout.buffer if output == "-" else open(output, "wb")
+    try:
+        for chunk in export_chunks(db, dataset, fmt, batch_size):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        db.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export profiles, applications or skills as CSV or Parquet.")
+    parser.add_argument("datasets", nargs="+", choices=sorted(EXPORTS), help="Datasets to export")
+    parser.add_argument("--format", dest="fmt", choices=FORMATS, default="csv")
+    parser.add_argument("--output-dir", default=".", help="Directory for <dataset>.<format> files")
+    parser.add_argument("--stdout", action="store_true", help="Write the (single) dataset to stdout instead")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Rows fetched and written per batch")
+    args = parser.parse_args()
+
+    if args.fmt == "parquet" and not parquet_available():
+        parser.error("Parquet export needs pyarrow (pip install pyarrow)")
+    if args.stdout and len(args.datasets) != 1:
+        parser.error("--stdout takes exactly one dataset")
+
+    for dataset in args.datasets:
+        output = "-" if args.stdout else os.path.join(args.output_dir, f"{dataset}.{args.fmt}")
+        started = time.perf_counter()
+        written = export(dataset, args.fmt, output, args.batch_size)
+        print(f"Exported {dataset} to {output}: {written / 1e6:.1f} MB in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import sys
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+# Opens many idle SSE connections against /api/notifications/stream and reports how many
+# the worker holds, how long they took to establish and the worker's memory.
+# Raise the file-descriptor limit first (e.g. `ulimit -n 20000`) on both sides.
+
+
+def read_rss_kb(pid):
+    """Resident set size of a local process in kB (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+async def open_stream(host, port, path, token, ready, connections, failures, timeout):
+    """Opens one SSE stream and keeps it open until cancelled."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.write(
+            f"GET {path}?token={token} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        if b" 200 " not in status_line:
+            raise ConnectionError(status_line.decode(errors="replace").strip())
+    except Exception as e:
+        failures.append(repr(e))
+        ready.release()
+        return
+    connections.append(writer)
+    ready.release()
+    try:
+        while await reader.read(4096): # Drain keepalive pings
+            pass
+    except asyncio.CancelledError:
+        pass
+    finally:
+        writer.close()
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    connections, failures = [], []
+    ready = asyncio.Semaphore(0)
+    rss_before = read_rss_kb(args.server_pid) if args.server_pid else None
+
+    started = time.perf_counter()
+    tasks = []
+    for i in range(args.connections):
+        tasks.append(asyncio.ensure_future(open_stream(host, port, url.path, args.token, ready, connections, failures, args.timeout)))
+        if args.ramp and (i + 1) % args.ramp == 0:
+            await asyncio.sleep(0.1) # Avoid overflowing the listen backlog
+    for _ in range(args.connections):
+        await ready.acquire()
+    elapsed = time.perf_counter() - started
+
+    print(f"Established {len(connections)}/{args.connections} connections in {elapsed:.1f}s "
+          f"({len(connections) / elapsed:.0f} conn/s), {len(failures)} failures")
+    if failures:
+        print(f"  first failure: {failures[0]}")
+
+    await asyncio.sleep(args.hold)
+    if args.server_pid:
+        rss_after = read_rss_kb(args.server_pid)
+        if rss_before is not None and rss_after is not None:
+            per_conn = (rss_after - rss_before) / max(1, len(connections))
+            print(f"Worker RSS: {rss_before / 1024:.1f} MB -> {rss_after / 1024:.1f} MB "
+                  f"({per_conn:.1f} kB per idle connection)")
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hold many idle notification streams open against one worker.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/notifications/stream")
+    parser.add_argument("--token", required=True, help="Access token used for every connection")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--ramp", type=int, default=500, help="Connections opened per 100ms step (0 = all at once)")
+    parser.add_argument("--hold", type=float, default=30.0, help="Seconds to keep the connections idle")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--server-pid", type=int, help="Local uvicorn worker pid, to report its RSS")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
@@ -0,0 +1,101 @@
+import sys
+import os
+import argparse
+import time
+from multiprocessing import Pool
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.connection import engine, SessionLocal
+from database import models
+from services import recommendation_engine
+from services.learning_index import learning_resource_index
+
+# Set in each worker process by _init_worker
+_opportunity_skills = None
+_skills_with_resources = None
+_top_n = None
+
+
+def stream_student_ids(chunk_size):
+    """Yields student profile ids in chunks using keyset pagination (no OFFSET scans)."""
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            ids = [row[0] for row in db.query(models.StudentProfile.id).filter(
+                models.StudentProfile.id > last_id
+            ).order_by(models.StudentProfile.id).limit(chunk_size).all()]
+            if not ids:
+                return
+            yield ids
+            last_id = ids[-1]
+    finally:
+        db.close()
+
+
+def _init_worker(opportunity_skills, skills_with_resources, top_n):
+    global _opportunity_skills, _skills_with_resources, _top_n
+    # Connections inherited from the parent must not be shared across processes
+    engine.dispose()
+    _opportunity_skills = opportunity_skills
+    _skills_with_resources = skills_with_resources
+    _top_n = top_n
+
+
+def _score_chunk(student_ids):
+    """Scores one chunk of students and replaces their materialized rows."""
+    db = SessionLocal()
+    try:
+        student_skills = recommendation_engine.load_student_skill_ids(db, student_ids)
+        scores_by_student = {
+            student_id: recommendation_engine.rank_opportunities(
+                db, skill_ids, _opportunity_skills, _skills_with_resources, top_n=_top_n
+            )
+            for student_id, skill_ids in student_skills.items()
+        }
+        recommendation_engine.store_recommendations(db, scores_by_student)
+        db.commit()
+        return len(student_ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def precompute(chunk_size, workers, top_n):
+    """Scores every student against the open opportunities and materializes their recommendations."""
+    db = SessionLocal()
+    try:
+        opportunity_skills = recommendation_engine.load_open_opportunity_skills(db)
+        skills_with_resources = learning_resource_index.skills_with_resources(db)
+    finally:
+        db.close()
+    engine.dispose()
+
+    print(f"Scoring against {len(opportunity_skills)} open opportunities with {workers} workers...")
+    started = time.perf_counter()
+    processed = 0
+    with Pool(workers, initializer=_init_worker, initargs=(opportunity_skills, skills_with_resources, top_n)) as pool:
+        for count in pool.imap_unordered(_score_chunk, stream_student_ids(chunk_size)):
+            processed += count
+            elapsed = time.perf_counter() - started
+            print(f"  {processed} students ({processed / elapsed:.1f} students/sec)")
+
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Done: {processed} students in {elapsed:.1f}s ({rate:.1f} students/sec).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute opportunity recommendations for every student.")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Students scored per worker task")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    # The endpoint re-ranks the stored rows with popularity priors before cutting to
+    # RECOMMENDATIONS_TOP_N, so by default every recommended opportunity is kept
+    parser.add_argument("--top-n", type=int, default=0,
+                        help="Recommendations kept per student (0 = all, ranked like the live path)")
+    args = parser.parse_args()
+    precompute(args.chunk_size, args.workers, args.top_n)
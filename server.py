@@ -0,0 +1,173 @@
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+import uvicorn
+
+# Pre-fork entry point for multi-worker deployments (instead of `uvicorn main:app --workers N`).
+# The master imports the app, loads the spaCy pipeline, the skill ontology and the read-only
+# recommendation indexes once, then forks the workers so they share those pages copy-on-write.
+# Usage: python server.py --workers 4 --port 8000
+#
+# TTL reloads (skill hierarchy, learning resources, candidates, incremental posting lists,
+# skill analytics) and the catalog's periodic full reload compare their source rows with the
+# last load (utils/prefork.py) and keep the current structures when nothing changed, so a
+# worker only gets private copies of an index once its data really changes. The numpy
+# arrays (hierarchy closure, analytics matrix) are moved into read-only memory-mapped files,
+# whose pages stay shared however the objects around them are touched; other indexes are
+# Python objects, which reads slowly un-share through reference counting.
+
+SHARED_ARRAY_DIR = os.getenv("SHARED_ARRAY_DIR", os.path.join(tempfile.gettempdir(), "cognitive_navigator_arrays"))
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    """Loads everything workers would otherwise load on their own, then freezes the heap."""
+    import main
+    from database.connection import engine, SessionLocal
+    from services.skill_hierarchy import skill_hierarchy
+    from services.learning_index import learning_resource_index
+    from services.candidate_index import candidate_index
+    from services.incremental_recommendations import incremental_engine
+    from services.skill_catalog import skill_catalog
+    from services.opportunity_catalog import opportunity_catalog
+    from services.skill_analytics import skill_analytics
+
+    main.warm_up()
+    db = SessionLocal()
+    try:
+        # One failing index doesn't stop the others; workers load it lazily instead
+        for index in (skill_catalog, opportunity_catalog, skill_hierarchy, learning_resource_index, candidate_index, incremental_engine, skill_analytics):
+            try:
+                index.preload(db)
+            except Exception:
+                db.rollback()
+                logger.exception("Could not preload %s; workers will load it on first use", type(index).__name__)
+        for index in (skill_hierarchy, skill_analytics):
+            try:
+                index.share_arrays(SHARED_ARRAY_DIR)
+            except Exception:
+                logger.exception("Could not share the %s arrays through %s", type(index).__name__, SHARED_ARRAY_DIR)
+    finally:
+        db.close()
+    # Connections must not be shared across processes; each worker opens its own
+    engine.dispose()
+
+    # Keep the garbage collector from writing to (and so un-sharing) the preloaded objects
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+def memory_kb(pid: int) -> dict:
+    """Memory breakdown of a process in kB (Linux). Pss splits shared pages between their users."""
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                field, _, rest = line.partition(":")
+                if field in MEMORY_FIELDS:
+                    usage[field] = int(rest.split()[0])
+    except OSError:
+        pass
+    return usage
+
+
+def report_memory(master_pid: int, worker_pids):
+    print(f"{'process':<16}" + "".join(f"{field:>15}" for field in MEMORY_FIELDS) + "   (MB)")
+    rows = [("master", master_pid)] + [(f"worker {pid}", pid) for pid in sorted(worker_pids)]
+    total_pss = 0
+    for label, pid in rows:
+        usage = memory_kb(pid)
+        total_pss += usage.get("Pss", 0)
+        print(f"{label:<16}" + "".join(f"{usage.get(field, 0) / 1024:>15.1f}" for field in MEMORY_FIELDS))
+    print(f"Total PSS: {total_pss / 1024:.1f} MB; per worker: {total_pss / 1024 / max(1, len(worker_pids)):.1f} MB")
+    sys.stdout.flush()
+
+
+def serve_worker(app, sock: socket.socket, log_level: str):
+    # Restore default handlers; uvicorn installs its own graceful shutdown handlers
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+        signal.signal(sig, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def run(args):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(args.backlog)
+    sock.set_inheritable(True)
+
+    started = time.perf_counter()
+    app = preload()
+    print(f"Preloaded app and indexes in {time.perf_counter() - started:.1f}s; forking {args.workers} workers")
+    sys.stdout.flush()
+
+    workers = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve_worker(app, sock, args.log_level)
+            finally:
+                os._exit(0)
+        workers.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    # `kill -USR1 <master pid>` prints the memory table again
+    signal.signal(signal.SIGUSR1, lambda signum, frame: report_memory(os.getpid(), workers))
+
+    for _ in range(args.workers):
+        spawn()
+
+    report_at = time.monotonic() + args.report_after if args.report_after > 0 else None
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            workers.discard(pid)
+            if not stopping:
+                print(f"Worker {pid} exited with status {status}; restarting")
+                spawn()
+            continue
+        if report_at is not None and time.monotonic() >= report_at:
+            report_memory(os.getpid(), workers)
+            report_at = None
+        time.sleep(0.5)
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API with workers forked from a preloaded master.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 2)))
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--report-after", type=float, default=10.0,
+                        help="Seconds after start to print per-worker memory (0 = only on SIGUSR1)")
+    run(parser.parse_args())
@@ -0,0 +1,32 @@
+import datetime
+import os
+from typing import Optional
+
+from database import models
+from services.batch_writer import BatchWriter
+
+# Ingestion settings for user_actions_log (see services/batch_writer.py for the policies)
+action_log_writer = BatchWriter(
+    models.UserActionLog.__table__,
+    name="user_actions",
+    capacity=int(os.getenv("ACTION_LOG_BUFFER_SIZE", 20000)),
+    batch_size=int(os.getenv("ACTION_LOG_BATCH_SIZE", 500)),
+    flush_interval=float(os.getenv("ACTION_LOG_FLUSH_SECONDS", 2.0)),
+    policy=os.getenv("ACTION_LOG_OVERFLOW_POLICY", "drop_oldest"),
+    spool_path=os.getenv("ACTION_LOG_SPOOL_PATH") or None,
+    datetime_fields=("timestamp",),
+)
+
+
+def log_action(user_id: int, action_type: str, entity_type: Optional[str] = None, entity_id: Optional[int] = None) -> bool:
+    """
+    Records a user action without blocking on the database.
+    Returns False if the event was dropped because the buffer is full.
+    """
+    return action_log_writer.submit({
+        "user_id": user_id,
+        "action_type": action_type, # e.g., 'opportunity_view', 'resource_view'
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "timestamp": datetime.datetime.now(),
+    })
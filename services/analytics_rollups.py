@@ -0,0 +1,179 @@
+import datetime
+import logging
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import models
+from database.connection import SessionLocal
+from database.counters import increment_counters
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "user_actions_log"
+ROLLUP_KEY_COLUMNS = ("entity_type", "entity_id", "action_type", "bucket_start")
+ROLLUP_INTERVAL_SECONDS = float(os.getenv("ANALYTICS_ROLLUP_SECONDS", 60))
+ROLLUP_BATCH_SIZE = int(os.getenv("ANALYTICS_ROLLUP_BATCH_SIZE", 10000))
+# Log rows younger than this are left for the next run, so rows whose (smaller) id was
+# assigned before a slower transaction committed are not skipped by the watermark.
+ROLLUP_SAFETY_LAG_SECONDS = float(os.getenv("ANALYTICS_ROLLUP_LAG_SECONDS", 30))
+# Windows up to this many hours are answered from the hourly table, longer ones from the daily table
+HOURLY_WINDOW_LIMIT_HOURS = 48
+
+
+def _hour(ts: datetime.datetime) -> datetime.datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _day(ts: datetime.datetime) -> datetime.datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _lock_watermark(db: Session) -> models.RollupWatermark:
+    """Fetches the watermark row with FOR UPDATE so concurrent workers take turns."""
+    watermark = db.query(models.RollupWatermark).filter(
+        models.RollupWatermark.name == WATERMARK_NAME
+    ).with_for_update().first()
+    if watermark is None:
+        db.add(models.RollupWatermark(name=WATERMARK_NAME, last_id=0))
+        db.flush()
+        watermark = db.query(models.RollupWatermark).filter(
+            models.RollupWatermark.name == WATERMARK_NAME
+        ).with_for_update().first()
+    return watermark
+
+
+def roll_up_once(db: Session) -> int:
+    """
+    Folds one batch of new user_actions_log rows (id above the watermark) into the hourly
+    and daily rollups and advances the watermark, all in one transaction.
+    Returns the number of log rows consumed.
+    """
+    watermark = _lock_watermark(db)
+    rows = db.query(
+        models.UserActionLog.id,
+        models.UserActionLog.entity_type,
+        models.UserActionLog.entity_id,
+        models.UserActionLog.action_type,
+        models.UserActionLog.timestamp,
+    ).filter(
+        models.UserActionLog.id > watermark.last_id
+    ).order_by(models.UserActionLog.id).limit(ROLLUP_BATCH_SIZE).all()
+
+    cutoff = datetime.datetime.now() - datetime.timedelta(seconds=ROLLUP_SAFETY_LAG_SECONDS)
+    hourly: Dict[Tuple, int] = {}
+    daily: Dict[Tuple, int] = {}
+    last_id = watermark.last_id
+    consumed = 0
+    for row_id, entity_type, entity_id, action_type, timestamp in rows:
+        if timestamp is None or timestamp > cutoff:
+            break # Stop at the first row inside the lag window to keep the watermark safe
+        if entity_type is not None and entity_id is not None:
+            hourly_key = (entity_type, entity_id, action_type, _hour(timestamp))
+            daily_key = (entity_type, entity_id, action_type, _day(timestamp))
+            hourly[hourly_key] = hourly.get(hourly_key, 0) + 1
+            daily[daily_key] = daily.get(daily_key, 0) + 1
+        last_id = row_id
+        consumed += 1
+
+    if consumed:
+        increment_counters(db, models.ActionRollupHourly.__table__, ROLLUP_KEY_COLUMNS, hourly)
+        increment_counters(db, models.ActionRollupDaily.__table__, ROLLUP_KEY_COLUMNS, daily)
+        watermark.last_id = last_id
+    db.commit()
+    return consumed
+
+
+def roll_up(db: Session) -> int:
+    """Runs roll_up_once until the log is caught up. Returns the total rows consumed."""
+    total = 0
+    while True:
+        consumed = roll_up_once(db)
+        total += consumed
+        if consumed < ROLLUP_BATCH_SIZE:
+            return total
+
+
+def trending(db: Session, entity_type: str, hours: int, limit: int, action_type: str = None) -> List[Tuple[int, int]]:
+    """Top (entity_id, count) pairs over the last `hours`, read only from the rollup tables."""
+    if hours <= HOURLY_WINDOW_LIMIT_HOURS:
+        table = models.ActionRollupHourly
+        since = _hour(datetime.datetime.now() - datetime.timedelta(hours=hours))
+    else:
+        table = models.ActionRollupDaily
+        since = _day(datetime.datetime.now() - datetime.timedelta(hours=hours))
+
+    total = func.sum(table.count).label("total")
+    query = db.query(table.entity_id, total).filter(
+        table.entity_type == entity_type,
+        table.bucket_start >= since,
+    )
+    if action_type:
+        query = query.filter(table.action_type == action_type)
+    return [(entity_id, int(count)) for entity_id, count in query.group_by(table.entity_id).order_by(total.desc()).limit(limit).all()]
+
+
+def popularity_priors(db: Session, entity_type: str, entity_ids: Iterable[int], days: int = 7) -> Dict[int, float]:
+    """
+    Log-scaled popularity in [0, 1] for the given entities over the last `days`, relative
+    to the most popular one among them. Entities without activity are omitted.
+    """
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return {}
+    since = _day(datetime.datetime.now() - datetime.timedelta(days=days))
+    table = models.ActionRollupDaily
+    counts = dict(db.query(table.entity_id, func.sum(table.count)).filter(
+        table.entity_type == entity_type,
+        table.entity_id.in_(entity_ids),
+        table.bucket_start >= since,
+    ).group_by(table.entity_id).all())
+    if not counts:
+        return {}
+    top = math.log1p(max(int(c) for c in counts.values()))
+    return {entity_id: math.log1p(int(c)) / top for entity_id, c in counts.items() if top > 0}
+
+
+class RollupScheduler:
+    """Runs roll_up() every ROLLUP_INTERVAL_SECONDS on a background thread."""
+
+    def __init__(self, interval: float = ROLLUP_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="analytics-rollups", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                roll_up(db)
+            except IntegrityError:
+                # Another worker created the watermark row first; retry next round
+                db.rollback()
+            except Exception:
+                db.rollback()
+                logger.exception("Analytics rollup failed")
+            finally:
+                db.close()
+
+
+rollup_scheduler = RollupScheduler()
@@ -0,0 +1,162 @@
+import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from database import models
+from database.counters import increment_counters
+from services.notification_hub import notify_many, student_user_ids
+
+# Allowed application_status moves. Terminal states have no outgoing transitions.
+TRANSITIONS = {
+    "applied": {"under_review", "rejected", "withdrawn"},
+    "under_review": {"shortlisted", "rejected", "withdrawn"},
+    "shortlisted": {"interview", "accepted", "rejected", "withdrawn"},
+    "interview": {"accepted", "rejected", "withdrawn"},
+    "accepted": set(),
+    "rejected": set(),
+    "withdrawn": set(),
+}
+# Statuses only the student may move their own application to
+STUDENT_ONLY_STATUSES = {"withdrawn"}
+
+COUNT_KEY_COLUMNS = ("opportunity_id", "application_status")
+
+
+class TransitionResult(NamedTuple):
+    updated: List[int]
+    conflicts: List[int]
+    invalid: List[int]
+    # opportunity_id -> number of applications newly accepted, for capacity checks
+    accepted_by_opportunity: Dict[int, int]
+
+
+def lock_opportunities(db: Session, opportunity_ids: Iterable[int]):
+    """
+    Takes row locks on the opportunities (in id order, to avoid deadlocks) so their
+    status counters have a single writer for the rest of the transaction.
+    """
+    opportunity_ids = sorted(set(opportunity_ids))
+    if opportunity_ids:
+        db.query(models.Opportunity.id).filter(
+            models.Opportunity.id.in_(opportunity_ids)
+        ).order_by(models.Opportunity.id).with_for_update().all()
+
+
+def update_status_counts(db: Session, deltas: Dict[Tuple[int, str], int]):
+    """Applies (opportunity_id, status) -> delta to the counter table. Hold the opportunity locks first."""
+    increment_counters(db, models.OpportunityApplicationCount.__table__, COUNT_KEY_COLUMNS, deltas)
+
+
+def status_counts(db: Session, opportunity_id: int) -> Dict[str, int]:
+    """Applications per status for one opportunity, from the counter table."""
+    rows = db.query(
+        models.OpportunityApplicationCount.application_status,
+        models.OpportunityApplicationCount.count,
+    ).filter(models.OpportunityApplicationCount.opportunity_id == opportunity_id).all()
+    return {status: count for status, count in rows if count}
+
+
+def transition(
+    db: Session,
+    expected_versions: Dict[int, int],
+    to_status: str,
+    allowed_opportunity_ids: Optional[Set[int]] = None,
+    allowed_student_profile_id: Optional[int] = None,
+) -> TransitionResult:
+    """
+    Moves applications to to_status if they are still at the version the caller saw.
+    Runs one UPDATE ... WHERE id IN (...) per current status with the (id, version) pairs
+    as an optimistic check, keeps the per-opportunity counters in step and commits.
+    Callers restrict which applications may be touched through allowed_opportunity_ids
+    (reviewers) or allowed_student_profile_id (the student themselves).
+    """
+    if not expected_versions:
+        return TransitionResult([], [], [], {})
+
+    rows = db.query(
+        models.StudentApplication.id,
+        models.StudentApplication.opportunity_id,
+        models.StudentApplication.student_profile_id,
+        models.StudentApplication.application_status,
+        models.StudentApplication.version,
+    ).filter(models.StudentApplication.id.in_(list(expected_versions))).all()
+    found = {row.id: row for row in rows}
+
+    conflicts, invalid = [], []
+    by_status: Dict[str, List] = {}
+    for app_id, version in expected_versions.items():
+        row = found.get(app_id)
+        if row is None \
+                or (allowed_opportunity_ids is not None and row.opportunity_id not in allowed_opportunity_ids) \
+                or (allowed_student_profile_id is not None and row.student_profile_id != allowed_student_profile_id):
+            invalid.append(app_id)
+        elif row.version != version:
+            conflicts.append(app_id)
+        elif to_status not in TRANSITIONS.get(row.application_status, ()):
+            invalid.append(app_id)
+        else:
+            by_status.setdefault(row.application_status, []).append(row)
+
+    lock_opportunities(db, {row.opportunity_id for group in by_status.values() for row in group})
+
+    now = datetime.datetime.now()
+    updated = []
+    deltas: Dict[Tuple[int, str], int] = {}
+    table = models.StudentApplication.__table__
+    for from_status, group in by_status.items():
+        result = db.execute(table.update().where(
+            table.c.id.in_([row.id for row in group]),
+            table.c.application_status == from_status,
+            tuple_(table.c.id, table.c.version).in_([(row.id, row.version) for row in group]),
+        ).values(
+            application_status=to_status,
+            version=table.c.version + 1,
+            updated_at=now,
+        ))
+        if result.rowcount == len(group):
+            applied = group
+        else:
+            # Someone else moved part of the group between our read and the lock: find out which
+            current = dict(db.query(table.c.id, table.c.version).filter(
+                table.c.id.in_([row.id for row in group])
+            ).all())
+            applied = [row for row in group if current.get(row.id) == row.version + 1]
+            conflicts.extend(row.id for row in group if current.get(row.id) != row.version + 1)
+        for row in applied:
+            updated.append(row.id)
+            deltas[(row.opportunity_id, from_status)] = deltas.get((row.opportunity_id, from_status), 0) - 1
+            deltas[(row.opportunity_id, to_status)] = deltas.get((row.opportunity_id, to_status), 0) + 1
+
+    update_status_counts(db, deltas)
+    db.commit()
+
+    applied_rows = [found[app_id] for app_id in updated]
+    _notify_status_change(db, applied_rows, to_status)
+
+    accepted = {}
+    if to_status == "accepted":
+        for row in applied_rows:
+            accepted[row.opportunity_id] = accepted.get(row.opportunity_id, 0) + 1
+    return TransitionResult(sorted(updated), sorted(conflicts), sorted(invalid), accepted)
+
+
+def _notify_status_change(db: Session, rows, to_status: str):
+    """Enqueues one notification per moved application, resolved with two queries in total."""
+    if not rows:
+        return
+    user_ids = student_user_ids(db, {row.student_profile_id for row in rows})
+    titles = dict(db.query(models.Opportunity.id, models.Opportunity.title).filter(
+        models.Opportunity.id.in_({row.opportunity_id for row in rows})
+    ).all())
+    label = to_status.replace("_", " ")
+    notify_many(
+        {
+            "user_id": user_ids[row.student_profile_id],
+            "type": "application_status_update",
+            "message": f"Your application for '{titles.get(row.opportunity_id, 'an opportunity')}' is now {label}.",
+            "related_entity_id": row.id,
+        }
+        for row in rows if row.student_profile_id in user_ids
+    )
@@ -0,0 +1,206 @@
+import datetime
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Table
+
+from database.connection import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# What submit() does when the buffer is full
+DROP_OLDEST = "drop_oldest" # Evict the oldest buffered row to make room
+DROP_NEWEST = "drop_newest" # Reject the new row
+BLOCK = "block"             # Wait up to block_timeout for the flusher, then reject
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class BatchWriter:
+    """
+    Buffers rows for one table in a bounded in-memory ring buffer and writes them with
+    multi-row INSERTs from a background thread, whenever batch_size rows are waiting or
+    flush_interval seconds have passed.
+
+    With a spool_path every accepted row is also appended to a local JSON-lines file
+    before it is acknowledged; the file is rotated on each flush and deleted once the
+    rows are committed, so rows survive a crash. Delivery is at-least-once: rows from a
+    flush that was interrupted mid-commit may be written twice after a restart.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        name: str,
+        capacity: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        policy: str = DROP_OLDEST,
+        block_timeout: float = 0.05,
+        spool_path: Optional[str] = None,
+        datetime_fields: Sequence[str] = (),
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}', expected one of {POLICIES}")
+        self.table = table
+        self.name = name
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.spool_path = spool_path
+        self.datetime_fields = tuple(datetime_fields)
+
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._spool = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._last_flush = time.monotonic()
+        self.stats = {"accepted": 0, "dropped": 0, "written": 0, "failed_flushes": 0}
+
+    # --- Producer side ---
+
+    @property
+    def may_block(self) -> bool:
+        """Whether submit() can wait on the flusher or do file I/O; async callers then run it in a thread."""
+        return self.policy == BLOCK or self.spool_path is not None
+
+    def submit(self, row: Dict) -> bool:
+        """Queues a row for insertion. Never touches the database; returns False if the row was dropped."""
+        with self._lock:
+            if len(self._buffer) >= self.capacity:
+                if self.policy == DROP_NEWEST:
+                    self.stats["dropped"] += 1
+                    return False
+                if self.policy == BLOCK:
+                    self._not_empty.notify()
+                    self._not_full.wait_for(lambda: len(self._buffer) < self.capacity, timeout=self.block_timeout)
+                    if len(self._buffer) >= self.capacity:
+                        self.stats["dropped"] += 1
+                        return False
+                else: # DROP_OLDEST
+                    self._buffer.popleft()
+                    self.stats["dropped"] += 1
+
+            if self._spool is not None:
+                self._spool.write(json.dumps(self._encode(row)) + "\n")
+                self._spool.flush()
+            self._buffer.append(row)
+            self.stats["accepted"] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._not_empty.notify()
+            return True
+
+    def _encode(self, row: Dict) -> Dict:
+        return {k: (v.isoformat() if k in self.datetime_fields and isinstance(v, datetime.datetime) else v) for k, v in row.items()}
+
+    def _decode(self, row: Dict) -> Dict:
+        return {k: (datetime.datetime.fromisoformat(v) if k in self.datetime_fields and isinstance(v, str) else v) for k, v in row.items()}
+
+    # --- Flusher side ---
+
+    def start(self):
+        """Replays any spooled rows left by a previous process and starts the flush thread."""
+        if self._thread is not None:
+            return
+        if self.spool_path:
+            self._replay_spool()
+            self._spool = open(self.spool_path, "a", encoding="utf-8")
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=f"batch-writer-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flushes whatever is buffered and stops the flush thread."""
+        if self._thread is None:
+            return
+        with self._lock:
+            self._stopping = True
+            self._not_empty.notify()
+        self._thread.join()
+        self._thread = None
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._not_empty.wait_for(
+                    lambda: self._stopping or len(self._buffer) >= self.batch_size,
+                    timeout=max(0.0, self.flush_interval - (time.monotonic() - self._last_flush)),
+                )
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self):
+        """Writes every buffered row now, batch_size rows per INSERT."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return
+            rows = list(self._buffer)
+            self._buffer.clear()
+            self._not_full.notify_all()
+            rotated = self._rotate_spool()
+
+        if self._write(rows) and rotated:
+            os.remove(rotated)
+
+    def _write(self, rows: List[Dict]) -> bool:
+        db = SessionLocal()
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                db.execute(self.table.insert(), rows[start:start + self.batch_size])
+            db.commit()
+            self.stats["written"] += len(rows)
+            return True
+        except Exception:
+            db.rollback()
+            self.stats["failed_flushes"] += 1
+            # The rows stay in the rotated spool file (if any) and are replayed on restart
+            logger.exception("Failed to write %d rows to %s", len(rows), self.table.name)
+            return False
+        finally:
+            db.close()
+
+    # --- Spool ---
+
+    def _rotate_spool(self) -> Optional[str]:
+        # Caller holds the lock, so the rotated file holds exactly the rows being flushed
+        if self._spool is None:
+            return None
+        self._spool.close()
+        rotated = f"{self.spool_path}.{time.time_ns()}.flushing"
+        os.replace(self.spool_path, rotated)
+        self._spool = open(self.spool_path, "a", encoding="utf-8")
+        return rotated
+
+    def _replay_spool(self):
+        paths = sorted(glob.glob(f"{glob.escape(self.spool_path)}.*.flushing"))
+        if os.path.exists(self.spool_path):
+            paths.append(self.spool_path)
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                # A crash can leave a torn last line; skip anything that does not parse
+                rows = []
+                for line in f:
+                    try:
+                        rows.append(self._decode(json.loads(line)))
+                    except ValueError:
+                        continue
+            if not rows or self._write(rows):
+                os.remove(path)
+            else:
+                break # Database unavailable: keep the files for the next start
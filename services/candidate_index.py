@@ -0,0 +1,328 @@
+import bisect
+import heapq
+import math
+import os
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import models
+from utils.prefork import rows_digest
+
+# How much each proficiency level counts toward a required skill
+PROFICIENCY_WEIGHTS = {"beginner": 0.25, "intermediate": 0.5, "advanced": 0.75, "expert": 1.0}
+DEFAULT_PROFICIENCY_WEIGHT = 0.5
+# Optional skills count half as much as mandatory ones
+MANDATORY_WEIGHT = 1.0
+OPTIONAL_WEIGHT = 0.5
+
+INDEX_TTL_SECONDS = int(os.getenv("CANDIDATE_INDEX_TTL_SECONDS", 300))
+MISSING_CODE = -1
+
+
+class Candidate(NamedTuple):
+    student_profile_id: int
+    user_id: int
+    department: Optional[str]
+    major: Optional[str]
+    gpa: Optional[float]
+    match_score: float
+    matched_skill_ids: List[int]
+
+
+class _Codebook:
+    """Dictionary-encodes a string column into small integer codes."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return MISSING_CODE
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code: int) -> Optional[str]:
+        return self.values[code] if code != MISSING_CODE else None
+
+
+class _Posting:
+    """Sorted row numbers of the students holding one skill, with their proficiency weights."""
+    __slots__ = ("rows", "weights", "max_weight")
+
+    def __init__(self):
+        self.rows = array("i")
+        self.weights = array("f")
+        self.max_weight = 0.0
+
+    def upsert(self, row: int, weight: float):
+        pos = bisect.bisect_left(self.rows, row)
+        if pos < len(self.rows) and self.rows[pos] == row:
+            self.weights[pos] = weight
+        else:
+            self.rows.insert(pos, row)
+            self.weights.insert(pos, weight)
+        self.max_weight = max(self.max_weight, weight)
+
+
+class _Cursor:
+    """Iterator over one query term's posting list, used by WAND."""
+    __slots__ = ("skill_id", "posting", "term_weight", "upper_bound", "pos")
+
+    def __init__(self, skill_id: int, posting: _Posting, term_weight: float):
+        self.skill_id = skill_id
+        self.posting = posting
+        self.term_weight = term_weight
+        self.upper_bound = term_weight * posting.max_weight
+        self.pos = 0
+
+    @property
+    def row(self) -> int:
+        return self.posting.rows[self.pos] if self.pos < len(self.posting.rows) else -1
+
+    def seek(self, row: int):
+        self.pos = bisect.bisect_left(self.posting.rows, row, self.pos)
+
+
+class CandidateIndex:
+    """
+    Skill -> student posting lists built from student_skills, plus columnar arrays of
+    student attributes for filtering. Students are addressed by a dense row number so
+    posting lists and columns line up.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock() # Held by the one caller rebuilding the index
+        self._loaded_at: Optional[float] = None
+        self._digest: Optional[int] = None # rows_digest of the last load; None once changed in place
+        self._reset()
+
+    def _reset(self):
+        self._row_of: Dict[int, int] = {}
+        self._student_ids = array("i")
+        self._user_ids = array("i")
+        self._departments = array("i")
+        self._majors = array("i")
+        self._gpas = array("f") # NaN when unknown
+        self._alive = bytearray()
+        self._department_codes = _Codebook()
+        self._major_codes = _Codebook()
+        self._postings: Dict[int, _Posting] = {}
+
+    def _ensure_loaded(self, db: Session):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < INDEX_TTL_SECONDS:
+            return
+        # Only the very first load makes readers wait; later one caller rebuilds while the rest use the old index
+        if not self._refresh_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= INDEX_TTL_SECONDS:
+                self._load(db) # Unless a caller we waited for just did
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self, db: Session):
+        profiles = db.query(
+            models.StudentProfile.id,
+            models.StudentProfile.user_id,
+            models.StudentProfile.department,
+            models.StudentProfile.major,
+            models.StudentProfile.gpa,
+        ).order_by(models.StudentProfile.id).all()
+        skills = db.query(
+            models.StudentSkill.student_profile_id,
+            models.StudentSkill.skill_id,
+            models.StudentSkill.proficiency_level,
+        ).all()
+        digest = rows_digest(profiles, skills)
+
+        with self._lock:
+            if digest == self._digest:
+                self._loaded_at = time.monotonic() # Same rows: keep the current (shared) arrays and postings
+                return
+            self._reset()
+            for profile in profiles:
+                self._append_student(*profile)
+            for student_id, skill_id, proficiency_level in sorted(skills, key=lambda s: (s[1], self._row_of.get(s[0], -1))):
+                row = self._row_of.get(student_id)
+                if row is not None:
+                    self._postings.setdefault(skill_id, _Posting()).upsert(row, self._weight(proficiency_level))
+            self._digest = digest
+            self._loaded_at = time.monotonic()
+
+    def preload(self, db: Session):
+        """Loads the index now instead of on first use (e.g. in a server master before forking workers)."""
+        self._ensure_loaded(db)
+
+    @staticmethod
+    def _weight(proficiency_level: Optional[str]) -> float:
+        return PROFICIENCY_WEIGHTS.get(proficiency_level, DEFAULT_PROFICIENCY_WEIGHT)
+
+    def _append_student(self, student_id, user_id, department, major, gpa) -> int:
+        row = len(self._student_ids)
+        self._row_of[student_id] = row
+        self._student_ids.append(student_id)
+        self._user_ids.append(user_id)
+        self._departments.append(self._department_codes.encode(department))
+        self._majors.append(self._major_codes.encode(major))
+        self._gpas.append(float(gpa) if gpa is not None else math.nan)
+        self._alive.append(1)
+        return row
+
+    # --- Incremental maintenance (no-ops until the index is first loaded) ---
+
+    def upsert_student(self, student_id: int, user_id: int, department: Optional[str], major: Optional[str], gpa):
+        """Adds a student or updates their filterable attributes."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._digest = None
+            row = self._row_of.get(student_id)
+            if row is None:
+                self._append_student(student_id, user_id, department, major, gpa)
+                return
+            self._departments[row] = self._department_codes.encode(department)
+            self._majors[row] = self._major_codes.encode(major)
+            self._gpas[row] = float(gpa) if gpa is not None else math.nan
+            self._alive[row] = 1
+
+    def add_student_skills(self, student_id: int, skills: Iterable[Tuple[int, Optional[str]]]):
+        """Adds (skill_id, proficiency_level) pairs to an indexed student."""
+        with self._lock:
+            row = self._row_of.get(student_id)
+            if self._loaded_at is None or row is None:
+                return
+            self._digest = None
+            for skill_id, proficiency_level in skills:
+                self._postings.setdefault(skill_id, _Posting()).upsert(row, self._weight(proficiency_level))
+
+    def remove_student(self, student_id: int):
+        """Tombstones a student; their postings are dropped on the next rebuild."""
+        with self._lock:
+            row = self._row_of.get(student_id)
+            if row is not None:
+                self._alive[row] = 0
+                self._digest = None
+
+    # --- Querying ---
+
+    def _passes(self, row: int, department_code: Optional[int], major_code: Optional[int], min_gpa: Optional[float]) -> bool:
+        if not self._alive[row]:
+            return False
+        if department_code is not None and self._departments[row] != department_code:
+            return False
+        if major_code is not None and self._majors[row] != major_code:
+            return False
+        # NaN never compares >= so students without a GPA are excluded by a GPA filter
+        if min_gpa is not None and not self._gpas[row] >= min_gpa:
+            return False
+        return True
+
+    def top_candidates(
+        self,
+        db: Session,
+        required_skills: Iterable[Tuple[int, bool]],
+        k: int = 20,
+        department: Optional[str] = None,
+        major: Optional[str] = None,
+        min_gpa: Optional[float] = None,
+    ) -> List[Candidate]:
+        """
+        Ranks students for (skill_id, is_mandatory) requirements using WAND: a student's
+        score is only computed when the upper bounds of the terms they could match can beat
+        the current k-th best score, so most posting entries are skipped.
+        """
+        self._ensure_loaded(db)
+        required_skills = list(required_skills)
+        total_weight = sum(MANDATORY_WEIGHT if m else OPTIONAL_WEIGHT for _, m in required_skills)
+        if not required_skills or k <= 0:
+            return []
+
+        with self._lock:
+            department_code = major_code = None
+            if department is not None:
+                department_code = self._department_codes.codes.get(department)
+                if department_code is None:
+                    return []
+            if major is not None:
+                major_code = self._major_codes.codes.get(major)
+                if major_code is None:
+                    return []
+
+            cursors = [
+                _Cursor(skill_id, self._postings[skill_id], MANDATORY_WEIGHT if is_mandatory else OPTIONAL_WEIGHT)
+                for skill_id, is_mandatory in required_skills
+                if skill_id in self._postings and len(self._postings[skill_id].rows)
+            ]
+            heap: List[Tuple[float, int]] = [] # (score, -row) min-heap of the current top k
+
+            while True:
+                cursors = [c for c in cursors if c.row >= 0]
+                if not cursors:
+                    break
+                cursors.sort(key=lambda c: c.row)
+                threshold = heap[0][0] if len(heap) == k else 0.0
+
+                # Pivot: first cursor where the accumulated upper bounds can beat the threshold
+                bound = 0.0
+                pivot = None
+                for i, cursor in enumerate(cursors):
+                    bound += cursor.upper_bound
+                    if bound > threshold:
+                        pivot = i
+                        break
+                if pivot is None:
+                    break # No remaining student can enter the top k
+
+                pivot_row = cursors[pivot].row
+                if cursors[0].row == pivot_row:
+                    # Every cursor up to the pivot sits on this student: score them fully
+                    at_row = [c for c in cursors if c.row == pivot_row]
+                    if self._passes(pivot_row, department_code, major_code, min_gpa):
+                        score = sum(c.term_weight * c.posting.weights[c.pos] for c in at_row)
+                        entry = (score, -pivot_row)
+                        if len(heap) < k:
+                            heapq.heappush(heap, entry)
+                        elif entry > heap[0]:
+                            heapq.heapreplace(heap, entry)
+                    for cursor in at_row:
+                        cursor.pos += 1
+                else:
+                    # Skip the lagging cursors straight to the pivot student
+                    for cursor in cursors[:pivot]:
+                        cursor.seek(pivot_row)
+
+            results = []
+            for score, neg_row in sorted(heap, reverse=True):
+                row = -neg_row
+                matched = []
+                for skill_id, _ in required_skills:
+                    posting = self._postings.get(skill_id)
+                    if posting is not None:
+                        pos = bisect.bisect_left(posting.rows, row)
+                        if pos < len(posting.rows) and posting.rows[pos] == row:
+                            matched.append(skill_id)
+                gpa = self._gpas[row]
+                results.append(Candidate(
+                    student_profile_id=self._student_ids[row],
+                    user_id=self._user_ids[row],
+                    department=self._department_codes.decode(self._departments[row]),
+                    major=self._major_codes.decode(self._majors[row]),
+                    gpa=None if math.isnan(gpa) else round(gpa, 2),
+                    match_score=round(score / total_weight * 100, 2),
+                    matched_skill_ids=matched,
+                ))
+            return results
+
+
+# Process-wide index used by the opportunities router
+candidate_index = CandidateIndex()
@@ -0,0 +1,173 @@
+import csv
+import io
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+from sqlalchemy.orm import Query, Session
+
+from database import models
+from database.connection import SessionLocal, replica_pool
+
+# Institutional exports of profiles, applications and skills, streamed end to end: rows come
+# off a server-side cursor (Query.yield_per) in batches of EXPORT_BATCH_SIZE and each batch is
+# written out as CSV text or a Parquet row group before the next one is read, so memory stays
+# flat however many rows there are. Queries select columns only, so rows are plain tuples and
+# nothing accumulates in the session's identity map.
+# Parquet needs pyarrow, which is optional (pip install pyarrow).
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 5000))
+FORMATS = ("csv", "parquet")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+
+
+class ExportColumn(NamedTuple):
+    name: str
+    kind: str # int, str, float, bool or datetime (the Parquet type)
+
+
+class ExportSpec(NamedTuple):
+    columns: Tuple[ExportColumn, ...]
+    query: Callable[[Session], Query] # Selects the columns, in order, with a stable ORDER BY
+
+
+def _profiles(db: Session):
+    return db.query(
+        models.StudentProfile.id, models.StudentProfile.user_id, models.User.email, models.User.first_name,
+        models.User.last_name, models.StudentProfile.academic_id, models.StudentProfile.department,
+        models.StudentProfile.major, models.StudentProfile.gpa, models.User.created_at,
+    ).join(models.User, models.User.id == models.StudentProfile.user_id).order_by(models.StudentProfile.id)
+
+
+def _applications(db: Session):
+    return db.query(
+        models.StudentApplication.id, models.StudentApplication.student_profile_id,
+        models.StudentApplication.opportunity_id, models.Opportunity.title, models.Opportunity.department,
+        models.StudentApplication.application_status, models.StudentApplication.applied_at,
+        models.StudentApplication.updated_at,
+    ).join(models.Opportunity, models.Opportunity.id == models.StudentApplication.opportunity_id
+    ).order_by(models.StudentApplication.id)
+
+
+def _skills(db: Session):
+    return db.query(
+        models.StudentSkill.student_profile_id, models.StudentSkill.skill_id, models.Skill.name,
+        models.Skill.category, models.StudentSkill.proficiency_level, models.StudentSkill.inferred_from,
+    ).join(models.Skill, models.Skill.id == models.StudentSkill.skill_id
+    ).order_by(models.StudentSkill.student_profile_id, models.StudentSkill.skill_id)
+
+
+def _columns(*columns: str) -> Tuple[ExportColumn, ...]:
+    return tuple(ExportColumn(*column.split(":")) for column in columns)
+
+
+EXPORTS: Dict[str, ExportSpec] = {
+    "profiles": ExportSpec(_columns(
+        "student_profile_id:int", "user_id:int", "email:str", "first_name:str", "last_name:str",
+        "academic_id:str", "department:str", "major:str", "gpa:float", "registered_at:datetime",
+    ), _profiles),
+    "applications": ExportSpec(_columns(
+        "application_id:int", "student_profile_id:int", "opportunity_id:int", "opportunity_title:str",
+        "opportunity_department:str", "application_status:str", "applied_at:datetime", "updated_at:datetime",
+    ), _applications),
+    "skills": ExportSpec(_columns(
+        "student_profile_id:int", "skill_id:int", "skill_name:str", "skill_category:str",
+        "proficiency_level:str", "inferred_from:str",
+    ), _skills),
+}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def open_export_session() -> Session:
+    """A session of its own for one export: long scans go to a read replica when there is one."""
+    replica = replica_pool.pick()
+    return SessionLocal(bind=replica) if replica is not None else SessionLocal()
+
+
+def row_batches(db: Session, dataset: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[tuple]]:
+    """Rows of a dataset in lists of up to batch_size, read through a server-side cursor."""
+    batch = []
+    for row in EXPORTS[dataset].query(db).yield_per(batch_size):
+        batch.append(tuple(row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def csv_chunks(columns: Sequence[ExportColumn], batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """The header, then one UTF-8 CSV chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in columns])
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8") # Header of an empty export
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file for pyarrow that hands over what was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def parquet_chunks(columns: Sequence[ExportColumn], batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """A Parquet file written one row group per batch, yielding the bytes of each as it is done."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"int": pa.int64(), "str": pa.string(), "float": pa.float64(), "bool": pa.bool_(),
+             "datetime": pa.timestamp("us")}
+    schema = pa.schema([(column.name, types[column.kind]) for column in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            values = list(zip(*batch))
+            arrays = []
+            for column, column_values in zip(columns, values):
+                if column.kind == "float":
+                    column_values = [float(v) if v is not None else None for v in column_values] # DECIMAL
+                arrays.append(pa.array(column_values, type=schema.field(column.name).type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain() # Footer
+
+
+def export_chunks(db: Session, dataset: str, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """The encoded export of a dataset, chunk by chunk. The caller owns (and closes) db."""
+    columns = EXPORTS[dataset].columns
+    batches = row_batches(db, dataset, batch_size)
+    return parquet_chunks(columns, batches) if fmt == "parquet" else csv_chunks(columns, batches)
@@ -0,0 +1,170 @@
+import datetime
+import heapq
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import models
+from database.connection import SessionLocal
+from services.incremental_recommendations import incremental_engine
+from services.opportunity_catalog import opportunity_catalog
+
+logger = logging.getLogger(__name__)
+
+# Opportunities closed per UPDATE when many deadlines fall due together
+CLOSE_BATCH_SIZE = 500
+# Full resync of open deadlines, to pick up postings created through other workers
+RESYNC_SECONDS = float(os.getenv("DEADLINE_RESYNC_SECONDS", 600))
+
+
+def close_opportunities(db: Session, opportunity_ids: Iterable[int]) -> List[int]:
+    """
+    Closes still-open opportunities in batched UPDATEs, drops their materialized
+    recommendations and evicts them from the in-memory recommendation indexes.
+    Returns the ids that were actually open.
+    """
+    opportunity_ids = sorted(set(opportunity_ids))
+    closed = []
+    for start in range(0, len(opportunity_ids), CLOSE_BATCH_SIZE):
+        batch = opportunity_ids[start:start + CLOSE_BATCH_SIZE]
+        closed.extend(row[0] for row in db.query(models.Opportunity.id).filter(
+            models.Opportunity.id.in_(batch),
+            models.Opportunity.status == 'open',
+        ).all())
+        db.query(models.Opportunity).filter(
+            models.Opportunity.id.in_(batch),
+            models.Opportunity.status == 'open',
+        ).update({models.Opportunity.status: 'closed'}, synchronize_session=False)
+        db.query(models.StudentRecommendation).filter(
+            models.StudentRecommendation.opportunity_id.in_(batch)
+        ).delete(synchronize_session=False)
+    db.commit()
+    opportunity_catalog.remove_many(closed)
+    incremental_engine.evict_opportunities(closed)
+    deadline_scheduler.cancel_many(closed)
+    return closed
+
+
+def close_full_opportunities(db: Session, opportunity_ids: Iterable[int]) -> List[int]:
+    """Closes the given opportunities that have as many accepted applications as positions."""
+    opportunity_ids = list(opportunity_ids)
+    if not opportunity_ids:
+        return []
+    full = db.query(models.Opportunity.id).join(
+        models.OpportunityApplicationCount,
+        models.OpportunityApplicationCount.opportunity_id == models.Opportunity.id,
+    ).filter(
+        models.Opportunity.id.in_(opportunity_ids),
+        models.Opportunity.status == 'open',
+        models.Opportunity.num_positions.isnot(None),
+        models.OpportunityApplicationCount.application_status == 'accepted',
+        models.OpportunityApplicationCount.count >= models.Opportunity.num_positions,
+    ).all()
+    return close_opportunities(db, [row[0] for row in full])
+
+
+class DeadlineScheduler:
+    """
+    Closes opportunities when their application_deadline passes.
+    Upcoming deadlines sit in a min-heap; a background thread sleeps until the earliest one
+    and closes everything due in one go. Rescheduled or cancelled entries are skipped lazily.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime.datetime, int]] = []
+        self._deadlines: Dict[int, datetime.datetime] = {} # Current deadline per open opportunity
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def schedule(self, opportunity_id: int, deadline: Optional[datetime.datetime]):
+        """Adds or moves an opportunity's deadline."""
+        with self._cond:
+            if deadline is None:
+                self._deadlines.pop(opportunity_id, None)
+                return
+            self._deadlines[opportunity_id] = deadline
+            heapq.heappush(self._heap, (deadline, opportunity_id))
+            if self._heap[0] == (deadline, opportunity_id):
+                self._cond.notify() # New earliest deadline: re-arm the timer
+
+    def cancel_many(self, opportunity_ids: Iterable[int]):
+        """Forgets opportunities that were closed or deleted."""
+        with self._cond:
+            for opportunity_id in opportunity_ids:
+                self._deadlines.pop(opportunity_id, None)
+
+    def _resync(self, db: Session):
+        rows = db.query(models.Opportunity.id, models.Opportunity.application_deadline).filter(
+            models.Opportunity.status == 'open'
+        ).all()
+        with self._cond:
+            self._deadlines = {opp_id: deadline for opp_id, deadline in rows if deadline is not None}
+            self._heap = [(deadline, opp_id) for opp_id, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def _pop_due(self, now: datetime.datetime) -> List[int]:
+        # Caller holds the condition
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, opportunity_id = heapq.heappop(self._heap)
+            if self._deadlines.get(opportunity_id) == deadline:
+                del self._deadlines[opportunity_id]
+                due.append(opportunity_id)
+        return due
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="deadline-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        next_resync = datetime.datetime.min
+        while True:
+            now = datetime.datetime.now()
+            if now >= next_resync:
+                db = SessionLocal()
+                try:
+                    self._resync(db)
+                except Exception:
+                    logger.exception("Failed to load open opportunity deadlines")
+                finally:
+                    db.close()
+                next_resync = now + datetime.timedelta(seconds=RESYNC_SECONDS)
+
+            with self._cond:
+                if self._stopping:
+                    return
+                due = self._pop_due(now)
+                if not due:
+                    wake_at = min(self._heap[0][0], next_resync) if self._heap else next_resync
+                    self._cond.wait(timeout=max(0.0, (wake_at - now).total_seconds()))
+                    continue
+
+            db = SessionLocal()
+            try:
+                closed = close_opportunities(db, due)
+                logger.info("Closed %d opportunities past their application deadline", len(closed))
+            except Exception:
+                db.rollback()
+                logger.exception("Failed to close expired opportunities")
+            finally:
+                db.close()
+
+
+deadline_scheduler = DeadlineScheduler()
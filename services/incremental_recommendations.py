@@ -0,0 +1,262 @@
+import datetime
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import models
+from database.connection import SessionLocal
+from services import recommendation_engine
+from services.learning_index import learning_resource_index
+from services.opportunity_catalog import OpenOpportunitySnapshot, opportunity_catalog
+from services.skill_hierarchy import skill_hierarchy
+from services.notification_hub import notify_many, student_user_ids
+
+# Upper bound on students rescored for a single opportunity event. Anyone beyond it is
+# marked stale so the endpoint recomputes them live (and the nightly batch catches up).
+MAX_STUDENTS_PER_EVENT = int(os.getenv("INCREMENTAL_MAX_STUDENTS_PER_EVENT", 5000))
+STUDENT_BATCH_SIZE = 500
+# Posting lists are rebuilt from the database at most this often, to pick up writes
+# handled by other worker processes.
+INDEX_TTL_SECONDS = int(os.getenv("INCREMENTAL_INDEX_TTL_SECONDS", 300))
+
+# Newly reached recommendations at or above this score are pushed to the student
+HIGH_SCORE_NOTIFY_THRESHOLD = float(os.getenv("RECOMMENDATION_NOTIFY_THRESHOLD", 90))
+
+# computed_at value that is always older than RECOMMENDATIONS_MAX_AGE_HOURS
+STALE_TIMESTAMP = datetime.datetime(1970, 1, 1)
+
+
+class IncrementalRecommendationEngine:
+    """
+    Keeps the materialized student_recommendations rows fresh as skills and opportunities change.
+    Only students with a recorded run (student_recommendation_runs) are maintained; everyone else is
+    computed live by the endpoint until the next batch run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock() # Held by the one caller rebuilding the posting lists
+        # open opportunity_id -> required skill ids
+        self._opportunity_skills: Dict[int, frozenset] = {}
+        # skill_id -> open opportunity ids requiring it
+        self._skill_postings: Dict[int, Set[int]] = {}
+        self._loaded_at: Optional[float] = None
+        # Catalog snapshot the posting lists were built from; None once changed in place
+        self._loaded_from: Optional[OpenOpportunitySnapshot] = None
+
+    # --- Posting list maintenance ---
+
+    def _ensure_loaded(self, db: Session):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < INDEX_TTL_SECONDS:
+            return
+        # Only the very first load makes readers wait; later one caller rebuilds while the rest use the old posting lists
+        if not self._refresh_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= INDEX_TTL_SECONDS:
+                self._load(db) # Unless a caller we waited for just did
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self, db: Session):
+        snapshot = opportunity_catalog.snapshot()
+        if snapshot is self._loaded_from:
+            self._loaded_at = time.monotonic() # Catalog unchanged: keep the current (shared) posting lists
+            return
+        # Copied: the catalog's dict is shared, and this one is modified in place
+        opportunity_skills = dict(snapshot.opportunity_skills())
+        postings: Dict[int, Set[int]] = {}
+        for opportunity_id, skill_ids in opportunity_skills.items():
+            for skill_id in skill_ids:
+                postings.setdefault(skill_id, set()).add(opportunity_id)
+        with self._lock:
+            self._opportunity_skills = opportunity_skills
+            self._skill_postings = postings
+            self._loaded_from = snapshot
+            self._loaded_at = time.monotonic()
+
+    def preload(self, db: Session):
+        """Loads the index now instead of on first use (e.g. in a server master before forking workers)."""
+        self._ensure_loaded(db)
+
+    def _add_opportunity(self, opportunity_id: int, skill_ids: Iterable[int]):
+        with self._lock:
+            self._remove_opportunity(opportunity_id)
+            skill_ids = frozenset(skill_ids)
+            self._opportunity_skills[opportunity_id] = skill_ids
+            for skill_id in skill_ids:
+                self._skill_postings.setdefault(skill_id, set()).add(opportunity_id)
+
+    def _remove_opportunity(self, opportunity_id: int):
+        # Caller holds the lock
+        self._loaded_from = None
+        for skill_id in self._opportunity_skills.pop(opportunity_id, ()):
+            posting = self._skill_postings.get(skill_id)
+            if posting is not None:
+                posting.discard(opportunity_id)
+                if not posting:
+                    del self._skill_postings[skill_id]
+
+    def evict_opportunities(self, opportunity_ids: Iterable[int]):
+        """Removes opportunities from the posting lists without touching the database."""
+        with self._lock:
+            for opportunity_id in opportunity_ids:
+                self._remove_opportunity(opportunity_id)
+
+    # --- Events ---
+
+    def student_skills_added(self, student_profile_id: int, skill_ids: Iterable[int]):
+        """
+        Rescores only the open opportunities that require one of the new skills,
+        or a skill above or below one in the hierarchy (which now earns partial credit).
+        """
+        db = SessionLocal()
+        try:
+            self._ensure_loaded(db)
+            skill_ids = set(skill_ids)
+            skill_ids |= skill_hierarchy.related_skill_ids(db, skill_ids)
+            with self._lock:
+                affected = {opp_id for skill_id in skill_ids for opp_id in self._skill_postings.get(skill_id, ())}
+                opportunity_skills = {opp_id: self._opportunity_skills[opp_id] for opp_id in affected}
+            if not affected:
+                return
+
+            table = models.StudentRecommendation.__table__
+            runs = models.StudentRecommendationRun.__table__
+            if db.query(runs.c.student_profile_id).filter(
+                runs.c.student_profile_id == student_profile_id
+            ).first() is None:
+                return # Not materialized yet; the endpoint computes this student live
+
+            student_skill_ids = recommendation_engine.load_student_skill_ids(db, [student_profile_id])[student_profile_id]
+            skills_with_resources = learning_resource_index.skills_with_resources(db)
+            credits = skill_hierarchy.credits(db, student_skill_ids)
+            scores = [
+                recommendation_engine.score_opportunity(student_skill_ids, opp_id, required, skills_with_resources, credits)
+                for opp_id, required in opportunity_skills.items()
+            ]
+
+            previous = dict(db.query(table.c.opportunity_id, table.c.match_score).filter(
+                table.c.student_profile_id == student_profile_id,
+                table.c.opportunity_id.in_(list(affected)),
+            ).all())
+            db.execute(table.delete().where(
+                table.c.student_profile_id == student_profile_id,
+                table.c.opportunity_id.in_(list(affected)),
+            ))
+            scored = [(student_profile_id, s) for s in scores if s is not None]
+            recommendation_engine.insert_scores(db, scored)
+            db.commit()
+
+            self._notify_high_scores(db, [
+                (student_id, score) for student_id, score in scored
+                if float(previous.get(score.opportunity_id, 0)) < HIGH_SCORE_NOTIFY_THRESHOLD
+            ])
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def opportunity_opened(self, opportunity_id: int, skill_ids: Iterable[int]):
+        """
+        Scores a new (or reopened, or re-skilled) opportunity for the materialized students
+        holding at least one of its required skills or a skill related to one in the
+        hierarchy, up to MAX_STUDENTS_PER_EVENT.
+        """
+        skill_ids = frozenset(skill_ids)
+        db = SessionLocal()
+        try:
+            self._ensure_loaded(db)
+            self._add_opportunity(opportunity_id, skill_ids)
+
+            table = models.StudentRecommendation.__table__
+            runs = models.StudentRecommendationRun.__table__
+            db.execute(table.delete().where(table.c.opportunity_id == opportunity_id))
+            if not skill_ids:
+                db.commit()
+                return
+
+            # Materialized students (with rows or not) holding at least one required (or related) skill
+            credited_skill_ids = list(skill_ids | skill_hierarchy.related_skill_ids(db, skill_ids))
+            holders = db.query(models.StudentSkill.student_profile_id).filter(
+                models.StudentSkill.skill_id.in_(credited_skill_ids),
+                models.StudentSkill.student_profile_id.in_(select(runs.c.student_profile_id)),
+            ).distinct().order_by(models.StudentSkill.student_profile_id)
+            student_ids = [row[0] for row in holders.limit(MAX_STUDENTS_PER_EVENT).all()]
+
+            skills_with_resources = learning_resource_index.skills_with_resources(db)
+            high_scores = []
+            for start in range(0, len(student_ids), STUDENT_BATCH_SIZE):
+                batch = student_ids[start:start + STUDENT_BATCH_SIZE]
+                student_skills = recommendation_engine.load_student_skill_ids(db, batch)
+                scored = [
+                    (student_id, recommendation_engine.score_opportunity(
+                        student_skills[student_id], opportunity_id, skill_ids, skills_with_resources,
+                        skill_hierarchy.credits(db, student_skills[student_id])
+                    ))
+                    for student_id in batch
+                ]
+                scored = [(student_id, s) for student_id, s in scored if s is not None]
+                recommendation_engine.insert_scores(db, scored)
+                high_scores.extend(scored)
+
+            if len(student_ids) == MAX_STUDENTS_PER_EVENT:
+                # Over budget: leave the rest to the endpoint's live path
+                overflow = select(models.StudentSkill.student_profile_id).where(
+                    models.StudentSkill.skill_id.in_(credited_skill_ids),
+                    models.StudentSkill.student_profile_id > student_ids[-1],
+                )
+                db.execute(runs.update().where(
+                    runs.c.student_profile_id.in_(overflow)
+                ).values(computed_at=STALE_TIMESTAMP))
+            db.commit()
+            self._notify_high_scores(db, high_scores)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def opportunity_closed(self, opportunity_id: int):
+        """Drops a closed or deleted opportunity from the posting lists and every student's rows."""
+        self.evict_opportunities([opportunity_id])
+        db = SessionLocal()
+        try:
+            table = models.StudentRecommendation.__table__
+            db.execute(table.delete().where(table.c.opportunity_id == opportunity_id))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+    def _notify_high_scores(self, db: Session, scored):
+        """Pushes a 'new_recommendation' notification for each newly reached high score."""
+        scored = [(student_id, score) for student_id, score in scored if score.match_score >= HIGH_SCORE_NOTIFY_THRESHOLD]
+        if not scored:
+            return
+        user_ids = student_user_ids(db, {student_id for student_id, _ in scored})
+        titles = dict(db.query(models.Opportunity.id, models.Opportunity.title).filter(
+            models.Opportunity.id.in_({score.opportunity_id for _, score in scored})
+        ).all())
+        notify_many(
+            {
+                "user_id": user_ids[student_id],
+                "type": "new_recommendation",
+                "message": f"'{titles.get(score.opportunity_id, 'An opportunity')}' matches {score.match_score:.0f}% of your skills.",
+                "related_entity_id": score.opportunity_id,
+            }
+            for student_id, score in scored if student_id in user_ids
+        )
+
+
+# Process-wide engine fed by the student and opportunity write handlers
+incremental_engine = IncrementalRecommendationEngine()
@@ -0,0 +1,141 @@
+import bisect
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import models
+from utils.prefork import rows_digest
+
+# Difficulty ranks shared by learning resources and student proficiency levels
+DIFFICULTY_RANKS = {"beginner": 0, "intermediate": 1, "advanced": 2}
+PROFICIENCY_RANKS = {"beginner": 0, "intermediate": 1, "advanced": 2, "expert": 3}
+UNKNOWN_DIFFICULTY = -1
+
+# Learning resources are written outside the app (seed scripts, admin tooling), so the
+# index is rebuilt from the database at most this often to pick them up.
+INDEX_TTL_SECONDS = int(os.getenv("LEARNING_INDEX_TTL_SECONDS", 300))
+
+
+def target_difficulty(proficiency_levels: Iterable[Optional[str]], current_level: Optional[str] = None) -> int:
+    """
+    Picks the difficulty rank a student should start at for a skill.
+    If they already hold the skill, aim one step above it; otherwise start from their
+    average proficiency across other skills, capped at intermediate.
+    """
+    if current_level in PROFICIENCY_RANKS:
+        return min(PROFICIENCY_RANKS[current_level] + 1, DIFFICULTY_RANKS["advanced"])
+    ranks = [PROFICIENCY_RANKS[p] for p in proficiency_levels if p in PROFICIENCY_RANKS]
+    if not ranks:
+        return DIFFICULTY_RANKS["beginner"]
+    return min(round(sum(ranks) / len(ranks)), DIFFICULTY_RANKS["intermediate"])
+
+
+class LearningResourceIndex:
+    """
+    Inverted index from skill_id to learning resource ids.
+    Each skill keeps one posting list per difficulty rank, sorted by estimated time
+    to complete, so top-k lookups only touch the buckets closest to the target.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock() # Held by the one caller rebuilding the index
+        # skill_id -> {difficulty_rank: sorted [(estimated_minutes, resource_id)]}
+        self._postings: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}
+        # resource_id -> (difficulty_rank, estimated_minutes, skill_ids)
+        self._resources: Dict[int, Tuple[int, int, Tuple[int, ...]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._digest: Optional[int] = None # rows_digest of the rows the index was built from
+
+    def _ensure_loaded(self, db: Session):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < INDEX_TTL_SECONDS:
+            return
+        # Only the very first load makes readers wait; later one caller rebuilds while the rest use the old index
+        if not self._refresh_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= INDEX_TTL_SECONDS:
+                self._load(db) # Unless a caller we waited for just did
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self, db: Session):
+        rows = db.query(
+            models.LearningResource.id,
+            models.LearningResource.difficulty_level,
+            models.LearningResource.estimated_time_to_complete_min,
+            models.ResourceAssociatedSkill.skill_id,
+        ).join(
+            models.ResourceAssociatedSkill,
+            models.ResourceAssociatedSkill.resource_id == models.LearningResource.id,
+        ).all()
+        digest = rows_digest(rows)
+        if digest == self._digest:
+            self._loaded_at = time.monotonic() # Same resources: keep the current (shared) posting lists
+            return
+
+        grouped: Dict[int, Tuple[Optional[str], Optional[int], List[int]]] = {}
+        for resource_id, difficulty_level, minutes, skill_id in rows:
+            grouped.setdefault(resource_id, (difficulty_level, minutes, []))[2].append(skill_id)
+
+        with self._lock:
+            self._postings = {}
+            self._resources = {}
+            for resource_id, (difficulty_level, minutes, skill_ids) in grouped.items():
+                self._insert(resource_id, difficulty_level, minutes, skill_ids)
+            self._digest = digest
+            self._loaded_at = time.monotonic()
+
+    def preload(self, db: Session):
+        """Loads the index now instead of on first use (e.g. in a server master before forking workers)."""
+        self._ensure_loaded(db)
+
+    def _insert(self, resource_id: int, difficulty_level: Optional[str], minutes: Optional[int], skill_ids: Iterable[int]):
+        rank = DIFFICULTY_RANKS.get(difficulty_level, UNKNOWN_DIFFICULTY)
+        # Resources without an estimate sort after every timed resource
+        minutes = minutes if minutes is not None else 2 ** 31 - 1
+        skill_ids = tuple(sorted(set(skill_ids)))
+        self._resources[resource_id] = (rank, minutes, skill_ids)
+        for skill_id in skill_ids:
+            bucket = self._postings.setdefault(skill_id, {}).setdefault(rank, [])
+            bisect.insort(bucket, (minutes, resource_id))
+
+    def skills_with_resources(self, db: Session) -> frozenset:
+        """Skill ids that at least one learning resource teaches."""
+        self._ensure_loaded(db)
+        with self._lock:
+            return frozenset(skill_id for skill_id, buckets in self._postings.items() if any(buckets.values()))
+
+    def top_k(self, db: Session, skill_id: int, k: int, target_rank: int = 0) -> List[int]:
+        """
+        Returns up to k resource ids for a skill, closest to target_rank first
+        (the next harder level is preferred over the easier one), then shortest first.
+        Resources without a difficulty level come last.
+        """
+        self._ensure_loaded(db)
+        buckets = self._postings.get(skill_id)
+        if not buckets or k <= 0:
+            return []
+
+        valid_ranks = set(DIFFICULTY_RANKS.values())
+        order = [target_rank]
+        for distance in range(1, len(DIFFICULTY_RANKS)):
+            order.extend(r for r in (target_rank + distance, target_rank - distance) if r in valid_ranks)
+        order.append(UNKNOWN_DIFFICULTY)
+
+        result: List[int] = []
+        with self._lock:
+            for rank in order:
+                for _, resource_id in buckets.get(rank, ()):
+                    result.append(resource_id)
+                    if len(result) == k:
+                        return result
+        return result
+
+
+# Process-wide index used by the recommendations router
+learning_resource_index = LearningResourceIndex()
@@ -0,0 +1,145 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import models
+from database.counters import increment_counters
+
+STATUSES = ("assigned", "in_progress", "completed", "skipped")
+# Allowed learning path status moves
+TRANSITIONS = {
+    "assigned": {"in_progress", "completed", "skipped"},
+    "in_progress": {"completed", "skipped"},
+    "skipped": {"assigned", "in_progress"},
+    "completed": set(),
+}
+COUNT_KEY_COLUMNS = ("scope", "scope_key", "status")
+
+# (student_profile_id, target_skill_id, department, old_status or None, new_status or None)
+PathChange = Tuple[int, Optional[int], Optional[str], Optional[str], Optional[str]]
+
+
+def _scope_keys(student_profile_id: int, skill_id: Optional[int], department: Optional[str]):
+    keys = [("student", str(student_profile_id))]
+    if skill_id is not None:
+        keys.append(("skill", str(skill_id)))
+    if department:
+        keys.append(("department", department))
+        if skill_id is not None:
+            keys.append(("department_skill", department_skill_key(department, skill_id)))
+    return keys
+
+
+def department_skill_key(department: str, skill_id: int) -> str:
+    return f"{department}|{skill_id}"
+
+
+def record_changes(db: Session, changes: Iterable[PathChange]):
+    """Folds learning path status changes into the per-student/skill/department counters. The caller commits."""
+    deltas: Dict[Tuple[str, str, str], int] = {}
+    for student_profile_id, skill_id, department, old_status, new_status in changes:
+        for scope, key in _scope_keys(student_profile_id, skill_id, department):
+            if old_status:
+                deltas[(scope, key, old_status)] = deltas.get((scope, key, old_status), 0) - 1
+            if new_status:
+                deltas[(scope, key, new_status)] = deltas.get((scope, key, new_status), 0) + 1
+    increment_counters(db, models.LearningProgressCount.__table__, COUNT_KEY_COLUMNS, deltas)
+
+
+def commit_with_retry(db: Session, apply):
+    """
+    Runs apply(db) and commits, retrying once if another request created one of the
+    same counter rows first (the retry then updates it instead of inserting).
+    """
+    try:
+        result = apply(db)
+        db.commit()
+        return result
+    except IntegrityError:
+        db.rollback()
+        result = apply(db)
+        db.commit()
+        return result
+
+
+def move_department(db: Session, student_profile_id: int, old_department: Optional[str], new_department: Optional[str]):
+    """Moves a student's paths between department counters when their department changes. The caller commits."""
+    if old_department == new_department:
+        return
+    paths = db.query(models.StudentLearningPath.target_skill_id, models.StudentLearningPath.status).filter(
+        models.StudentLearningPath.student_profile_id == student_profile_id
+    ).all()
+    deltas: Dict[Tuple[str, str, str], int] = {}
+    for skill_id, status in paths:
+        for department, sign in ((old_department, -1), (new_department, 1)):
+            if not department:
+                continue
+            keys = [("department", department)]
+            if skill_id is not None:
+                keys.append(("department_skill", department_skill_key(department, skill_id)))
+            for scope, key in keys:
+                deltas[(scope, key, status)] = deltas.get((scope, key, status), 0) + sign
+    increment_counters(db, models.LearningProgressCount.__table__, COUNT_KEY_COLUMNS, deltas)
+
+
+def remove_student(db: Session, student_profile_id: int, department: Optional[str]):
+    """
+    Takes a student's learning paths out of every counter, before the profile (and so its
+    paths, by cascade) is deleted. The caller commits.
+    """
+    paths = db.query(models.StudentLearningPath.target_skill_id, models.StudentLearningPath.status).filter(
+        models.StudentLearningPath.student_profile_id == student_profile_id
+    ).all()
+    record_changes(db, [(student_profile_id, skill_id, department, status, None) for skill_id, status in paths])
+
+
+def summary(db: Session, scope: str, scope_key: str) -> Dict:
+    """Counts per status and the completion rate for one scope, from the counters only."""
+    return summaries(db, scope, [scope_key])[0]
+
+
+def summaries(db: Session, scope: str, scope_keys: List[str]) -> List[Dict]:
+    """Counts per status and completion rate for many keys of one scope, with a single query."""
+    if not scope_keys:
+        return []
+    rows = db.query(
+        models.LearningProgressCount.scope_key,
+        models.LearningProgressCount.status,
+        models.LearningProgressCount.count,
+    ).filter(
+        models.LearningProgressCount.scope == scope,
+        models.LearningProgressCount.scope_key.in_(scope_keys),
+    ).all()
+    by_key = {key: {status: 0 for status in STATUSES} for key in scope_keys}
+    for key, status, count in rows:
+        by_key[key][status] = count
+    return [_summarize(scope, key, counts) for key, counts in by_key.items()]
+
+
+def department_skill_summaries(db: Session, department: str) -> List[Dict]:
+    """Per-skill summaries within a department, for the department dashboard."""
+    prefix = department_skill_key(department, "")
+    rows = db.query(
+        models.LearningProgressCount.scope_key,
+        models.LearningProgressCount.status,
+        models.LearningProgressCount.count,
+    ).filter(
+        models.LearningProgressCount.scope == "department_skill",
+        models.LearningProgressCount.scope_key.startswith(prefix, autoescape=True),
+    ).all()
+    by_skill: Dict[str, Dict[str, int]] = {}
+    for key, status, count in rows:
+        by_skill.setdefault(key[len(prefix):], {s: 0 for s in STATUSES})[status] = count
+    return [_summarize("skill", skill_id, counts) for skill_id, counts in by_skill.items()]
+
+
+def _summarize(scope: str, key: str, counts: Dict[str, int]) -> Dict:
+    total = sum(counts.values())
+    return {
+        "scope": scope,
+        "scope_key": key,
+        "counts": counts,
+        "total": total,
+        "completion_rate": round(counts["completed"] / total * 100, 2) if total else 0.0,
+    }
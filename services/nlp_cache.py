@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rows kept on disk; the oldest are trimmed every TRIM_EVERY_PUTS writes
+DISK_MAX_ROWS = int(os.getenv("NLP_CACHE_DISK_MAX_ROWS", 100000))
+TRIM_EVERY_PUTS = 1000
+
+
+def text_key(text: str) -> str:
+    """
+    Hash of the text as extraction sees it. Extraction lowercases its input, so casing
+    and surrounding whitespace are normalized away; inner whitespace is kept because it
+    changes which multi-word skills match.
+    """
+    return hashlib.sha256(text.strip().lower().encode("utf-8")).hexdigest()
+
+
+class NlpResultCache:
+    """
+    Memoizes skill extraction results by (content hash, ontology version).
+    A bounded in-memory LRU sits in front of a local SQLite file shared by all worker
+    processes on the host. Rows written under another ontology version are purged on
+    open and never returned, so changing the ontology invalidates everything at once.
+    """
+
+    def __init__(self, path: str, capacity: int, ontology_version: str):
+        self.path = path
+        self.capacity = capacity
+        self.ontology_version = ontology_version
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_failed = False
+        self._puts = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        # Caller holds the lock. The cache keeps working from memory if the file is unusable.
+        if self._conn is not None or self._disk_failed:
+            return self._conn
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS nlp_results ("
+                " text_hash TEXT NOT NULL, ontology_version TEXT NOT NULL, skills TEXT NOT NULL,"
+                " created_at REAL NOT NULL, PRIMARY KEY (text_hash, ontology_version))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_nlp_results_created_at ON nlp_results (created_at)")
+            conn.execute("DELETE FROM nlp_results WHERE ontology_version != ?", (self.ontology_version,))
+            conn.commit()
+            self._conn = conn
+        except sqlite3.Error:
+            logger.exception("NLP result cache at %s is unavailable; caching in memory only", self.path)
+            self._disk_failed = True
+        return self._conn
+
+    def _remember(self, key: str, skills: List[str]):
+        # Caller holds the lock
+        self._memory[key] = skills
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            skills = self._memory.get(key)
+            if skills is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return list(skills)
+            conn = self._db()
+            row = None
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT skills FROM nlp_results WHERE text_hash = ? AND ontology_version = ?",
+                        (key, self.ontology_version),
+                    ).fetchone()
+                except sqlite3.Error:
+                    logger.exception("NLP result cache read failed")
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            skills = json.loads(row[0])
+            self._remember(key, skills)
+            self._stats["disk_hits"] += 1
+            return list(skills)
+
+    def put(self, key: str, skills: List[str]):
+        with self._lock:
+            self._remember(key, list(skills))
+            self._stats["stores"] += 1
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO nlp_results (text_hash, ontology_version, skills, created_at) VALUES (?, ?, ?, ?)",
+                    (key, self.ontology_version, json.dumps(skills), time.time()),
+                )
+                self._puts += 1
+                if self._puts % TRIM_EVERY_PUTS == 0:
+                    conn.execute(
+                        "DELETE FROM nlp_results WHERE rowid IN ("
+                        " SELECT rowid FROM nlp_results ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                        (DISK_MAX_ROWS,),
+                    )
+                conn.commit()
+            except sqlite3.Error:
+                logger.exception("NLP result cache write failed")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["ontology_version"] = self.ontology_version
+        return stats
@@ -1,14 +1,38 @@
-import spacy
-from typing import List, Dict
+import hashlib
+import json
+import os
+import threading
+from typing import List, Dict, Iterable, Iterator
 
-# Load a pre-trained spaCy model
-# Make sure you've run: python -m spacy download en_core_web_sm
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("SpaCy model 'en_core_web_sm' not found. Please run 'python -m spacy download en_core_web_sm'")
-    # Fallback to a blank model or raise an error depending on desired behavior
-    nlp = spacy.blank("en") # Fallback for demo purposes
+from services.nlp_cache import NlpResultCache, text_key
+
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+
+# The spaCy pipeline is loaded on first use (or by warm_up), not at import,
+# so processes that never extract skills don't pay for it.
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """Returns the spaCy pipeline, loading it on the first call."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                # Load a pre-trained spaCy model
+                # Make sure you've run: python -m spacy download en_core_web_sm
+                try:
+                    _nlp = spacy.load(SPACY_MODEL)
+                except OSError:
+                    print(f"SpaCy model '{SPACY_MODEL}' not found. Please run 'python -m spacy download {SPACY_MODEL}'")
+                    # Fallback to a blank model or raise an error depending on desired behavior
+                    _nlp = spacy.blank("en") # Fallback for demo purposes
+    return _nlp
+
+def warm_up():
+    """Loads the spaCy pipeline and runs it once, so the first request doesn't pay for it."""
+    get_nlp()("warm up")
 
 # --- Dummy Skill Ontology (In a real app, this would be from DB or a more complex file) ---
 # This is a simplified list for demonstration.
@@ -36,18 +60,51 @@ SKILL_ONTOLOGY = {
     "backend development": {"category": "Web Development", "related": ["python", "nodejs", "java"]},
 }
 
+# Changes whenever the ontology does, which invalidates every cached extraction result
+ONTOLOGY_VERSION = hashlib.sha256(json.dumps(SKILL_ONTOLOGY, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+# Memoized results keyed by (content hash, ONTOLOGY_VERSION)
+extraction_cache = NlpResultCache(
+    os.getenv("NLP_CACHE_PATH", "cache/nlp_results.sqlite3"),
+    int(os.getenv("NLP_CACHE_SIZE", 2048)),
+    ONTOLOGY_VERSION,
+)
+
 def extract_skills_from_text(text: str) -> List[Dict[str, str]]:
     """
     Extracts skills from a given text using spaCy and a simple keyword matching approach.
     In a real application, this would be more sophisticated (e.g., custom NER, semantic similarity).
+    Results are memoized, so re-submitted text skips spaCy.
     """
-    doc = nlp(text.lower()) # Process text in lowercase
+    key = text_key(text)
+    skills = extraction_cache.get(key)
+    if skills is None:
+        skills = [s["name"] for s in extract_skills_from_chunks([text])]
+        extraction_cache.put(key, skills)
+    return [{"name": skill} for skill in skills]
 
+def extract_skills_from_chunks(chunks: Iterable[str]) -> List[Dict[str, str]]:
+    """
+    Same as extract_skills_from_text, for text that arrives in pieces (e.g. pages of an
+    uploaded resume). Only one chunk is held in memory at a time.
+    """
+    return [{"name": skill} for skill in sorted(set(iter_skill_names(chunks)))]
+
+def iter_skill_names(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Generator stage of the extraction pipeline: yields each ontology skill the first time it
+    appears in the stream. The tail of each chunk is carried into the next one so a skill
+    name split across a chunk boundary is still found.
+    """
+    carry_chars = max(len(name) for name in SKILL_ONTOLOGY) - 1
     found_skills = set()
-    # Simple keyword matching against our ontology for hackathon
-    for skill_name in SKILL_ONTOLOGY.keys():
-        if skill_name in doc.text:
-            found_skills.add(skill_name)
+    # batch_size=1 keeps a single chunk in flight; text is lowercased by _with_overlap
+    for doc in get_nlp().pipe(_with_overlap(chunks, carry_chars), batch_size=1):
+        # Simple keyword matching against our ontology for hackathon
+        for skill_name in SKILL_ONTOLOGY.keys():
+            if skill_name not in found_skills and skill_name in doc.text:
+                found_skills.add(skill_name)
+                yield skill_name
 
     # You could also use spaCy's PhraseMatcher for more robust keyword matching
     # from spacy.matcher import PhraseMatcher
@@ -59,8 +116,15 @@ def extract_skills_from_text(text: str) -> List[Dict[str, str]]:
     #     span = doc[start:end]
     #     found_skills.add(span.text)
 
-    # Convert found skills to a list of dictionaries for consistent output
-    return [{"name": skill} for skill in sorted(list(found_skills))]
+def _with_overlap(chunks: Iterable[str], carry_chars: int) -> Iterator[str]:
+    """Lowercases chunks and prefixes each with the last carry_chars characters of the previous one."""
+    carry = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        text = carry + chunk.lower()
+        yield text
+        carry = text[-carry_chars:] if carry_chars else ""
 
 # Example usage:
 if __name__ == "__main__":
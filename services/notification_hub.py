@@ -0,0 +1,155 @@
+import asyncio
+import datetime
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from database import models
+from services.batch_writer import BatchWriter
+
+# Pushed notifications waiting for a slow client; the oldest are dropped beyond this
+SUBSCRIBER_QUEUE_SIZE = 100
+# Cached unread counts are re-read from the database after this long, to heal drift
+UNREAD_CACHE_TTL_SECONDS = 300
+
+notification_writer = BatchWriter(
+    models.Notification.__table__,
+    name="notifications",
+    capacity=int(os.getenv("NOTIFICATION_BUFFER_SIZE", 20000)),
+    batch_size=int(os.getenv("NOTIFICATION_BATCH_SIZE", 500)),
+    flush_interval=float(os.getenv("NOTIFICATION_FLUSH_SECONDS", 1.0)),
+    policy="block", # Notifications should not be silently dropped
+    block_timeout=1.0,
+    spool_path=os.getenv("NOTIFICATION_SPOOL_PATH") or None,
+    datetime_fields=("created_at",),
+)
+
+
+class NotificationHub:
+    """
+    In-process pub/sub keyed by user_id. WebSocket and SSE connections subscribe with
+    an asyncio queue; publishers can call publish() from any thread.
+    Each worker process only reaches the connections it holds itself.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """Registers a connection; must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, user_id: int, payload: dict):
+        """Pushes a payload to every connection of the user, if they have any."""
+        loop = self._loop
+        if loop is None or user_id not in self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(user_id, payload)
+        else:
+            loop.call_soon_threadsafe(self._deliver, user_id, payload)
+
+    def _deliver(self, user_id: int, payload: dict):
+        for queue in list(self._subscribers.get(user_id, ())):
+            if queue.full():
+                queue.get_nowait() # Drop the oldest for slow consumers
+            queue.put_nowait(payload)
+
+
+class UnreadCountCache:
+    """Per-user unread notification counts, read once from (user_id, is_read) and then kept in step."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[int, tuple] = {} # user_id -> (count, loaded_at)
+
+    def get(self, db: Session, user_id: int) -> int:
+        with self._lock:
+            entry = self._counts.get(user_id)
+        if entry is not None and time.monotonic() - entry[1] < UNREAD_CACHE_TTL_SECONDS:
+            return entry[0]
+        # Rows still buffered in notification_writer are picked up once flushed and the entry expires
+        count = db.query(models.Notification.id).filter(
+            models.Notification.user_id == user_id,
+            models.Notification.is_read == False, # noqa: E712 (SQL expression)
+        ).count()
+        with self._lock:
+            self._counts[user_id] = (count, time.monotonic())
+        return count
+
+    def add(self, user_id: int, delta: int):
+        """Adjusts a cached count; users without a cached count are left to the next read."""
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is not None:
+                self._counts[user_id] = (max(0, entry[0] + delta), entry[1])
+
+    def reset(self, user_id: int, count: int = 0):
+        with self._lock:
+            self._counts[user_id] = (count, time.monotonic())
+
+
+hub = NotificationHub()
+unread_counts = UnreadCountCache()
+
+
+def notify_many(notifications: Iterable[dict]):
+    """
+    Persists notifications in batch and pushes them to connected clients.
+    Each item needs user_id, type and message, and may carry related_entity_id.
+    """
+    now = datetime.datetime.now()
+    for item in notifications:
+        row = {
+            "user_id": item["user_id"],
+            "type": item["type"],
+            "message": item["message"],
+            "related_entity_id": item.get("related_entity_id"),
+            "is_read": False,
+            "created_at": now,
+        }
+        if not notification_writer.submit(row):
+            continue # Buffer saturated; nothing was persisted, so do not push either
+        unread_counts.add(row["user_id"], 1)
+        hub.publish(row["user_id"], {
+            "type": row["type"],
+            "message": row["message"],
+            "related_entity_id": row["related_entity_id"],
+            "created_at": now.isoformat(),
+        })
+
+
+def notify(user_id: int, type: str, message: str, related_entity_id: Optional[int] = None):
+    """Persists and pushes a single notification."""
+    notify_many([{"user_id": user_id, "type": type, "message": message, "related_entity_id": related_entity_id}])
+
+
+def student_user_ids(db: Session, student_profile_ids: Iterable[int]) -> Dict[int, int]:
+    """Maps student profile ids to user ids in one query."""
+    student_profile_ids = list(student_profile_ids)
+    if not student_profile_ids:
+        return {}
+    return dict(db.query(models.StudentProfile.id, models.StudentProfile.user_id).filter(
+        models.StudentProfile.id.in_(student_profile_ids)
+    ).all())
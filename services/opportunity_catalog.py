@@ -0,0 +1,280 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import models
+from database.connection import SessionLocal
+from utils.dataloader import LOAD_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Every worker keeps the open opportunities as compact records (required skill ids plus a
+# parallel mandatory mask), so listing and recommending open postings runs no query.
+# A background thread polls for rows whose updated_at reached the high-water mark and
+# fetches only those, plus the tombstones of postings deleted since; the opportunity
+# handlers push their own changes right away, and a periodic full reload is the safety net.
+# Postings past their application_deadline are hidden at read time, before the deadline
+# scheduler closes them.
+# Like the skill catalog, readers take an immutable snapshot; writers build a new one and swap it.
+
+POLL_SECONDS = float(os.getenv("OPPORTUNITY_CATALOG_POLL_SECONDS", 5))
+# updated_at comes from the writing worker's clock before its commit, so a row can become
+# visible with a timestamp just under the mark. Polls re-read this far back.
+POLL_OVERLAP_SECONDS = float(os.getenv("OPPORTUNITY_CATALOG_POLL_OVERLAP_SECONDS", 30))
+FULL_RELOAD_SECONDS = float(os.getenv("OPPORTUNITY_CATALOG_RELOAD_SECONDS", 600))
+
+
+class OpportunityRecord(NamedTuple):
+    id: int
+    posted_by_user_id: int
+    title: str
+    description: str
+    type: str
+    department: Optional[str]
+    location: Optional[str]
+    start_date: Optional[datetime.date]
+    end_date: Optional[datetime.date]
+    application_deadline: datetime.datetime
+    num_positions: Optional[int]
+    status: str
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    skill_ids: Tuple[int, ...]   # Required skills, ascending
+    mandatory: Tuple[bool, ...]  # is_mandatory of each skill in skill_ids
+
+    def is_live(self, now: datetime.datetime) -> bool:
+        return self.application_deadline is None or self.application_deadline > now
+
+
+_COLUMNS = [getattr(models.Opportunity, name) for name in OpportunityRecord._fields[:-2]]
+
+
+class OpenOpportunitySnapshot:
+    """The open opportunities at one point in time, by id. Never modified after construction."""
+    __slots__ = ("records", "_by_id", "_skills")
+
+    def __init__(self, by_id: Dict[int, OpportunityRecord]):
+        self._by_id = by_id
+        self.records = tuple(by_id[opportunity_id] for opportunity_id in sorted(by_id))
+        self._skills = None # (valid until, {id: skill ids}), derived on first use
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, opportunity_id: int, now: Optional[datetime.datetime] = None) -> Optional[OpportunityRecord]:
+        record = self._by_id.get(opportunity_id)
+        if record is None or not record.is_live(now or datetime.datetime.now()):
+            return None
+        return record
+
+    def live(self, now: Optional[datetime.datetime] = None) -> List[OpportunityRecord]:
+        """The postings still taking applications, by id."""
+        now = now or datetime.datetime.now()
+        return [record for record in self.records if record.is_live(now)]
+
+    def opportunity_skills(self, now: Optional[datetime.datetime] = None) -> Dict[int, frozenset]:
+        """
+        {opportunity_id: required skill ids} of the live postings that have skills, as
+        recommendation_engine.load_open_opportunity_skills returns it. The same dict is
+        returned until the next posting expires, so skill_hierarchy.pack_requirements packs
+        it once. Callers must not modify it.
+        """
+        now = now or datetime.datetime.now()
+        cached = self._skills
+        if cached is not None and now < cached[0]:
+            return cached[1]
+        live = self.live(now)
+        skills = {record.id: frozenset(record.skill_ids) for record in live if record.skill_ids}
+        valid_until = min((r.application_deadline for r in live if r.application_deadline is not None),
+                          default=datetime.datetime.max)
+        self._skills = (valid_until, skills)
+        return skills
+
+
+def _load_skills(db: Session, opportunity_ids: List[int]) -> Dict[int, List[Tuple[int, bool]]]:
+    skills: Dict[int, List[Tuple[int, bool]]] = {}
+    for start in range(0, len(opportunity_ids), LOAD_CHUNK_SIZE):
+        rows = db.query(
+            models.OpportunityRequiredSkill.opportunity_id,
+            models.OpportunityRequiredSkill.skill_id,
+            models.OpportunityRequiredSkill.is_mandatory,
+        ).filter(models.OpportunityRequiredSkill.opportunity_id.in_(opportunity_ids[start:start + LOAD_CHUNK_SIZE])).all()
+        for opportunity_id, skill_id, is_mandatory in rows:
+            skills.setdefault(opportunity_id, []).append((skill_id, is_mandatory is not False))
+    return skills
+
+
+def _record(row, skills: Iterable[Tuple[int, bool]]) -> OpportunityRecord:
+    skills = sorted(skills)
+    return OpportunityRecord(
+        *row, tuple(skill_id for skill_id, _ in skills), tuple(mandatory for _, mandatory in skills)
+    )
+
+
+def _records(db: Session, rows) -> List[OpportunityRecord]:
+    """Records for opportunity rows (selected as _COLUMNS), with one query per chunk for their skills."""
+    skills = _load_skills(db, [row[0] for row in rows if row.status == 'open'])
+    return [_record(tuple(row), skills.get(row[0], ())) for row in rows]
+
+
+class OpportunityCatalog:
+    def __init__(self):
+        self._snapshot: Optional[OpenOpportunitySnapshot] = None
+        self._high_water: Optional[datetime.datetime] = None # Largest updated_at seen
+        self._polled_at = 0.0
+        self._reloaded_at = 0.0
+        self._lock = threading.Lock() # Serializes writers; readers never take it
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def snapshot(self) -> OpenOpportunitySnapshot:
+        """
+        The current snapshot. With the poller running this never touches the database after
+        the first load; without it (scripts), a stale snapshot is refreshed by one caller at a time.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and (self._thread is not None or time.monotonic() - self._polled_at < POLL_SECONDS):
+            return snapshot
+        # Only the very first load makes readers wait
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            self._refresh()
+        finally:
+            self._lock.release()
+        return self._snapshot
+
+    def preload(self, db: Session):
+        with self._lock:
+            self._refresh(db)
+
+    def _refresh(self, db: Optional[Session] = None):
+        # Caller holds the lock. Reads go to the primary: a lagging replica could hide changes.
+        own_session = db is None
+        db = SessionLocal() if own_session else db
+        try:
+            if self._snapshot is None or time.monotonic() - self._reloaded_at >= FULL_RELOAD_SECONDS:
+                self._reload(db)
+            else:
+                self._poll(db)
+            self._polled_at = time.monotonic()
+        finally:
+            if own_session:
+                db.close()
+
+    def _reload(self, db: Session):
+        # Mark first: rows changed while loading are picked up again by the next poll
+        marks = [
+            db.query(func.max(models.Opportunity.updated_at)).scalar(),
+            db.query(func.max(models.OpportunityTombstone.deleted_at)).scalar(),
+        ]
+        high_water = max((mark for mark in marks if mark is not None), default=None)
+        rows = db.query(*_COLUMNS).filter(models.Opportunity.status == 'open').all()
+        by_id = {record.id: record for record in _records(db, rows)}
+        # Nothing missed since the last load: keep the snapshot (shared pages, packed matrix)
+        if self._snapshot is None or by_id != self._snapshot._by_id:
+            self._snapshot = OpenOpportunitySnapshot(by_id)
+        self._high_water = high_water
+        self._reloaded_at = time.monotonic()
+
+    def _poll(self, db: Session):
+        query = db.query(*_COLUMNS)
+        tombstones = db.query(models.OpportunityTombstone.opportunity_id, models.OpportunityTombstone.deleted_at)
+        if self._high_water is not None:
+            since = self._high_water - datetime.timedelta(seconds=POLL_OVERLAP_SECONDS)
+            query = query.filter(models.Opportunity.updated_at >= since)
+            tombstones = tombstones.filter(models.OpportunityTombstone.deleted_at >= since)
+        rows = query.all()
+        tombstones = tombstones.all()
+        if not rows and not tombstones:
+            return
+        # Rows re-read inside the overlap are mostly unchanged; only the rest need their skills
+        current = self._snapshot._by_id
+        changed = [
+            row for row in rows
+            if (row.id in current and current[row.id].updated_at != row.updated_at)
+            or (row.id not in current and row.status == 'open')
+        ]
+        if changed or tombstones:
+            self._apply(_records(db, changed), removed=[opportunity_id for opportunity_id, _ in tombstones])
+        newest = max(
+            [row.updated_at for row in rows if row.updated_at is not None] + [deleted_at for _, deleted_at in tombstones],
+            default=None,
+        )
+        if newest is not None and (self._high_water is None or newest > self._high_water):
+            self._high_water = newest
+
+    def _apply(self, records: Iterable[OpportunityRecord] = (), removed: Iterable[int] = ()):
+        """Swaps in a snapshot with the given records upserted (or dropped once not open). Caller holds the lock."""
+        current = self._snapshot
+        if current is None:
+            return # The first load reads everything anyway
+        by_id = None
+        for opportunity_id in removed:
+            if opportunity_id in current._by_id:
+                by_id = by_id if by_id is not None else dict(current._by_id)
+                by_id.pop(opportunity_id, None)
+        for record in records:
+            existing = (by_id if by_id is not None else current._by_id).get(record.id)
+            if existing == record:
+                continue # Re-read inside the poll overlap; keep the snapshot (and its packed matrix)
+            if existing is not None and record.updated_at is not None and existing.updated_at is not None \
+                    and record.updated_at < existing.updated_at:
+                continue # Older than what a handler already pushed
+            if record.status != 'open' and existing is None:
+                continue
+            by_id = by_id if by_id is not None else dict(current._by_id)
+            if record.status == 'open':
+                by_id[record.id] = record
+            else:
+                del by_id[record.id]
+        if by_id is not None:
+            self._snapshot = OpenOpportunitySnapshot(by_id)
+
+    def upsert(self, opportunity: models.Opportunity):
+        """Applies a committed create/update handled by this process (required_skills loaded)."""
+        record = _record(
+            tuple(getattr(opportunity, column.key) for column in _COLUMNS),
+            [(ors.skill_id, ors.is_mandatory is not False) for ors in opportunity.required_skills],
+        )
+        with self._lock:
+            self._apply([record])
+
+    def remove_many(self, opportunity_ids: Iterable[int]):
+        """Drops opportunities that were closed or deleted by this process."""
+        with self._lock:
+            self._apply(removed=opportunity_ids)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="opportunity-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                with self._lock:
+                    self._refresh()
+            except Exception:
+                logger.exception("Failed to refresh the open opportunity catalog")
+            if self._stop.wait(POLL_SECONDS):
+                return
+
+
+# Process-wide catalog (one per worker)
+opportunity_catalog = OpportunityCatalog()
@@ -0,0 +1,207 @@
+import datetime
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import models
+from services.analytics_rollups import popularity_priors
+from services.skill_hierarchy import skill_hierarchy, match_scores
+
+# --- Cognitive Navigator thresholds ---
+MATCH_THRESHOLD = 70          # Recommend outright at this match score
+GROWTH_MIN_SCORE = 50         # Growth opportunities need at least this match score...
+GROWTH_MAX_MISSING = 3        # ...and at most this many missing skills
+
+# Ranking boost, in match-score points, for the most viewed opportunity of the candidate set
+POPULARITY_WEIGHT = float(os.getenv("RECOMMENDATIONS_POPULARITY_WEIGHT", 10))
+POPULARITY_WINDOW_DAYS = 7
+
+RECOMMENDATIONS_TOP_N = int(os.getenv("RECOMMENDATIONS_TOP_N", 20))
+# Students whose last materialized run is older than this are recomputed live
+RECOMMENDATIONS_MAX_AGE_HOURS = float(os.getenv("RECOMMENDATIONS_MAX_AGE_HOURS", 24))
+
+
+class OpportunityScore(NamedTuple):
+    opportunity_id: int
+    match_score: float
+    missing_skill_ids: Tuple[int, ...]
+    growth_skill_id: Optional[int] # Missing skill that has learning resources, if any
+
+
+def score_opportunity(
+    student_skill_ids: Set[int],
+    opportunity_id: int,
+    required_skill_ids: Iterable[int],
+    skills_with_resources: Set[int],
+    credits=None,
+) -> Optional[OpportunityScore]:
+    """
+    Scores one opportunity for a student. Returns None when it should not be recommended.
+    Pure function over ids so it can run in the API, batch workers and incremental updates alike.
+    credits (skill_id -> 0..1, e.g. from skill_hierarchy.credits) gives partial credit for
+    missing skills that are close to held ones in the skill hierarchy.
+    """
+    required = set(required_skill_ids)
+    if not required:
+        return None
+
+    missing = tuple(sorted(required - student_skill_ids))
+    earned = len(required) - len(missing)
+    if credits is not None:
+        earned += sum(credits.get(skill_id, 0.0) for skill_id in missing)
+    match_score = round(earned / len(required) * 100, 2)
+
+    # "Growth Zone": a near match whose gaps can be closed with existing learning resources
+    growth_skill_id = None
+    if 0 < len(missing) <= GROWTH_MAX_MISSING and match_score >= GROWTH_MIN_SCORE:
+        growth_skill_id = next((s for s in missing if s in skills_with_resources), None)
+
+    if match_score >= MATCH_THRESHOLD or growth_skill_id is not None:
+        return OpportunityScore(opportunity_id, match_score, missing, growth_skill_id)
+    return None
+
+
+def rank_opportunities(
+    db: Session,
+    student_skill_ids: Set[int],
+    opportunity_skills: Dict[int, frozenset],
+    skills_with_resources: Set[int],
+    top_n: Optional[int] = RECOMMENDATIONS_TOP_N,
+) -> List[OpportunityScore]:
+    """
+    Scores every opportunity and returns the recommended ones, best first.
+    Hierarchy-weighted scores for all opportunities are computed in one vectorized pass;
+    only those that can still be recommended go through score_opportunity.
+    """
+    credits = skill_hierarchy.credits(db, student_skill_ids)
+    matrix = skill_hierarchy.pack_requirements(opportunity_skills)
+    # Nothing under GROWTH_MIN_SCORE is recommended (small margin for float rounding)
+    candidates = matrix.opportunity_ids[match_scores(matrix, credits) >= GROWTH_MIN_SCORE - 1e-6]
+
+    scores = []
+    for opportunity_id in candidates.tolist():
+        score = score_opportunity(
+            student_skill_ids, opportunity_id, opportunity_skills[opportunity_id], skills_with_resources, credits
+        )
+        if score is not None:
+            scores.append(score)
+    scores.sort(key=lambda s: (-s.match_score, s.opportunity_id))
+    return scores[:top_n] if top_n else scores
+
+
+def apply_popularity_priors(db: Session, scores: List[OpportunityScore], top_n: Optional[int] = RECOMMENDATIONS_TOP_N) -> List[OpportunityScore]:
+    """
+    Re-ranks scores by match score plus a popularity prior from the daily view rollups,
+    so among similar matches the opportunities other students engage with come first.
+    The reported match_score is left unchanged.
+    """
+    if not scores or POPULARITY_WEIGHT <= 0:
+        return scores[:top_n] if top_n else scores
+    priors = popularity_priors(db, "opportunity", [s.opportunity_id for s in scores], days=POPULARITY_WINDOW_DAYS)
+    ranked = sorted(scores, key=lambda s: (-(s.match_score + POPULARITY_WEIGHT * priors.get(s.opportunity_id, 0.0)), s.opportunity_id))
+    return ranked[:top_n] if top_n else ranked
+
+
+def build_ai_reason(score: OpportunityScore, skill_names: Dict[int, str]) -> str:
+    """Human-readable explanation for a recommendation."""
+    if score.growth_skill_id is not None:
+        name = skill_names.get(score.growth_skill_id, "").lower()
+        return f"Recommended for growth in skills like '{name}' which are crucial for this role."
+    return "Based on your current skills."
+
+
+def load_open_opportunity_skills(db: Session) -> Dict[int, frozenset]:
+    """Maps each open opportunity id to its required skill ids, without loading ORM objects."""
+    rows = db.query(
+        models.OpportunityRequiredSkill.opportunity_id,
+        models.OpportunityRequiredSkill.skill_id,
+    ).join(
+        models.Opportunity, models.Opportunity.id == models.OpportunityRequiredSkill.opportunity_id
+    ).filter(models.Opportunity.status == 'open').all()
+
+    grouped: Dict[int, Set[int]] = {}
+    for opportunity_id, skill_id in rows:
+        grouped.setdefault(opportunity_id, set()).add(skill_id)
+    return {opportunity_id: frozenset(skill_ids) for opportunity_id, skill_ids in grouped.items()}
+
+
+def load_student_skill_ids(db: Session, student_profile_ids: Iterable[int]) -> Dict[int, Set[int]]:
+    """Maps each student profile id to the skill ids they hold."""
+    student_profile_ids = list(student_profile_ids)
+    skills: Dict[int, Set[int]] = {student_id: set() for student_id in student_profile_ids}
+    if not student_profile_ids:
+        return skills
+    rows = db.query(models.StudentSkill.student_profile_id, models.StudentSkill.skill_id).filter(
+        models.StudentSkill.student_profile_id.in_(student_profile_ids)
+    ).all()
+    for student_id, skill_id in rows:
+        skills[student_id].add(skill_id)
+    return skills
+
+
+def store_recommendations(db: Session, scores_by_student: Dict[int, List[OpportunityScore]]):
+    """
+    Replaces the materialized recommendations of the given students with one DELETE
+    and one multi-row INSERT, and records the run (also for students with no
+    recommendations, so they aren't ranked live on every request). The caller commits.
+    """
+    if not scores_by_student:
+        return
+    student_ids = list(scores_by_student)
+    table = models.StudentRecommendation.__table__
+    db.execute(table.delete().where(table.c.student_profile_id.in_(student_ids)))
+    runs = models.StudentRecommendationRun.__table__
+    db.execute(runs.delete().where(runs.c.student_profile_id.in_(student_ids)))
+
+    now = datetime.datetime.now()
+    db.execute(runs.insert(), [{"student_profile_id": student_id, "computed_at": now} for student_id in student_ids])
+    insert_scores(db, [(student_id, score) for student_id, scores in scores_by_student.items() for score in scores])
+
+
+def insert_scores(db: Session, scored: List[Tuple[int, OpportunityScore]]):
+    """Writes (student_profile_id, score) pairs as materialized rows in one multi-row INSERT."""
+    if not scored:
+        return
+    now = datetime.datetime.now()
+    db.execute(models.StudentRecommendation.__table__.insert(), [
+        {
+            "student_profile_id": student_id,
+            "opportunity_id": score.opportunity_id,
+            "match_score": score.match_score,
+            "missing_skill_ids": list(score.missing_skill_ids),
+            "growth_skill_id": score.growth_skill_id,
+            "computed_at": now,
+        }
+        for student_id, score in scored
+    ])
+
+
+def load_materialized(db: Session, student_profile_id: int) -> Optional[List[OpportunityScore]]:
+    """
+    Returns all of the student's precomputed recommendations, best first (an empty list
+    when the last run found none), or None if they were never computed or the run is older
+    than RECOMMENDATIONS_MAX_AGE_HOURS. Like rank_opportunities(top_n=None) on the live
+    path, nothing is cut here: apply_popularity_priors re-ranks and cuts for both.
+    """
+    computed_at = db.query(models.StudentRecommendationRun.computed_at).filter(
+        models.StudentRecommendationRun.student_profile_id == student_profile_id
+    ).scalar()
+    cutoff = datetime.datetime.now() - datetime.timedelta(hours=RECOMMENDATIONS_MAX_AGE_HOURS)
+    if computed_at is None or computed_at < cutoff:
+        return None
+
+    rows = db.query(models.StudentRecommendation).filter(
+        models.StudentRecommendation.student_profile_id == student_profile_id
+    ).all()
+    scores = [
+        OpportunityScore(
+            row.opportunity_id,
+            float(row.match_score),
+            tuple(row.missing_skill_ids or ()),
+            row.growth_skill_id,
+        )
+        for row in rows
+    ]
+    scores.sort(key=lambda s: (-s.match_score, s.opportunity_id))
+    return scores
@@ -0,0 +1,250 @@
+import datetime
+import hashlib
+import logging
+import os
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, Optional, Set, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from database import models
+from database.connection import SessionLocal
+from services.incremental_recommendations import incremental_engine
+from services.nlp_service import extract_skills_from_chunks, extraction_cache
+from services.student_skills import add_skills_to_profile
+
+logger = logging.getLogger(__name__)
+
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", 20 * 1024 * 1024))
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", 2))
+# A job left 'processing' this long (its worker died mid-job) is queued again on the next start
+RESUME_LEASE_SECONDS = int(os.getenv("RESUME_LEASE_SECONDS", 15 * 60))
+ALLOWED_EXTENSIONS = {".pdf", ".docx", ".txt"}
+MEDIA_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".txt": "text/plain; charset=utf-8",
+}
+
+# Uploads are stored as resume_file_chunks rows of this size (the column holds up to 1 MB)
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Extracted text is handed to the NLP pipeline in pieces of about this many characters
+TEXT_CHUNK_CHARS = 64 * 1024
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class ResumeTooLarge(Exception):
+    pass
+
+
+def save_upload(db: Session, job_id: int, source: BinaryIO) -> Tuple[int, str]:
+    """
+    Stores an uploaded file as the job's resume_file_chunks rows, one chunk at a time, so
+    any API host or worker can read it back. Returns (size, sha256 hex digest).
+    Raises ResumeTooLarge past RESUME_MAX_BYTES; the caller rolls back and commits otherwise.
+    """
+    table = models.ResumeFileChunk.__table__
+    digest = hashlib.sha256()
+    size = 0
+    seq = 0
+    while True:
+        chunk = source.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > RESUME_MAX_BYTES:
+            raise ResumeTooLarge()
+        digest.update(chunk)
+        db.execute(table.insert(), {"job_id": job_id, "seq": seq, "data": chunk})
+        seq += 1
+    return size, digest.hexdigest()
+
+
+def iter_file_chunks(db: Session, job_id: int) -> Iterator[bytes]:
+    """The stored bytes of a job's upload, one chunk per query."""
+    seq = 0
+    while True:
+        data = db.query(models.ResumeFileChunk.data).filter(
+            models.ResumeFileChunk.job_id == job_id,
+            models.ResumeFileChunk.seq == seq,
+        ).scalar()
+        if data is None:
+            return
+        yield data
+        seq += 1
+
+
+def delete_files(db: Session, job_ids: Iterable[int]):
+    """Drops the stored uploads of the given jobs (their status rows stay). The caller commits."""
+    job_ids = list(job_ids)
+    if job_ids:
+        table = models.ResumeFileChunk.__table__
+        db.execute(table.delete().where(table.c.job_id.in_(job_ids)))
+
+
+def iter_text(path: str) -> Iterator[str]:
+    """Yields the text of a resume file piece by piece, without reading the whole file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pdf":
+        return _iter_pdf_text(path)
+    if extension == ".docx":
+        return _iter_docx_text(path)
+    return _iter_plain_text(path)
+
+
+def _iter_plain_text(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(TEXT_CHUNK_CHARS)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _iter_pdf_text(path: str) -> Iterator[str]:
+    from pypdf import PdfReader # Only needed by the resume worker
+    # Pages are parsed on demand from the open file, one at a time
+    for page in PdfReader(path).pages:
+        text = page.extract_text()
+        if text:
+            yield text + "\n"
+
+
+def _iter_docx_text(path: str) -> Iterator[str]:
+    # Stream word/document.xml out of the zip and drop each element once its text is taken
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as document:
+        parts, length = [], 0
+        for _, element in ET.iterparse(document, events=("end",)):
+            if element.tag == WORD_NAMESPACE + "t" and element.text:
+                parts.append(element.text)
+                length += len(element.text)
+            elif element.tag == WORD_NAMESPACE + "p":
+                parts.append("\n")
+                length += 1
+                element.clear()
+            if length >= TEXT_CHUNK_CHARS:
+                yield "".join(parts)
+                parts, length = [], 0
+        if parts:
+            yield "".join(parts)
+
+
+class ResumeWorker:
+    """
+    Runs skill extraction for uploaded resumes on a small thread pool.
+    Jobs live in resume_jobs; a worker claims a job by moving it from 'queued' to
+    'processing', so a job is processed once even if several processes pick it up.
+    A claim is a lease: jobs still 'processing' RESUME_LEASE_SECONDS after they were
+    claimed belong to a worker that died, and are queued again when a worker starts.
+    """
+
+    def __init__(self, workers: int = RESUME_WORKERS):
+        self._workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[Future] = set()
+
+    def start(self):
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="resume-worker")
+        # Pick up jobs queued before a restart, and those whose lease ran out
+        db = SessionLocal()
+        try:
+            expired = datetime.datetime.now() - datetime.timedelta(seconds=RESUME_LEASE_SECONDS)
+            reclaimed = db.query(models.ResumeJob).filter(
+                models.ResumeJob.status == 'processing',
+                or_(models.ResumeJob.started_at.is_(None), models.ResumeJob.started_at < expired),
+            ).update({models.ResumeJob.status: 'queued'}, synchronize_session=False)
+            db.commit()
+            if reclaimed:
+                logger.warning("Re-queued %d resume jobs left processing for over %d seconds", reclaimed, RESUME_LEASE_SECONDS)
+            queued = [row[0] for row in db.query(models.ResumeJob.id).filter(models.ResumeJob.status == 'queued').all()]
+        finally:
+            db.close()
+        for job_id in queued:
+            self._submit(job_id)
+
+    def stop(self):
+        if self._executor is None:
+            return
+        # Running jobs finish; jobs still waiting stay 'queued' for the next start
+        for future in list(self._pending):
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def submit(self, job_id: int):
+        if self._executor is None:
+            self.start()
+        self._submit(job_id)
+
+    def _submit(self, job_id: int):
+        future = self._executor.submit(self._process, job_id)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def _process(self, job_id: int):
+        db = SessionLocal()
+        try:
+            claimed = db.query(models.ResumeJob).filter(
+                models.ResumeJob.id == job_id,
+                models.ResumeJob.status == 'queued',
+            ).update({
+                models.ResumeJob.status: 'processing',
+                models.ResumeJob.started_at: datetime.datetime.now(),
+            }, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                return
+
+            job = db.query(models.ResumeJob).filter(models.ResumeJob.id == job_id).first()
+            student_profile = db.query(models.StudentProfile).filter(models.StudentProfile.id == job.student_profile_id).first()
+            try:
+                # Re-uploads of the same file hit the cache
+                cache_key = "file:" + job.content_hash
+                skill_names = extraction_cache.get(cache_key)
+                if skill_names is None:
+                    skill_names = self._extract(db, job)
+                    extraction_cache.put(cache_key, skill_names)
+                _, new_skill_ids = add_skills_to_profile(db, student_profile, skill_names, inferred_from="resume_upload")
+            except Exception as e:
+                db.rollback()
+                logger.exception("Resume job %d failed", job_id)
+                job.status = 'failed'
+                job.error = str(e)[:1000]
+                job.finished_at = datetime.datetime.now()
+                db.commit()
+                return
+
+            job.status = 'completed'
+            job.extracted_skills = skill_names
+            job.finished_at = datetime.datetime.now()
+            db.commit()
+            if new_skill_ids:
+                incremental_engine.student_skills_added(student_profile.id, new_skill_ids)
+        except Exception:
+            db.rollback()
+            logger.exception("Resume job %d could not be processed", job_id)
+        finally:
+            db.close()
+
+    def _extract(self, db, job: models.ResumeJob):
+        # PDF and DOCX readers need a seekable file: copy the stored chunks to a local temp file
+        extension = os.path.splitext(job.original_filename or "")[1].lower()
+        fd, path = tempfile.mkstemp(suffix=extension, prefix="resume-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter_file_chunks(db, job.id):
+                    out.write(chunk)
+            return [s['name'] for s in extract_skills_from_chunks(iter_text(path))]
+        finally:
+            os.remove(path)
+
+
+# Process-wide worker, started with the app
+resume_worker = ResumeWorker()
@@ -0,0 +1,330 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from database import models
+from database.connection import SessionLocal, replica_pool
+from services.opportunity_catalog import opportunity_catalog
+from utils.prefork import map_arrays, rows_digest
+
+logger = logging.getLogger(__name__)
+
+# Cohort skill analytics over a columnar snapshot of student_skills: the matrix is kept
+# as parallel (student row, skill column, proficiency code) arrays next to per-student
+# department/major codes, so a group-by is a mask plus np.bincount instead of a join.
+# The first request builds the snapshot (two column-only queries); after that a background
+# thread rebuilds it every ANALYTICS_TTL_SECONDS, so requests don't pay for it. Like the
+# catalogs, readers keep using the previous snapshot while a rebuild runs.
+
+ANALYTICS_TTL_SECONDS = float(os.getenv("SKILL_ANALYTICS_TTL_SECONDS", 300))
+
+PROFICIENCY_CODES = {"beginner": 1, "intermediate": 2, "advanced": 3, "expert": 4} # 0 = not recorded
+GROUP_COLUMNS = ("department", "major")
+UNKNOWN_GROUP = 0 # Group code of students without a department/major
+
+
+class _Categories(NamedTuple):
+    """A dictionary-encoded string column: codes index labels, shifted by one (0 = missing)."""
+    labels: Tuple[Optional[str], ...] # labels[0] is None
+    codes: np.ndarray                 # int32 per student
+
+    def code(self, value: str) -> Optional[int]:
+        try:
+            return self.labels.index(value, 1)
+        except ValueError:
+            return None
+
+
+def _categories(values: List[Optional[str]]) -> _Categories:
+    labels = (None,) + tuple(sorted({value for value in values if value is not None}))
+    lookup = {label: code for code, label in enumerate(labels)}
+    return _Categories(labels, np.fromiter((lookup[value] for value in values), dtype=np.int32, count=len(values)))
+
+
+class SkillCount(NamedTuple):
+    skill_id: int
+    holders: int
+    students: int # Students in the group/cohort the holders are counted in
+
+
+class GroupCounts(NamedTuple):
+    group: Optional[str]
+    students: int
+    skills: List[SkillCount]
+
+
+class SkillGap(NamedTuple):
+    skill_id: int
+    open_postings: int
+    mandatory_postings: int
+    holders: int
+    students: int
+    gap_score: float
+
+
+class SkillMatrixSnapshot:
+    """Students x skills at one point in time. Never modified after construction."""
+    __slots__ = ("built_at", "student_ids", "groups", "skill_ids", "rows", "cols", "levels")
+
+    def __init__(self, student_ids: np.ndarray, groups: Dict[str, _Categories],
+                 skill_ids: np.ndarray, rows: np.ndarray, cols: np.ndarray, levels: np.ndarray):
+        self.built_at = datetime.datetime.now()
+        self.student_ids = student_ids # int64, ascending; a student's row is its position
+        self.groups = groups           # column name -> categories
+        self.skill_ids = skill_ids     # int64, ascending; a skill's column is its position
+        self.rows = rows               # int32 student row of each held skill
+        self.cols = cols               # int32 skill column of each held skill
+        self.levels = levels           # int8 proficiency code of each held skill
+
+    @staticmethod
+    def query(db: Session) -> Tuple[list, list]:
+        """The (profiles, entries) rows a snapshot is built from."""
+        profiles = db.query(
+            models.StudentProfile.id, models.StudentProfile.department, models.StudentProfile.major
+        ).order_by(models.StudentProfile.id).all()
+        entries = db.query(
+            models.StudentSkill.student_profile_id, models.StudentSkill.skill_id, models.StudentSkill.proficiency_level
+        ).all()
+        return profiles, entries
+
+    @classmethod
+    def from_rows(cls, profiles: list, entries: list) -> "SkillMatrixSnapshot":
+        student_ids = np.fromiter((p[0] for p in profiles), dtype=np.int64, count=len(profiles))
+        groups = {name: _categories([p[i + 1] for p in profiles]) for i, name in enumerate(GROUP_COLUMNS)}
+        entry_students = np.fromiter((e[0] for e in entries), dtype=np.int64, count=len(entries))
+        entry_skills = np.fromiter((e[1] for e in entries), dtype=np.int64, count=len(entries))
+        levels = np.fromiter((PROFICIENCY_CODES.get(e[2], 0) for e in entries), dtype=np.int8, count=len(entries))
+
+        # Skills of profiles deleted between the two queries are dropped
+        rows = np.searchsorted(student_ids, entry_students)
+        known = rows < len(student_ids)
+        known[known] = student_ids[rows[known]] == entry_students[known]
+        skill_ids, cols = np.unique(entry_skills[known], return_inverse=True)
+        return cls(student_ids, groups, skill_ids, rows[known].astype(np.int32),
+                   cols.astype(np.int32), levels[known])
+
+    def rechecked(self) -> "SkillMatrixSnapshot":
+        """The same matrix (arrays shared, not copied), stamped as current now."""
+        return SkillMatrixSnapshot(self.student_ids, self.groups, self.skill_ids, self.rows, self.cols, self.levels)
+
+    def mapped(self, directory: str) -> "SkillMatrixSnapshot":
+        """The same matrix with every array moved into a read-only memory-mapped file."""
+        arrays = map_arrays(directory, "skill_analytics", dict(
+            student_ids=self.student_ids, skill_ids=self.skill_ids, rows=self.rows, cols=self.cols, levels=self.levels,
+            **{f"{name}_codes": categories.codes for name, categories in self.groups.items()},
+        ))
+        groups = {name: categories._replace(codes=arrays[f"{name}_codes"]) for name, categories in self.groups.items()}
+        snapshot = SkillMatrixSnapshot(arrays["student_ids"], groups, arrays["skill_ids"],
+                                       arrays["rows"], arrays["cols"], arrays["levels"])
+        snapshot.built_at = self.built_at
+        return snapshot
+
+    def cohort(self, department: Optional[str] = None, major: Optional[str] = None) -> Optional[np.ndarray]:
+        """Boolean mask of the students in the cohort, or None when a filter value is unknown."""
+        mask = np.ones(len(self.student_ids), dtype=bool)
+        for name, value in (("department", department), ("major", major)):
+            if value is not None:
+                code = self.groups[name].code(value)
+                if code is None:
+                    return None
+                mask &= self.groups[name].codes == code
+        return mask
+
+    def _entries(self, cohort: np.ndarray, min_level: int) -> np.ndarray:
+        mask = cohort[self.rows]
+        if min_level:
+            mask &= self.levels >= min_level
+        return mask
+
+    def holders_by_skill(self, cohort: np.ndarray, min_level: int = 0) -> np.ndarray:
+        """Number of cohort students holding each skill column (at min_level or above)."""
+        return np.bincount(self.cols[self._entries(cohort, min_level)], minlength=len(self.skill_ids))
+
+    def group_counts(self, skill_ids: List[int], group_by: Optional[str], cohort: np.ndarray,
+                     min_level: int = 0) -> List[GroupCounts]:
+        """Students and holders of each given skill per department/major (or overall), in one bincount."""
+        cols = np.searchsorted(self.skill_ids, skill_ids)
+        present = cols < len(self.skill_ids)
+        present[present] = self.skill_ids[cols[present]] == np.asarray(skill_ids)[present]
+        # Skill column -> position in skill_ids (-1 when not asked for)
+        wanted = np.full(len(self.skill_ids), -1, dtype=np.int64)
+        wanted[cols[present]] = np.flatnonzero(present)
+
+        if group_by is None:
+            labels: Tuple[Optional[str], ...] = (None,)
+            student_groups = np.zeros(len(self.student_ids), dtype=np.int32)
+        else:
+            labels = self.groups[group_by].labels
+            student_groups = self.groups[group_by].codes
+
+        entries = self._entries(cohort, min_level)
+        entries &= wanted[self.cols] >= 0
+        keys = student_groups[self.rows[entries]].astype(np.int64) * len(skill_ids) + wanted[self.cols[entries]]
+        holders = np.bincount(keys, minlength=len(labels) * len(skill_ids)).reshape(len(labels), len(skill_ids))
+        students = np.bincount(student_groups[cohort], minlength=len(labels))
+
+        results = []
+        for code in np.flatnonzero(students).tolist():
+            if group_by is not None and code == UNKNOWN_GROUP and not holders[code].any():
+                continue # Students without a department/major only show up when they hold something
+            results.append(GroupCounts(labels[code], int(students[code]), [
+                SkillCount(skill_id, int(count), int(students[code]))
+                for skill_id, count in zip(skill_ids, holders[code].tolist())
+            ]))
+        return results
+
+    def top_skills(self, cohort: np.ndarray, limit: int, min_level: int = 0) -> List[SkillCount]:
+        """The skills held by most cohort students."""
+        holders = self.holders_by_skill(cohort, min_level)
+        students = int(cohort.sum())
+        top = np.flatnonzero(holders)
+        if len(top) > limit:
+            top = top[np.argpartition(-holders[top], limit - 1)[:limit]]
+        top = top[np.lexsort((self.skill_ids[top], -holders[top]))]
+        return [SkillCount(int(self.skill_ids[col]), int(holders[col]), students) for col in top.tolist()]
+
+    def gaps(self, cohort: np.ndarray, demand: Tuple[np.ndarray, np.ndarray, np.ndarray], limit: int,
+             min_level: int = 0) -> List[SkillGap]:
+        """
+        Demanded skills the cohort lacks, ranked by gap score: open postings requiring the
+        skill times the share of cohort students who don't hold it.
+        """
+        demand_ids, postings, mandatory = demand
+        if not len(demand_ids):
+            return []
+        holders_by_col = self.holders_by_skill(cohort, min_level)
+        cols = np.searchsorted(self.skill_ids, demand_ids)
+        present = cols < len(self.skill_ids)
+        present[present] = self.skill_ids[cols[present]] == demand_ids[present]
+        holders = np.zeros(len(demand_ids), dtype=np.int64)
+        holders[present] = holders_by_col[cols[present]]
+
+        students = int(cohort.sum())
+        coverage = holders / students if students else np.zeros(len(demand_ids))
+        scores = postings * (1 - coverage)
+        order = np.lexsort((demand_ids, -postings, -scores))[:limit]
+        return [
+            SkillGap(int(demand_ids[i]), int(postings[i]), int(mandatory[i]), int(holders[i]), students,
+                     round(float(scores[i]), 2))
+            for i in order.tolist() if scores[i] > 0
+        ]
+
+
+def open_posting_demand(department: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (skill ids, open postings requiring each, of which mandatory) over the live postings of
+    the opportunity catalog, optionally only those of one department.
+    """
+    records = [r for r in opportunity_catalog.snapshot().live() if department is None or r.department == department]
+    total = sum(len(r.skill_ids) for r in records)
+    skill_ids = np.fromiter((s for r in records for s in r.skill_ids), dtype=np.int64, count=total)
+    mandatory = np.fromiter((m for r in records for m in r.mandatory), dtype=bool, count=total)
+    demand_ids, inverse = np.unique(skill_ids, return_inverse=True)
+    postings = np.bincount(inverse, minlength=len(demand_ids))
+    return demand_ids, postings, np.bincount(inverse, weights=mandatory, minlength=len(demand_ids)).astype(np.int64)
+
+
+class SkillAnalytics:
+    def __init__(self):
+        self._snapshot: Optional[SkillMatrixSnapshot] = None
+        self._loaded_at = 0.0
+        self._digest: Optional[int] = None # rows_digest of the rows the snapshot was built from
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def snapshot(self, db: Session) -> SkillMatrixSnapshot:
+        """
+        The current snapshot. With the background thread running, requests only ever build
+        it when there is none yet; without it (scripts), a stale snapshot is rebuilt by one
+        caller at a time while the others keep reading.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and (self._thread is not None or time.monotonic() - self._loaded_at < ANALYTICS_TTL_SECONDS):
+            return snapshot
+        # Only the very first load makes readers wait
+        if not self._refresh_lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if self._snapshot is snapshot: # Not already rebuilt while this caller waited
+                self._load(db)
+        finally:
+            self._refresh_lock.release()
+        return self._snapshot
+
+    def preload(self, db: Session):
+        self.snapshot(db)
+
+    def share_arrays(self, directory: str):
+        """
+        Moves the snapshot's arrays into read-only memory-mapped .npy files, so processes
+        forked afterwards map one copy of the pages. Rebuilds only replace them when the
+        student skills actually changed.
+        """
+        with self._refresh_lock:
+            if self._snapshot is not None:
+                self._snapshot = self._snapshot.mapped(directory)
+
+    def _load(self, db: Session):
+        # Caller holds the refresh lock
+        profiles, entries = SkillMatrixSnapshot.query(db)
+        digest = rows_digest(profiles, entries)
+        if self._snapshot is not None and digest == self._digest:
+            self._snapshot = self._snapshot.rechecked() # Same rows: keep the current (shared) arrays
+        else:
+            self._snapshot = SkillMatrixSnapshot.from_rows(profiles, entries)
+            self._digest = digest
+        self._loaded_at = time.monotonic()
+
+    def _rebuild(self):
+        # Long column scans: use a read replica when there is one
+        replica = replica_pool.pick()
+        db = SessionLocal(bind=replica) if replica is not None else SessionLocal()
+        try:
+            with self._refresh_lock:
+                self._load(db)
+        finally:
+            db.close()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="skill-analytics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            # The first snapshot is built by the first request (or preload), so workers that
+            # never serve analytics don't hold one; after that it is rebuilt here when due
+            if self._snapshot is None:
+                due = ANALYTICS_TTL_SECONDS
+            else:
+                due = max(self._loaded_at + ANALYTICS_TTL_SECONDS - time.monotonic(), 0)
+            if self._stop.wait(due):
+                return
+            if self._snapshot is None or time.monotonic() - self._loaded_at < ANALYTICS_TTL_SECONDS:
+                continue
+            try:
+                self._rebuild()
+            except Exception:
+                logger.exception("Failed to rebuild the skill analytics snapshot")
+                if self._stop.wait(ANALYTICS_TTL_SECONDS):
+                    return
+
+
+# Process-wide analytics snapshot (one per worker)
+skill_analytics = SkillAnalytics()
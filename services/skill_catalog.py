@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import models
+from database.counters import increment_counters
+from utils.dataloader import loaders_for
+
+# Every worker keeps the whole skills table as an immutable snapshot. Readers take the
+# current snapshot without locking; a refresh builds a new one and swaps the reference.
+# The snapshot is replaced when the 'skills' row of catalog_versions moves past its version,
+# which is checked at most every CATALOG_CHECK_SECONDS. Anything that writes skills must
+# call bump_skills_version in the same transaction.
+
+CATALOG_CHECK_SECONDS = float(os.getenv("SKILL_CATALOG_CHECK_SECONDS", 2))
+SKILLS_VERSION = "skills"
+
+
+class SkillRecord(NamedTuple):
+    id: int
+    name: str
+    category: Optional[str]
+    parent_skill_id: Optional[int]
+
+
+class SkillCatalogSnapshot:
+    """All skills at one catalog version. Never modified after construction."""
+    __slots__ = ("version", "records", "_by_id", "_by_name")
+
+    def __init__(self, version: int, records: Tuple[SkillRecord, ...]):
+        self.version = version
+        self.records = records
+        self._by_id = {record.id: record for record in records}
+        # Names compare case-insensitively, like the MySQL collation of skills.name
+        self._by_name = {record.name.lower(): record for record in records}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, skill_id: int) -> bool:
+        return skill_id in self._by_id
+
+    def get(self, skill_id: int) -> Optional[SkillRecord]:
+        return self._by_id.get(skill_id)
+
+    def by_name(self, name: str) -> Optional[SkillRecord]:
+        return self._by_name.get(name.lower())
+
+
+def skills_version(db: Session) -> int:
+    return db.query(models.CatalogVersion.version).filter(models.CatalogVersion.name == SKILLS_VERSION).scalar() or 0
+
+
+def bump_skills_version(db: Session):
+    """
+    Marks the skills table as changed, in the caller's transaction. After committing, call
+    skill_catalog.invalidate() so this process picks the change up immediately.
+    """
+    increment_counters(db, models.CatalogVersion.__table__, ("name",), {(SKILLS_VERSION,): 1}, count_column="version")
+
+
+class SkillCatalog:
+    def __init__(self):
+        self._snapshot: Optional[SkillCatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def snapshot(self, db: Session) -> SkillCatalogSnapshot:
+        """The current snapshot. At most one caller at a time checks the version; others keep reading."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < CATALOG_CHECK_SECONDS:
+            return snapshot
+        # Only the very first load makes readers wait
+        if not self._refresh_lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            self._refresh(db)
+        finally:
+            self._refresh_lock.release()
+        return self._snapshot
+
+    def _refresh(self, db: Session):
+        # Version first: rows read afterwards are at least that new
+        version = skills_version(db)
+        # Only forward: a lagging read replica must not swap an older catalog back in
+        if self._snapshot is None or version > self._snapshot.version:
+            rows = db.query(
+                models.Skill.id, models.Skill.name, models.Skill.category, models.Skill.parent_skill_id
+            ).order_by(models.Skill.id).all()
+            self._snapshot = SkillCatalogSnapshot(version, tuple(SkillRecord(*row) for row in rows))
+        self._checked_at = time.monotonic()
+
+    def invalidate(self):
+        """Makes the next reader check the version (after a skill change in this process)."""
+        self._checked_at = 0.0
+
+    def preload(self, db: Session):
+        self.snapshot(db)
+
+    def skills_by_id(self, db: Session, skill_ids: Iterable[int]) -> Dict[int, SkillRecord]:
+        """
+        Looks skills up in the snapshot. Ids it doesn't know yet (created on another worker
+        since the last check) go through the request's skill loader: one query for all of them.
+        Missing ids are left out.
+        """
+        snapshot = self.snapshot(db)
+        found, unknown = {}, []
+        for skill_id in skill_ids:
+            record = snapshot.get(skill_id)
+            if record is not None:
+                found[skill_id] = record
+            else:
+                unknown.append(skill_id)
+        if unknown:
+            found.update(loaders_for(db).skills.load_many(unknown))
+        return found
+
+
+# Process-wide catalog (one per worker)
+skill_catalog = SkillCatalog()
@@ -0,0 +1,343 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from database import models
+from utils.prefork import map_arrays, rows_digest
+
+logger = logging.getLogger(__name__)
+
+# Partial credit toward a required skill, one level apart. A more specific skill
+# (django for "backend development") counts for more than a broader one (python for flask).
+DESCENDANT_CREDIT = float(os.getenv("SKILL_HIERARCHY_DESCENDANT_CREDIT", 0.8))
+ANCESTOR_CREDIT = float(os.getenv("SKILL_HIERARCHY_ANCESTOR_CREDIT", 0.4))
+# Each further level multiplies the credit by this
+DEPTH_DECAY = float(os.getenv("SKILL_HIERARCHY_DEPTH_DECAY", 0.5))
+# Deeper chains are cut off here
+MAX_DEPTH = 32
+
+# Safety net for skills created through other worker processes; writers in this
+# process call skills_changed instead.
+HIERARCHY_TTL_SECONDS = int(os.getenv("SKILL_HIERARCHY_TTL_SECONDS", 300))
+
+
+class _Closure(NamedTuple):
+    """Transitive closure of the parent links in CSR form, indexed by skill row."""
+    parents: np.ndarray         # int32 parent row per skill row, -1 for roots
+    anc_indptr: np.ndarray      # row r's ancestors are anc_rows[anc_indptr[r]:anc_indptr[r + 1]]
+    anc_rows: np.ndarray
+    anc_depth: np.ndarray       # levels between the skill and each ancestor (1 = parent)
+    desc_indptr: np.ndarray     # same layout for descendants
+    desc_rows: np.ndarray
+    desc_depth: np.ndarray
+
+
+class RequirementMatrix(NamedTuple):
+    """Required skills of many opportunities packed as CSR rows over skill rows."""
+    opportunity_ids: np.ndarray
+    indptr: np.ndarray
+    skill_rows: np.ndarray
+    sizes: np.ndarray
+
+
+def _find_cycles(parents: np.ndarray) -> List[List[int]]:
+    """The parent cycles among the rows (bad data), each as its rows in parent order."""
+    parent_of = parents.tolist()
+    state = [0] * len(parent_of) # 0 = not seen, 1 = on the current path, 2 = done
+    cycles = []
+    for start in range(len(parent_of)):
+        path = []
+        row = start
+        while row >= 0 and state[row] == 0:
+            state[row] = 1
+            path.append(row)
+            row = parent_of[row]
+        if row >= 0 and state[row] == 1:
+            cycles.append(path[path.index(row):])
+        for row in path:
+            state[row] = 2
+    return cycles
+
+
+def _build_closure(parents: np.ndarray, skill_ids: Optional[List[int]] = None) -> _Closure:
+    """
+    Pointer-jumps every row up its parent chain at once, one numpy pass per level.
+    A parent cycle is logged and cut at its last row, which is treated as a root.
+    """
+    n = len(parents)
+    rows = np.arange(n, dtype=np.int32)
+    links = parents
+    cycles = _find_cycles(parents)
+    if cycles:
+        links = parents.copy()
+        for cycle in cycles:
+            links[cycle[-1]] = -1
+            names = [skill_ids[row] for row in cycle] if skill_ids is not None else cycle
+            logger.warning("Skill parent cycle through skills %s; ignoring the parent link of skill %s", names, names[-1])
+    current = links.copy()
+    pair_rows, pair_ancestors, pair_depths = [], [], []
+    for depth in range(1, MAX_DEPTH + 1):
+        live = current >= 0
+        if not live.any():
+            break
+        pair_rows.append(rows[live])
+        pair_ancestors.append(current[live])
+        pair_depths.append(np.full(int(live.sum()), depth, dtype=np.int16))
+        current = np.where(live, links[np.maximum(current, 0)], -1).astype(np.int32)
+    else:
+        if (current >= 0).any():
+            logger.warning("Skill hierarchy deeper than %d levels; truncated", MAX_DEPTH)
+
+    if pair_rows:
+        pair_rows = np.concatenate(pair_rows)
+        pair_ancestors = np.concatenate(pair_ancestors)
+        pair_depths = np.concatenate(pair_depths)
+    else:
+        pair_rows = pair_ancestors = np.empty(0, dtype=np.int32)
+        pair_depths = np.empty(0, dtype=np.int16)
+
+    def csr(keys, values, depths):
+        order = np.lexsort((depths, keys))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=n), out=indptr[1:])
+        return indptr, values[order], depths[order]
+
+    anc_indptr, anc_rows, anc_depth = csr(pair_rows, pair_ancestors, pair_depths)
+    desc_indptr, desc_rows, desc_depth = csr(pair_ancestors, pair_rows, pair_depths)
+    return _Closure(parents, anc_indptr, anc_rows, anc_depth, desc_indptr, desc_rows, desc_depth)
+
+
+def _extend_closure(closure: _Closure, n: int) -> _Closure:
+    """The closure with rows appended up to n, as roots without descendants."""
+    added = n - len(closure.parents)
+    if added <= 0:
+        return closure
+    return closure._replace(
+        parents=np.concatenate([closure.parents, np.full(added, -1, dtype=np.int32)]),
+        anc_indptr=np.concatenate([closure.anc_indptr, np.full(added, closure.anc_indptr[-1], dtype=np.int64)]),
+        desc_indptr=np.concatenate([closure.desc_indptr, np.full(added, closure.desc_indptr[-1], dtype=np.int64)]),
+    )
+
+
+def _gather(indptr: np.ndarray, values: np.ndarray, depths: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenates the CSR slices of the given rows."""
+    slices = [slice(indptr[r], indptr[r + 1]) for r in rows]
+    if not slices:
+        return np.empty(0, dtype=values.dtype), np.empty(0, dtype=depths.dtype)
+    return np.concatenate([values[s] for s in slices]), np.concatenate([depths[s] for s in slices])
+
+
+class SkillCredits:
+    """
+    A student's credit (0..1) toward every skill, backed by one dense vector.
+    skill_rows is the hierarchy's id -> row dict as it was when the vector was built;
+    the hierarchy replaces that dict on change rather than updating it.
+    """
+
+    def __init__(self, vector: np.ndarray, skill_rows: Dict[int, int]):
+        self.vector = vector
+        self._skill_rows = skill_rows
+
+    def get(self, skill_id: int, default: float = 0.0) -> float:
+        row = self._skill_rows.get(skill_id)
+        if row is None or row >= len(self.vector):
+            return default
+        return float(self.vector[row])
+
+
+class SkillHierarchy:
+    """
+    Ancestor/descendant closure of skills.parent_skill_id, kept in CSR arrays.
+    Skill ids are mapped to dense rows that are never renumbered, so packed
+    requirement matrices stay valid while the closure is rebuilt underneath them.
+    New skills without a parent or children (the common change) are appended to the
+    closure in place; other link changes are rebuilt on a background thread while
+    readers keep the previous closure.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._skill_rows: Dict[int, int] = {}
+        self._skill_ids: List[int] = []
+        self._parents = np.empty(0, dtype=np.int32) # Current parent row per skill row; the closure may lag behind
+        self._closure: _Closure = _build_closure(self._parents)
+        self._rebuilding = False
+        self._loaded_at: Optional[float] = None
+        self._digest: Optional[int] = None # rows_digest of the last full load
+        self._packed_for: Optional[Dict[int, frozenset]] = None
+        self._packed: Optional[RequirementMatrix] = None
+
+    def _ensure_loaded(self, db: Session):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < HIERARCHY_TTL_SECONDS:
+            return
+        rows = db.query(models.Skill.id, models.Skill.parent_skill_id).all()
+        digest = rows_digest(rows)
+        with self._lock:
+            # Unchanged links keep the current (possibly memory-mapped, shared) closure untouched
+            if digest != self._digest:
+                self._apply(rows, full=True, rebuild_now=True)
+                self._digest = digest
+            self._loaded_at = time.monotonic()
+
+    def preload(self, db: Session):
+        """Loads the hierarchy now instead of on first use (e.g. in a server master before forking workers)."""
+        self._ensure_loaded(db)
+
+    def share_arrays(self, directory: str):
+        """
+        Moves the closure arrays into read-only memory-mapped .npy files, so processes
+        forked afterwards map one copy of the pages. A later rebuild in a worker
+        replaces them with private arrays again.
+        """
+        with self._lock:
+            self._closure = _Closure(**map_arrays(directory, "skill_hierarchy", self._closure._asdict()))
+
+    def _add_rows(self, skill_ids: Iterable[int]):
+        """
+        Gives rows to skills that have none. The id -> row dict is replaced, never changed in
+        place, so SkillCredits handed out earlier keep a consistent view. Caller holds the lock.
+        """
+        new_ids = [s for s in dict.fromkeys(skill_ids) if s not in self._skill_rows]
+        if not new_ids:
+            return
+        skill_rows = dict(self._skill_rows)
+        for skill_id in new_ids:
+            skill_rows[skill_id] = len(self._skill_ids)
+            self._skill_ids.append(skill_id)
+        self._skill_rows = skill_rows
+
+    def _apply(self, links: Iterable[Tuple[int, Optional[int]]], full: bool = False, rebuild_now: bool = False):
+        """
+        Sets (skill_id, parent_skill_id) links. Rows that are only new roots are appended
+        to the closure right away; any other change rebuilds it, here when rebuild_now and
+        otherwise on a background thread. Caller holds the lock.
+        """
+        links = list(links)
+        self._add_rows(skill_id for link in links for skill_id in link if skill_id is not None)
+        parents = np.full(len(self._skill_ids), -1, dtype=np.int32)
+        if not full:
+            parents[:len(self._parents)] = self._parents
+        for skill_id, parent_id in links:
+            parents[self._skill_rows[skill_id]] = self._skill_rows[parent_id] if parent_id is not None else -1
+        self._parents = parents
+
+        # Every known row must have a closure row, even if a rebuild is still to come
+        self._closure = _extend_closure(self._closure, len(parents))
+        if np.array_equal(self._closure.parents, parents):
+            return
+        if rebuild_now:
+            self._closure = _build_closure(parents, list(self._skill_ids))
+        elif not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild, name="skill-hierarchy-rebuild", daemon=True).start()
+
+    def _rebuild(self):
+        """Builds closures off the request path until one matches the current links."""
+        try:
+            while True:
+                with self._lock:
+                    if np.array_equal(self._closure.parents, self._parents):
+                        self._rebuilding = False # A full reload got there first
+                        return
+                    parents, skill_ids = self._parents, list(self._skill_ids)
+                closure = _build_closure(parents, skill_ids)
+                with self._lock:
+                    # Rows appended meanwhile are roots; anything else changed means another pass
+                    closure = _extend_closure(closure, len(self._parents))
+                    if np.array_equal(closure.parents, self._parents):
+                        self._closure = closure
+                        self._rebuilding = False
+                        return
+        except Exception:
+            logger.exception("Failed to rebuild the skill hierarchy closure")
+            with self._lock:
+                self._rebuilding = False
+
+    def skills_changed(self, db: Session, skill_ids: Iterable[int]):
+        """Re-reads only the given skills' parent links and updates the closure from the in-memory parents."""
+        skill_ids = list(set(skill_ids))
+        if not skill_ids:
+            return
+        self._ensure_loaded(db)
+        rows = db.query(models.Skill.id, models.Skill.parent_skill_id).filter(models.Skill.id.in_(skill_ids)).all()
+        with self._lock:
+            self._apply(rows)
+            self._digest = None # The next reload compares against the links, not the last load
+
+    def related_skill_ids(self, db: Session, skill_ids: Iterable[int]) -> Set[int]:
+        """Ancestors and descendants of the given skills (excluding the skills themselves)."""
+        self._ensure_loaded(db)
+        with self._lock:
+            closure, skill_rows, row_ids = self._closure, self._skill_rows, self._skill_ids
+            rows = np.array([skill_rows[s] for s in skill_ids if s in skill_rows], dtype=np.int64)
+            ancestors, _ = _gather(closure.anc_indptr, closure.anc_rows, closure.anc_depth, rows)
+            descendants, _ = _gather(closure.desc_indptr, closure.desc_rows, closure.desc_depth, rows)
+            return {row_ids[r] for r in np.concatenate([ancestors, descendants]).tolist()}
+
+    def credits(self, db: Session, student_skill_ids: Iterable[int]) -> SkillCredits:
+        """
+        Credit toward every known skill for a student: 1 for held skills,
+        DESCENDANT_CREDIT for ancestors of a held skill, ANCESTOR_CREDIT for its
+        descendants, decayed by DEPTH_DECAY per extra level. The best credit wins.
+        """
+        self._ensure_loaded(db)
+        with self._lock:
+            # The closure always has a row for every skill in the dict taken with it
+            closure, skill_rows = self._closure, self._skill_rows
+            held = np.array([skill_rows[s] for s in student_skill_ids if s in skill_rows], dtype=np.int64)
+        vector = np.zeros(len(closure.parents), dtype=np.float64)
+        if len(held):
+            ancestors, depths = _gather(closure.anc_indptr, closure.anc_rows, closure.anc_depth, held)
+            np.maximum.at(vector, ancestors, DESCENDANT_CREDIT * DEPTH_DECAY ** (depths - 1.0))
+            descendants, depths = _gather(closure.desc_indptr, closure.desc_rows, closure.desc_depth, held)
+            np.maximum.at(vector, descendants, ANCESTOR_CREDIT * DEPTH_DECAY ** (depths - 1.0))
+            vector[held] = 1.0
+        return SkillCredits(vector, skill_rows)
+
+    def pack_requirements(self, opportunity_skills: Dict[int, frozenset]) -> RequirementMatrix:
+        """
+        Packs {opportunity_id: required skill ids} into a RequirementMatrix.
+        The last packed dict is remembered, so batch callers scoring many students
+        against the same dict pack it only once.
+        """
+        with self._lock:
+            if self._packed_for is opportunity_skills:
+                return self._packed
+            items = [(opp_id, skill_ids) for opp_id, skill_ids in opportunity_skills.items() if skill_ids]
+            sizes = np.fromiter((len(skill_ids) for _, skill_ids in items), dtype=np.int64, count=len(items))
+            indptr = np.zeros(len(items) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=indptr[1:])
+            # Skills not loaded yet become roots until the next reload or skills_changed
+            self._add_rows(s for _, skill_ids in items for s in skill_ids)
+            rows = self._skill_rows
+            skill_rows = np.fromiter(
+                (rows[s] for _, skill_ids in items for s in skill_ids), dtype=np.int64, count=int(indptr[-1])
+            )
+            if len(self._skill_ids) > len(self._closure.parents):
+                self._apply([])
+            packed = RequirementMatrix(
+                np.fromiter((opp_id for opp_id, _ in items), dtype=np.int64, count=len(items)),
+                indptr, skill_rows, sizes,
+            )
+            self._packed_for, self._packed = opportunity_skills, packed
+            return packed
+
+
+def match_scores(matrix: RequirementMatrix, credits: SkillCredits) -> np.ndarray:
+    """Hierarchy-weighted match score (0..100) of every packed opportunity, in one pass."""
+    if not len(matrix.opportunity_ids):
+        return np.empty(0, dtype=np.float64)
+    # Rows added after the credits were computed carry no credit
+    earned = np.zeros(len(matrix.skill_rows), dtype=np.float64)
+    known = matrix.skill_rows < len(credits.vector)
+    earned[known] = credits.vector[matrix.skill_rows[known]]
+    return np.add.reduceat(earned, matrix.indptr[:-1]) / matrix.sizes * 100
+
+
+# Process-wide hierarchy shared by the recommendation paths
+skill_hierarchy = SkillHierarchy()
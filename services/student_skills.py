@@ -0,0 +1,69 @@
+from typing import Iterable, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import models
+from services.candidate_index import candidate_index
+from services.skill_catalog import bump_skills_version, skill_catalog
+from services.skill_hierarchy import skill_hierarchy
+
+
+def add_skills_to_profile(
+    db: Session,
+    student_profile: models.StudentProfile,
+    skill_names: Iterable[str],
+    inferred_from: str,
+) -> Tuple[List[int], List[int]]:
+    """
+    Adds extracted skills to a student's profile and commits.
+    Skills missing from the ontology are created (simplified for hackathon).
+    Returns the skill ids of all given names and the skill ids that were newly added.
+    The caller decides how to rescore recommendations for the new ids.
+    """
+    names = list(dict.fromkeys(skill_names))
+    if not names:
+        return [], []
+
+    # Known names resolve from the in-memory catalog; only the rest go to the database
+    snapshot = skill_catalog.snapshot(db)
+    skills = {name: snapshot.by_name(name) for name in names}
+    unknown = [name for name, record in skills.items() if record is None]
+    if unknown:
+        # Match case-insensitively, as the catalog (and the MySQL collation) does
+        requested = {name.lower(): name for name in unknown}
+        for skill in db.query(models.Skill).filter(models.Skill.name.in_(unknown)).all():
+            skills[requested.get(skill.name.lower(), skill.name)] = skill
+    created = [models.Skill(name=name, category="Inferred") for name in names if skills.get(name) is None] # Default category
+    if created:
+        db.add_all(created)
+        db.flush()
+        skills.update((skill.name, skill) for skill in created)
+        bump_skills_version(db)
+
+    existing = {ss.skill_id: ss for ss in db.query(models.StudentSkill).filter(
+        models.StudentSkill.student_profile_id == student_profile.id,
+        models.StudentSkill.skill_id.in_([skill.id for skill in skills.values()]),
+    ).all()}
+    new_student_skills = [
+        models.StudentSkill(
+            student_profile_id=student_profile.id,
+            skill_id=skills[name].id,
+            proficiency_level="intermediate", # Default, can be refined
+            inferred_from=inferred_from,
+        )
+        for name in names if skills[name].id not in existing
+    ]
+    db.add_all(new_student_skills)
+    # Read everything needed before the commit expires the rows (each would reload separately)
+    skill_ids = [skills[name].id for name in names]
+    created_ids = [skill.id for skill in created]
+    new_skills = [(ss.skill_id, ss.proficiency_level) for ss in new_student_skills]
+    student_profile_id = student_profile.id
+    db.commit()
+
+    if created_ids:
+        skill_catalog.invalidate()
+        skill_hierarchy.skills_changed(db, created_ids)
+    if new_skills:
+        candidate_index.add_student_skills(student_profile_id, new_skills)
+    return skill_ids, [skill_id for skill_id, _ in new_skills]
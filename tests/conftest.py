@@ -0,0 +1,86 @@
+import sys
+import os
+import tempfile
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Tests run against a throwaway SQLite database, never the DATABASE_URL from .env.
+# This has to happen before anything imports database.connection.
+_workdir = tempfile.mkdtemp(prefix="cognitive_navigator_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["NLP_CACHE_PATH"] = os.path.join(_workdir, "nlp_results.sqlite3")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+
+@pytest.fixture
+def engine():
+    """The test database with every table empty."""
+    from database.connection import Base, engine
+    from database import models  # noqa: F401 (registers the tables)
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    from database.connection import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    from database import models
+
+    def make(email=None, first_name="Test", last_name="User"):
+        user = models.User(
+            email=email or f"user{db.query(models.User).count() + 1}@example.com",
+            password_hash="x", first_name=first_name, last_name=last_name,
+        )
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_student(db, make_user):
+    """Creates a user with a student profile; skills are {skill_id: proficiency_level}."""
+    from database import models
+
+    def make(department=None, major=None, gpa=None, skills=None):
+        user = make_user()
+        profile = models.StudentProfile(user_id=user.id, department=department, major=major, gpa=gpa)
+        db.add(profile)
+        db.flush()
+        for skill_id, proficiency_level in (skills or {}).items():
+            db.add(models.StudentSkill(student_profile_id=profile.id, skill_id=skill_id, proficiency_level=proficiency_level))
+        db.commit()
+        return profile
+    return make
+
+
+@pytest.fixture
+def make_skills(db):
+    """Creates skills from (name, parent name or None) pairs, parents first; returns {name: id}."""
+    from database import models
+
+    def make(*pairs):
+        ids = {}
+        for name, parent in pairs:
+            skill = models.Skill(name=name, parent_skill_id=ids[parent] if parent else None)
+            db.add(skill)
+            db.flush()
+            ids[name] = skill.id
+        db.commit()
+        return ids
+    return make
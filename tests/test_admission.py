@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+
+import utils.admission as admission
+from utils.admission import AdmissionController, ConcurrencyLimiter, RouteLimits, TokenBucket
+
+
+def _request(path="/api/auth/token", method="POST", host="10.0.0.1"):
+    return Request({
+        "type": "http", "method": method, "path": path, "query_string": b"", "headers": [],
+        "client": (host, 1234), "server": ("testserver", 80), "scheme": "http",
+    })
+
+
+async def _ok(request):
+    return PlainTextResponse("ok")
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    def install(**overrides):
+        limits = RouteLimits(user_rate=0.0, user_burst=2, route_rate=0.0, route_burst=10, concurrency=1)._replace(**overrides)
+        controller = AdmissionController({"auth": limits})
+        monkeypatch.setattr(admission, "admission_controller", controller)
+        return controller
+    return install
+
+
+def _status(request=None, call_next=_ok):
+    response = asyncio.run(admission.admission_control(request or _request(), call_next))
+    return response.status_code
+
+
+def test_token_bucket_refills_up_to_burst():
+    bucket = TokenBucket(rate=2, burst=2, now=0)
+    for _ in range(2):
+        assert bucket.wait(0) == 0
+        bucket.take()
+    assert bucket.wait(0) == 0.5
+    assert bucket.wait(0.5) == 0
+    assert bucket.wait(100) == 0 and bucket.tokens == 2
+
+
+def test_parse_limits():
+    limits = admission._parse_limits("nlp=concurrency:8,user_rate:0.5; pdf=bogus:1; unknown=concurrency:1")
+    assert limits["nlp"].concurrency == 8 and limits["nlp"].user_rate == 0.5
+    assert limits["nlp"].route_burst == admission.DEFAULT_LIMITS["nlp"].route_burst
+    assert limits["pdf"] == admission.DEFAULT_LIMITS["pdf"]
+    assert "unknown" not in limits
+
+
+def test_limiter_hands_slots_over_in_order():
+    async def scenario():
+        limiter = ConcurrencyLimiter(1)
+        order = []
+        assert await limiter.acquire(1)
+
+        async def waiter(name):
+            if await limiter.acquire(1):
+                order.append(name)
+                limiter.release()
+
+        tasks = [asyncio.ensure_future(waiter(name)) for name in ("first", "second")]
+        await asyncio.sleep(0)
+        assert limiter.queued == 2
+        limiter.release()
+        await asyncio.gather(*tasks)
+        assert order == ["first", "second"]
+        assert limiter.active == 0
+
+        assert await limiter.acquire(1)
+        assert not await limiter.acquire(0.01)
+        assert limiter.active == 1 and limiter.queued == 0
+    asyncio.run(scenario())
+
+
+def test_other_routes_are_not_limited(controller):
+    controller(user_burst=0)
+    assert _status(_request("/api/opportunities/", method="GET")) == 200
+
+
+def test_per_client_rate_limit(controller):
+    controller(user_burst=2)
+    assert [_status() for _ in range(3)] == [200, 200, 429]
+    # Another client has its own bucket
+    assert _status(_request(host="10.0.0.2")) == 200
+
+
+def test_route_limit_does_not_spend_client_tokens(controller):
+    installed = controller(user_burst=2, route_burst=1)
+    assert _status(_request(host="10.0.0.2")) == 200
+    response = asyncio.run(admission.admission_control(_request(), _ok))
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+    assert installed.client_bucket("auth", "addr:10.0.0.1", 0).tokens == 2
+
+
+def test_queue_timeout_is_overload(controller, monkeypatch):
+    controller(concurrency=1)
+    monkeypatch.setattr(admission, "MAX_QUEUE_SECONDS", 0.01)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow(request):
+            await release.wait()
+            return PlainTextResponse("ok")
+
+        running = asyncio.ensure_future(admission.admission_control(_request(), slow))
+        await asyncio.sleep(0)
+        queued = await admission.admission_control(_request(host="10.0.0.2"), _ok)
+        release.set()
+        return (await running).status_code, queued.status_code
+
+    assert asyncio.run(scenario()) == (200, 503)
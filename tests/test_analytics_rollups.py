@@ -0,0 +1,91 @@
+import datetime
+
+import pytest
+
+import services.analytics_rollups as analytics_rollups
+from database import models
+from services.analytics_rollups import popularity_priors, roll_up, roll_up_once, trending
+
+
+@pytest.fixture
+def log_action(db, make_user):
+    user = make_user()
+
+    def log(entity_id, ago, entity_type="opportunity", action_type="opportunity_view"):
+        db.add(models.UserActionLog(
+            user_id=user.id, action_type=action_type, entity_type=entity_type, entity_id=entity_id,
+            timestamp=datetime.datetime.now() - ago,
+        ))
+        db.commit()
+    return log
+
+
+def _watermark(db):
+    db.expire_all()
+    return db.query(models.RollupWatermark.last_id).filter(
+        models.RollupWatermark.name == analytics_rollups.WATERMARK_NAME
+    ).scalar()
+
+
+def _hourly(db):
+    return {(r.entity_id, r.action_type): r.count for r in db.query(models.ActionRollupHourly)}
+
+
+def test_rows_are_counted_once(db, log_action):
+    for entity_id in (1, 1, 2):
+        log_action(entity_id, datetime.timedelta(minutes=5))
+    assert roll_up(db) == 3
+    assert roll_up(db) == 0
+    assert _hourly(db) == {(1, "opportunity_view"): 2, (2, "opportunity_view"): 1}
+
+    log_action(1, datetime.timedelta(minutes=5))
+    assert roll_up(db) == 1
+    assert _hourly(db)[(1, "opportunity_view")] == 3
+
+
+def test_watermark_stops_at_rows_inside_the_lag_window(db, log_action):
+    log_action(1, datetime.timedelta(minutes=5))
+    log_action(2, datetime.timedelta(seconds=1))  # Could still have an older id committing behind it
+    log_action(3, datetime.timedelta(minutes=5))
+
+    assert roll_up_once(db) == 1
+    first_id = db.query(models.UserActionLog.id).order_by(models.UserActionLog.id).first()[0]
+    assert _watermark(db) == first_id
+    assert set(_hourly(db)) == {(1, "opportunity_view")}
+
+
+def test_batches_advance_the_watermark(db, log_action, monkeypatch):
+    monkeypatch.setattr(analytics_rollups, "ROLLUP_BATCH_SIZE", 2)
+    for entity_id in range(5):
+        log_action(entity_id, datetime.timedelta(minutes=5))
+    assert roll_up_once(db) == 2
+    assert roll_up(db) == 3
+    assert _watermark(db) == db.query(models.UserActionLog.id).order_by(models.UserActionLog.id.desc()).first()[0]
+
+
+def test_rows_without_an_entity_advance_the_watermark_only(db, make_user):
+    user = make_user()
+    db.add(models.UserActionLog(user_id=user.id, action_type="login",
+                                timestamp=datetime.datetime.now() - datetime.timedelta(minutes=5)))
+    db.commit()
+    assert roll_up(db) == 1
+    assert _hourly(db) == {}
+    assert _watermark(db) is not None
+
+
+def test_trending_and_priors_read_the_rollups(db, log_action):
+    for entity_id, count in ((1, 1), (2, 3), (3, 2)):
+        for _ in range(count):
+            log_action(entity_id, datetime.timedelta(minutes=5))
+    log_action(4, datetime.timedelta(days=3))
+    log_action(5, datetime.timedelta(minutes=5), entity_type="resource", action_type="resource_clicked")
+    roll_up(db)
+
+    assert trending(db, "opportunity", hours=24, limit=2) == [(2, 3), (3, 2)]
+    assert dict(trending(db, "opportunity", hours=24 * 7, limit=10))[4] == 1
+    assert trending(db, "resource", hours=24, limit=10, action_type="opportunity_view") == []
+
+    priors = popularity_priors(db, "opportunity", [1, 2, 3, 99])
+    assert priors[2] == 1.0
+    assert 0 < priors[1] < priors[3] < 1
+    assert 99 not in priors
@@ -0,0 +1,120 @@
+import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from database import models
+from routers.applications import withdraw_application
+from services import application_workflow
+from services.notification_hub import notification_writer
+
+
+@pytest.fixture
+def opportunity(db, make_user):
+    poster = make_user()
+    opportunity = models.Opportunity(
+        posted_by_user_id=poster.id, title="Research assistant", description="-", type="research",
+        application_deadline=datetime.datetime.now() + datetime.timedelta(days=30), num_positions=2,
+    )
+    db.add(opportunity)
+    db.commit()
+    return opportunity
+
+
+@pytest.fixture
+def apply(db, make_student, opportunity):
+    def make(status="applied"):
+        profile = make_student()
+        application = models.StudentApplication(
+            student_profile_id=profile.id, opportunity_id=opportunity.id, application_status=status, version=1,
+        )
+        db.add(application)
+        db.flush()
+        application_workflow.update_status_counts(db, {(opportunity.id, status): 1})
+        db.commit()
+        return application
+    return make
+
+
+@pytest.fixture
+def notifications(db):
+    """Reads the notifications enqueued during the test."""
+    # Earlier tests leave theirs buffered in the process-wide writer
+    notification_writer.flush()
+    db.query(models.Notification).delete()
+    db.commit()
+
+    def read():
+        notification_writer.flush()
+        return [(n.user_id, n.message) for n in db.query(models.Notification).order_by(models.Notification.id)]
+    return read
+
+
+def _state(db, application_id):
+    return db.query(
+        models.StudentApplication.application_status, models.StudentApplication.version
+    ).filter(models.StudentApplication.id == application_id).one()
+
+
+def test_transition_bumps_versions_and_counts(db, opportunity, apply):
+    first, second = apply(), apply()
+    result = application_workflow.transition(db, {first.id: 1, second.id: 1}, "under_review")
+
+    assert result.updated == sorted([first.id, second.id])
+    assert result.conflicts == result.invalid == []
+    assert tuple(_state(db, first.id)) == ("under_review", 2)
+    assert application_workflow.status_counts(db, opportunity.id) == {"under_review": 2}
+
+
+def test_stale_versions_are_conflicts(db, opportunity, apply):
+    current, stale = apply(), apply()
+    application_workflow.transition(db, {stale.id: 1}, "under_review")
+
+    result = application_workflow.transition(db, {current.id: 1, stale.id: 1}, "rejected")
+
+    assert result.updated == [current.id]
+    assert result.conflicts == [stale.id]
+    assert tuple(_state(db, stale.id)) == ("under_review", 2)
+    assert application_workflow.status_counts(db, opportunity.id) == {"under_review": 1, "rejected": 1}
+
+
+def test_disallowed_moves_and_foreign_applications_are_invalid(db, opportunity, apply):
+    application = apply()
+    assert application_workflow.transition(db, {application.id: 1}, "accepted").invalid == [application.id]
+    assert application_workflow.transition(db, {application.id: 1}, "under_review",
+                                           allowed_opportunity_ids={opportunity.id + 1}).invalid == [application.id]
+    assert application_workflow.transition(db, {application.id + 100: 1}, "under_review").invalid == [application.id + 100]
+    assert tuple(_state(db, application.id)) == ("applied", 1)
+
+
+def test_accepted_applications_are_reported_per_opportunity(db, opportunity, apply, notifications):
+    application = apply(status="interview")
+    result = application_workflow.transition(db, {application.id: 1}, "accepted")
+    assert result.accepted_by_opportunity == {opportunity.id: 1}
+
+    user_id = db.query(models.StudentProfile.user_id).filter(
+        models.StudentProfile.id == application.student_profile_id
+    ).scalar()
+    assert notifications() == [(user_id, "Your application for 'Research assistant' is now accepted.")]
+
+
+def test_withdraw_checks_the_version(db, apply):
+    role = models.Role(name="student")
+    db.add(role)
+    application = apply()
+    user = db.query(models.User).join(models.StudentProfile).filter(
+        models.StudentProfile.id == application.student_profile_id
+    ).one()
+    db.add(models.UserRole(user_id=user.id, role_id=role.id))
+    db.commit()
+
+    with pytest.raises(HTTPException) as conflict:
+        withdraw_application(application.id, version=2, db=db, current_user=user)
+    assert conflict.value.status_code == 409
+
+    assert withdraw_application(application.id, version=1, db=db, current_user=user).updated == [application.id]
+    assert tuple(_state(db, application.id)) == ("withdrawn", 2)
+
+    with pytest.raises(HTTPException) as invalid:
+        withdraw_application(application.id, version=2, db=db, current_user=user)
+    assert invalid.value.status_code == 400
@@ -0,0 +1,117 @@
+import datetime
+import json
+import threading
+
+import pytest
+
+from database import models
+from services.batch_writer import BLOCK, DROP_NEWEST, DROP_OLDEST, BatchWriter
+
+TABLE = models.UserActionLog.__table__
+
+
+def _row(n):
+    return {"user_id": 1, "action_type": "opportunity_view", "entity_type": "opportunity", "entity_id": n,
+            "timestamp": datetime.datetime(2024, 1, 1, 12, 0, n % 60)}
+
+
+def _written(db):
+    return [entity_id for (entity_id,) in db.query(models.UserActionLog.entity_id).order_by(models.UserActionLog.id)]
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        BatchWriter(TABLE, "test", policy="spill")
+
+
+def test_flush_writes_buffered_rows_in_batches(db):
+    writer = BatchWriter(TABLE, "test", batch_size=3)
+    for n in range(7):
+        assert writer.submit(_row(n))
+    writer.flush()
+    assert _written(db) == list(range(7))
+    assert writer.stats["written"] == 7
+
+
+def test_drop_oldest_keeps_the_newest_rows(db):
+    writer = BatchWriter(TABLE, "test", capacity=3, policy=DROP_OLDEST)
+    assert all(writer.submit(_row(n)) for n in range(5))
+    writer.flush()
+    assert _written(db) == [2, 3, 4]
+    assert writer.stats["dropped"] == 2
+
+
+def test_drop_newest_rejects_rows_once_full(db):
+    writer = BatchWriter(TABLE, "test", capacity=3, policy=DROP_NEWEST)
+    assert [writer.submit(_row(n)) for n in range(5)] == [True, True, True, False, False]
+    writer.flush()
+    assert _written(db) == [0, 1, 2]
+    assert writer.stats["dropped"] == 2
+
+
+def test_block_gives_up_after_the_timeout_without_a_flusher(db):
+    writer = BatchWriter(TABLE, "test", capacity=2, policy=BLOCK, block_timeout=0.01)
+    assert writer.may_block
+    assert [writer.submit(_row(n)) for n in range(3)] == [True, True, False]
+    assert writer.stats["dropped"] == 1
+
+
+def test_block_waits_for_the_flusher(db):
+    writer = BatchWriter(TABLE, "test", capacity=2, batch_size=2, flush_interval=60, policy=BLOCK, block_timeout=5)
+    writer.start()
+    try:
+        results = []
+        producer = threading.Thread(target=lambda: results.extend(writer.submit(_row(n)) for n in range(6)))
+        producer.start()
+        producer.join(10)
+        assert results == [True] * 6
+    finally:
+        writer.stop()
+    assert _written(db) == list(range(6))
+
+
+def test_stop_flushes_what_is_left(db):
+    writer = BatchWriter(TABLE, "test", batch_size=100, flush_interval=60)
+    writer.start()
+    writer.submit(_row(1))
+    writer.stop()
+    assert _written(db) == [1]
+
+
+def test_spooled_rows_are_replayed_on_start(db, tmp_path):
+    spool = str(tmp_path / "actions.jsonl")
+    # A previous process accepted two rows and died mid-write of a third
+    with open(spool, "w", encoding="utf-8") as f:
+        for n in (1, 2):
+            f.write(json.dumps({**_row(n), "timestamp": _row(n)["timestamp"].isoformat()}) + "\n")
+        f.write('{"user_id": 1, "act')
+
+    writer = BatchWriter(TABLE, "test", flush_interval=60, spool_path=spool, datetime_fields=("timestamp",))
+    writer.start()
+    try:
+        assert _written(db) == [1, 2]
+        assert db.query(models.UserActionLog.timestamp).first()[0] == _row(1)["timestamp"]
+        writer.submit(_row(3))
+        with open(spool, encoding="utf-8") as f:
+            assert json.loads(f.read())["entity_id"] == 3
+    finally:
+        writer.stop()
+    db.expire_all()
+    assert _written(db) == [1, 2, 3]
+    assert list(tmp_path.iterdir()) == [tmp_path / "actions.jsonl"]
+    assert (tmp_path / "actions.jsonl").read_text() == ""
+
+
+def test_failed_flush_keeps_the_spool_for_the_next_start(db, tmp_path, monkeypatch):
+    spool = str(tmp_path / "actions.jsonl")
+    writer = BatchWriter(TABLE, "test", flush_interval=60, spool_path=spool, datetime_fields=("timestamp",))
+    writer.start()
+    monkeypatch.setattr(writer, "_write", lambda rows: False)
+    writer.submit(_row(1))
+    writer.stop()
+    assert _written(db) == []
+    assert len(list(tmp_path.glob("actions.jsonl.*.flushing"))) == 1
+
+    BatchWriter(TABLE, "test", spool_path=spool, datetime_fields=("timestamp",))._replay_spool()
+    assert _written(db) == [1]
+    assert not list(tmp_path.glob("actions.jsonl.*.flushing"))
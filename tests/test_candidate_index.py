@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from services.candidate_index import MANDATORY_WEIGHT, OPTIONAL_WEIGHT, PROFICIENCY_WEIGHTS, CandidateIndex
+
+
+@pytest.fixture
+def skills(make_skills):
+    return make_skills(("python", None), ("sql", None), ("go", None))
+
+
+def _brute_force(students, required, k):
+    # students: {profile id: {skill_id: weight}}
+    scores = {}
+    for student_id, weights in students.items():
+        score = sum((MANDATORY_WEIGHT if m else OPTIONAL_WEIGHT) * weights[s] for s, m in required if s in weights)
+        if score > 0:
+            scores[student_id] = score
+    return sorted(scores, key=lambda student_id: (-scores[student_id], student_id))[:k]
+
+
+def test_ranks_by_weighted_proficiency(db, skills, make_student):
+    expert = make_student(skills={skills["python"]: "expert", skills["sql"]: "beginner"})
+    beginner = make_student(skills={skills["python"]: "beginner"})
+    make_student(skills={skills["go"]: "expert"})
+
+    candidates = CandidateIndex().top_candidates(db, [(skills["python"], True), (skills["sql"], False)], k=10)
+
+    assert [c.student_profile_id for c in candidates] == [expert.id, beginner.id]
+    # (1.0 * 1.0 + 0.5 * 0.25) / 1.5
+    assert candidates[0].match_score == 75.0
+    assert candidates[0].matched_skill_ids == [skills["python"], skills["sql"]]
+
+
+def test_wand_matches_exhaustive_scoring(db, make_skills, make_student):
+    rng = random.Random(7)
+    skill_ids = list(make_skills(*[(f"skill{i}", None) for i in range(12)]).values())
+    students = {}
+    for _ in range(150):
+        chosen = {s: rng.choice(list(PROFICIENCY_WEIGHTS)) for s in rng.sample(skill_ids, rng.randint(0, 6))}
+        profile = make_student(skills=chosen)
+        students[profile.id] = {s: PROFICIENCY_WEIGHTS[level] for s, level in chosen.items()}
+
+    index = CandidateIndex()
+    for _ in range(20):
+        required = [(s, rng.random() < 0.5) for s in rng.sample(skill_ids, rng.randint(1, 5))]
+        k = rng.randint(1, 15)
+        ranked = [c.student_profile_id for c in index.top_candidates(db, required, k=k)]
+        assert ranked == _brute_force(students, required, k)
+
+
+def test_filters(db, skills, make_student):
+    in_cs = make_student(department="CS", major="AI", gpa=3.5, skills={skills["python"]: "advanced"})
+    make_student(department="Math", major="AI", gpa=3.9, skills={skills["python"]: "advanced"})
+    make_student(department="CS", major="AI", gpa=None, skills={skills["python"]: "advanced"})
+    index = CandidateIndex()
+    required = [(skills["python"], True)]
+
+    assert [c.student_profile_id for c in index.top_candidates(db, required, department="CS", min_gpa=3.0)] == [in_cs.id]
+    assert index.top_candidates(db, required, department="Biology") == []
+    assert len(index.top_candidates(db, required, major="AI")) == 3
+
+
+def test_incremental_updates(db, skills, make_student):
+    first = make_student(department="CS", skills={skills["python"]: "beginner"})
+    index = CandidateIndex()
+    required = [(skills["python"], True)]
+    assert [c.student_profile_id for c in index.top_candidates(db, required)] == [first.id]
+
+    second = make_student(department="CS")
+    index.upsert_student(second.id, second.user_id, "CS", None, None)
+    index.add_student_skills(second.id, [(skills["python"], "expert")])
+    assert [c.student_profile_id for c in index.top_candidates(db, required)] == [second.id, first.id]
+
+    index.upsert_student(second.id, second.user_id, "Math", None, None)
+    assert [c.student_profile_id for c in index.top_candidates(db, required, department="CS")] == [first.id]
+
+    index.remove_student(first.id)
+    assert [c.student_profile_id for c in index.top_candidates(db, required)] == [second.id]
+
+
+def test_reload_keeps_index_when_rows_are_unchanged(db, skills, make_student, monkeypatch):
+    import services.candidate_index as candidate_index
+
+    make_student(skills={skills["python"]: "beginner"})
+    index = CandidateIndex()
+    index.preload(db)
+    postings = index._postings
+
+    monkeypatch.setattr(candidate_index, "INDEX_TTL_SECONDS", 0)
+    index.top_candidates(db, [(skills["python"], True)])
+    assert index._postings is postings
+
+    added = make_student(skills={skills["python"]: "expert"})
+    candidates = index.top_candidates(db, [(skills["python"], True)])
+    assert index._postings is not postings
+    assert candidates[0].student_profile_id == added.id
@@ -0,0 +1,47 @@
+import csv
+import decimal
+import io
+
+import pytest
+
+from services.data_export import EXPORTS, csv_chunks, export_chunks, parquet_available, row_batches
+
+
+@pytest.fixture
+def profiles(db, make_student):
+    return [make_student(department="CS", major="AI", gpa=decimal.Decimal("3.25")) for _ in range(5)]
+
+
+def test_row_batches_split_the_rows(db, profiles):
+    batches = list(row_batches(db, "profiles", batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [row[0] for batch in batches for row in batch] == [p.id for p in profiles]
+
+
+def test_csv_export(db, profiles):
+    chunks = list(export_chunks(db, "profiles", "csv", batch_size=2))
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == [column.name for column in EXPORTS["profiles"].columns]
+    assert len(rows) == 6
+    assert rows[1][0] == str(profiles[0].id) and rows[1][6:9] == ["CS", "AI", "3.25"]
+
+
+def test_empty_csv_export_still_has_a_header():
+    columns = EXPORTS["skills"].columns
+    assert b"".join(csv_chunks(columns, [])).decode("utf-8").strip() == ",".join(c.name for c in columns)
+
+
+def test_parquet_export(db, profiles):
+    if not parquet_available():
+        pytest.skip("pyarrow is not installed")
+    import pyarrow.parquet as pq
+
+    data = b"".join(export_chunks(db, "profiles", "parquet", batch_size=2))
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column_names == [column.name for column in EXPORTS["profiles"].columns]
+    assert table.column("student_profile_id").to_pylist() == [p.id for p in profiles]
+    assert table.column("gpa").to_pylist() == [3.25] * 5
+    assert table.column("academic_id").to_pylist() == [None] * 5
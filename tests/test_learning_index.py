@@ -0,0 +1,60 @@
+import pytest
+
+import services.learning_index as learning_index
+from database import models
+from services.learning_index import DIFFICULTY_RANKS, LearningResourceIndex, target_difficulty
+
+
+@pytest.fixture
+def add_resource(db):
+    def add(skill_ids, difficulty_level=None, minutes=None):
+        resource = models.LearningResource(
+            title="Resource", url=f"https://example.com/{db.query(models.LearningResource).count()}",
+            difficulty_level=difficulty_level, estimated_time_to_complete_min=minutes,
+        )
+        db.add(resource)
+        db.flush()
+        for skill_id in skill_ids:
+            db.add(models.ResourceAssociatedSkill(resource_id=resource.id, skill_id=skill_id))
+        db.commit()
+        return resource.id
+    return add
+
+
+def test_target_difficulty():
+    assert target_difficulty([], current_level="intermediate") == DIFFICULTY_RANKS["advanced"]
+    assert target_difficulty([], current_level="expert") == DIFFICULTY_RANKS["advanced"]
+    assert target_difficulty(["expert", "expert"]) == DIFFICULTY_RANKS["intermediate"]
+    assert target_difficulty([None]) == DIFFICULTY_RANKS["beginner"]
+
+
+def test_top_k_prefers_the_target_rank_then_shorter(db, make_skills, add_resource):
+    skill = make_skills(("python", None))["python"]
+    long_intermediate = add_resource([skill], "intermediate", 120)
+    short_intermediate = add_resource([skill], "intermediate", 30)
+    advanced = add_resource([skill], "advanced", 10)
+    beginner = add_resource([skill], "beginner", 10)
+    undated = add_resource([skill], None, 5)
+
+    index = LearningResourceIndex()
+    assert index.top_k(db, skill, k=10, target_rank=DIFFICULTY_RANKS["intermediate"]) == [
+        short_intermediate, long_intermediate, advanced, beginner, undated,
+    ]
+    assert index.top_k(db, skill, k=2, target_rank=DIFFICULTY_RANKS["beginner"]) == [beginner, short_intermediate]
+    assert index.top_k(db, skill + 1, k=5) == []
+    assert index.skills_with_resources(db) == frozenset([skill])
+
+
+def test_reload_keeps_postings_when_rows_are_unchanged(db, make_skills, add_resource, monkeypatch):
+    skill = make_skills(("python", None))["python"]
+    add_resource([skill], "beginner", 10)
+    index = LearningResourceIndex()
+    index.preload(db)
+    postings = index._postings
+
+    monkeypatch.setattr(learning_index, "INDEX_TTL_SECONDS", 0)
+    index.top_k(db, skill, k=5)
+    assert index._postings is postings
+
+    added = add_resource([skill], "beginner", 5)
+    assert index.top_k(db, skill, k=1) == [added]
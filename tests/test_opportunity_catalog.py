@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+
+import services.opportunity_catalog as opportunity_catalog
+from database import models
+from services.opportunity_catalog import OpportunityCatalog
+
+
+@pytest.fixture
+def post(db, make_user):
+    poster = make_user()
+
+    def make(skills=(), deadline_days=30, status="open"):
+        opportunity = models.Opportunity(
+            posted_by_user_id=poster.id, title="Internship", description="-", type="internship", status=status,
+            application_deadline=datetime.datetime.now() + datetime.timedelta(days=deadline_days),
+        )
+        db.add(opportunity)
+        db.flush()
+        for skill_id, is_mandatory in skills:
+            db.add(models.OpportunityRequiredSkill(opportunity_id=opportunity.id, skill_id=skill_id, is_mandatory=is_mandatory))
+        db.commit()
+        return opportunity
+    return make
+
+
+@pytest.fixture
+def catalog(db, monkeypatch):
+    monkeypatch.setattr(opportunity_catalog, "POLL_SECONDS", 0)
+    catalog = OpportunityCatalog()
+    catalog.preload(db)
+    return catalog
+
+
+def _ids(catalog):
+    return [record.id for record in catalog.snapshot().live()]
+
+
+def test_loads_open_postings_with_their_skills(db, post):
+    first = post(skills=[(3, True), (1, False)])
+    post(status="closed")
+    expired = post(deadline_days=-1)
+    catalog = OpportunityCatalog()
+    catalog.preload(db)
+
+    snapshot = catalog.snapshot()
+    assert len(snapshot) == 2
+    assert [record.id for record in snapshot.live()] == [first.id]
+    assert snapshot.get(expired.id) is None
+    record = snapshot.get(first.id)
+    assert record.skill_ids == (1, 3) and record.mandatory == (False, True)
+    assert snapshot.opportunity_skills() == {first.id: frozenset([1, 3])}
+
+
+def test_polls_pick_up_other_workers_changes(db, post, catalog):
+    first = post()
+    assert _ids(catalog) == [first.id]
+
+    first.status = "closed"
+    second = post(skills=[(1, True)])
+    assert _ids(catalog) == [second.id]
+
+    db.add(models.OpportunityTombstone(opportunity_id=second.id))
+    db.query(models.Opportunity).filter(models.Opportunity.id == second.id).delete()
+    db.commit()
+    assert _ids(catalog) == []
+
+
+def test_polls_without_changes_keep_the_snapshot(db, post, catalog):
+    post()
+    snapshot = catalog.snapshot()
+    assert catalog.snapshot() is snapshot
+
+
+def test_handlers_push_their_changes(db, post, catalog):
+    opportunity = post()
+    before = catalog.snapshot()
+
+    opportunity.title = "Paid internship"
+    db.commit()
+    catalog.upsert(opportunity)
+    assert catalog.snapshot().get(opportunity.id).title == "Paid internship"
+    assert before.get(opportunity.id).title == "Internship" # Snapshots never change
+
+    opportunity.status = "closed"
+    db.commit()
+    catalog.remove_many([opportunity.id])
+    assert catalog.snapshot().get(opportunity.id) is None
+
+
+def test_full_reload_keeps_an_equal_snapshot(db, post, catalog, monkeypatch):
+    post()
+    snapshot = catalog.snapshot()
+    monkeypatch.setattr(opportunity_catalog, "FULL_RELOAD_SECONDS", 0)
+    assert catalog.snapshot() is snapshot
@@ -0,0 +1,114 @@
+import time
+
+import numpy as np
+import pytest
+
+import services.skill_hierarchy as skill_hierarchy
+from database import models
+from services.skill_hierarchy import (
+    ANCESTOR_CREDIT, DEPTH_DECAY, DESCENDANT_CREDIT, SkillHierarchy, match_scores,
+)
+
+
+@pytest.fixture
+def skills(make_skills):
+    # programming > python > django, programming > go; design is unrelated
+    return make_skills(("programming", None), ("python", "programming"), ("django", "python"),
+                       ("go", "programming"), ("design", None))
+
+
+def _wait_for_rebuild(hierarchy):
+    deadline = time.monotonic() + 5
+    while hierarchy._rebuilding and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not hierarchy._rebuilding
+
+
+def _set_parent(db, skill_id, parent_id):
+    db.query(models.Skill).filter(models.Skill.id == skill_id).update({"parent_skill_id": parent_id})
+    db.commit()
+
+
+def test_credits_follow_the_closure(db, skills):
+    credits = SkillHierarchy().credits(db, [skills["python"]])
+
+    assert credits.get(skills["python"]) == 1.0
+    assert credits.get(skills["programming"]) == DESCENDANT_CREDIT
+    assert credits.get(skills["django"]) == ANCESTOR_CREDIT
+    assert credits.get(skills["go"]) == 0.0 # Siblings are not related
+    assert credits.get(skills["design"]) == 0.0
+    assert credits.get(12345, default=-1.0) == -1.0
+
+    credits = SkillHierarchy().credits(db, [skills["django"]])
+    assert credits.get(skills["programming"]) == DESCENDANT_CREDIT * DEPTH_DECAY
+
+
+def test_related_skill_ids(db, skills):
+    hierarchy = SkillHierarchy()
+    assert hierarchy.related_skill_ids(db, [skills["python"]]) == {skills["programming"], skills["django"]}
+    assert hierarchy.related_skill_ids(db, [skills["design"]]) == set()
+
+
+def test_match_scores(db, skills):
+    hierarchy = SkillHierarchy()
+    credits = hierarchy.credits(db, [skills["python"]])
+    opportunity_skills = {1: frozenset([skills["python"], skills["go"]]), 2: frozenset([skills["programming"]]), 3: frozenset()}
+
+    matrix = hierarchy.pack_requirements(opportunity_skills)
+    assert hierarchy.pack_requirements(opportunity_skills) is matrix
+    assert matrix.opportunity_ids.tolist() == [1, 2]
+    np.testing.assert_allclose(match_scores(matrix, credits), [50.0, DESCENDANT_CREDIT * 100])
+
+
+def test_new_root_skills_are_appended_in_place(db, skills, make_skills):
+    hierarchy = SkillHierarchy()
+    hierarchy.preload(db)
+    old_credits = hierarchy.credits(db, [skills["python"]])
+
+    added = make_skills(("rust", None))["rust"]
+    hierarchy.skills_changed(db, [added])
+    assert not hierarchy._rebuilding
+    assert hierarchy.credits(db, [added]).get(added) == 1.0
+    assert old_credits.get(added) == 0.0
+
+    # Skills only seen in requirements get rows too, and carry no credit yet
+    matrix = hierarchy.pack_requirements({1: frozenset([999])})
+    assert match_scores(matrix, old_credits).tolist() == [0.0]
+
+
+def test_relinks_are_rebuilt_in_the_background(db, skills):
+    hierarchy = SkillHierarchy()
+    hierarchy.preload(db)
+
+    _set_parent(db, skills["go"], skills["python"])
+    hierarchy.skills_changed(db, [skills["go"]])
+    _wait_for_rebuild(hierarchy)
+
+    assert hierarchy.credits(db, [skills["go"]]).get(skills["programming"]) == DESCENDANT_CREDIT * DEPTH_DECAY
+
+
+def test_cycles_are_cut(db, skills):
+    _set_parent(db, skills["programming"], skills["django"])
+    hierarchy = SkillHierarchy()
+
+    credits = hierarchy.credits(db, [skills["python"]])
+    assert credits.get(skills["python"]) == 1.0
+    related = hierarchy.related_skill_ids(db, [skills["python"]])
+    assert skills["python"] not in related
+    assert related <= {skills["programming"], skills["django"], skills["go"]}
+
+
+def test_unchanged_reloads_keep_the_shared_arrays(db, skills, tmp_path, monkeypatch):
+    hierarchy = SkillHierarchy()
+    hierarchy.preload(db)
+    hierarchy.share_arrays(str(tmp_path))
+    closure = hierarchy._closure
+    assert isinstance(closure.anc_rows, np.memmap)
+
+    monkeypatch.setattr(skill_hierarchy, "HIERARCHY_TTL_SECONDS", 0)
+    assert hierarchy.credits(db, [skills["python"]]).get(skills["django"]) == ANCESTOR_CREDIT
+    assert hierarchy._closure is closure
+
+    _set_parent(db, skills["design"], skills["programming"])
+    assert hierarchy.credits(db, [skills["programming"]]).get(skills["design"]) == ANCESTOR_CREDIT
+    assert hierarchy._closure is not closure
@@ -0,0 +1,33 @@
+import re
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from services.action_log import action_log_writer, log_action
+from utils.security import user_id_from_request
+
+# GET routes whose successful responses count as a view: (path pattern, action_type, entity_type)
+TRACKED_VIEWS = [
+    (re.compile(r"^/api/opportunities/(\d+)/?$"), "opportunity_view", "opportunity"),
+]
+
+
+async def track_views(request: Request, call_next):
+    """HTTP middleware that logs opportunity views for authenticated users."""
+    response = await call_next(request)
+    if request.method != "GET" or not 200 <= response.status_code < 300:
+        return response
+
+    for pattern, action_type, entity_type in TRACKED_VIEWS:
+        match = pattern.match(request.url.path)
+        if match:
+            user_id = user_id_from_request(request)
+            if user_id is None:
+                break
+            if action_log_writer.may_block:
+                # A full buffer under the block policy, or the spool write, must not stall the event loop
+                await run_in_threadpool(log_action, user_id, action_type, entity_type, int(match.group(1)))
+            else:
+                log_action(user_id, action_type, entity_type, int(match.group(1)))
+            break
+    return response
@@ -0,0 +1,254 @@
+import asyncio
+import collections
+import logging
+import math
+import os
+import re
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from utils.security import user_id_from_request
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Admission control for the CPU-bound endpoints, so a few clients hammering spaCy, bcrypt or
+# wkhtmltopdf can't take every worker thread from cheap catalog reads. Per route class:
+#   - a token bucket per user (per client address when anonymous) and one for the whole route,
+#   - a concurrency limit; excess requests wait in a FIFO queue for up to MAX_QUEUE_SECONDS,
+#   - CoDel-style shedding: when queued requests have waited longer than SHED_TARGET_SECONDS
+#     for a whole SHED_INTERVAL_SECONDS, new requests that would queue get 503 right away.
+# Rejections are 429 (rate limits) or 503 (overload), both with Retry-After.
+# State is per worker process and lives on the event loop thread, so it needs no locks.
+
+
+class RouteLimits(NamedTuple):
+    user_rate: float      # Tokens per second per user/client
+    user_burst: float
+    route_rate: float     # Tokens per second for everyone together
+    route_burst: float
+    concurrency: int      # Requests of this class running at once
+
+
+ROUTE_CLASSES = [
+    # (class, method, path pattern)
+    ("auth", "POST", re.compile(r"^/api/auth/(token|register)/?$")),
+    ("nlp", "POST", re.compile(r"^/api/students/profiles/\d+/extract-skills/?$")),
+    ("pdf", "GET", re.compile(r"^/api/pdf/generate-cv-pdf/\d+/?$")),
+]
+DEFAULT_LIMITS = {
+    "auth": RouteLimits(user_rate=0.5, user_burst=10, route_rate=20, route_burst=40, concurrency=4),
+    "nlp": RouteLimits(user_rate=0.2, user_burst=5, route_rate=10, route_burst=20, concurrency=4),
+    "pdf": RouteLimits(user_rate=0.1, user_burst=3, route_rate=2, route_burst=5, concurrency=2),
+}
+
+MAX_QUEUE_SECONDS = float(os.getenv("ADMISSION_MAX_QUEUE_SECONDS", 2))
+SHED_TARGET_SECONDS = float(os.getenv("ADMISSION_SHED_TARGET_SECONDS", 0.1))
+SHED_INTERVAL_SECONDS = float(os.getenv("ADMISSION_SHED_INTERVAL_SECONDS", 1))
+MAX_TRACKED_CLIENTS = int(os.getenv("ADMISSION_MAX_TRACKED_CLIENTS", 10000)) # Per-user buckets kept (LRU)
+
+
+def _parse_limits(raw: str) -> Dict[str, RouteLimits]:
+    """ADMISSION_LIMITS overrides, e.g. "nlp=concurrency:8,user_rate:0.5;pdf=concurrency:1"."""
+    limits = dict(DEFAULT_LIMITS)
+    for item in filter(None, (part.strip() for part in raw.split(";"))):
+        route_class, _, fields = item.partition("=")
+        route_class = route_class.strip()
+        try:
+            overrides = {}
+            for field in filter(None, (f.strip() for f in fields.split(","))):
+                name, _, value = field.partition(":")
+                overrides[name.strip()] = int(value) if name.strip() == "concurrency" else float(value)
+            limits[route_class] = limits[route_class]._replace(**overrides)
+        except (KeyError, ValueError, TypeError):
+            logger.warning("Ignoring malformed ADMISSION_LIMITS entry %r", item)
+    return limits
+
+
+LIMITS = _parse_limits(os.getenv("ADMISSION_LIMITS", ""))
+
+rejections = registry.counter(
+    "admission_rejections_total", "Requests turned away by admission control.", ("route_class", "reason"),
+)
+queue_wait = registry.histogram(
+    "admission_queue_seconds", "Time admitted requests waited for a concurrency slot.", ("route_class",),
+)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate, self.burst = rate, burst
+        self.tokens, self.updated = burst, now
+
+    def wait(self, now: float) -> float:
+        """Refills the bucket up to now. Returns 0 if a token is available, else seconds until one is."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+    def take(self):
+        """Takes the token wait() found available."""
+        self.tokens -= 1
+
+
+class ConcurrencyLimiter:
+    """A FIFO semaphore whose futures are created on the running loop (safe to build at import)."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters = collections.deque()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active < self.limit and not self.queued:
+            self.active += 1
+            return True
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # A slot may have been handed over just as the wait ended
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return False
+
+    def release(self):
+        # Hand the slot straight to the oldest live waiter (active stays the same)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class QueueDelayMonitor:
+    """Flags overload when even the shortest queue wait of a whole interval exceeded the target."""
+
+    def __init__(self, target: float = SHED_TARGET_SECONDS, interval: float = SHED_INTERVAL_SECONDS):
+        self.target, self.interval = target, interval
+        self.overloaded = False
+        self._window_start = time.monotonic()
+        self._window_min: Optional[float] = None
+
+    def record(self, wait: float, now: float):
+        self._window_min = wait if self._window_min is None else min(self._window_min, wait)
+        if now - self._window_start >= self.interval:
+            self.overloaded = self._window_min > self.target
+            self._window_start, self._window_min = now, None
+
+
+class AdmissionController:
+    def __init__(self, limits: Dict[str, RouteLimits]):
+        self.limits = limits
+        now = time.monotonic()
+        self.route_buckets = {name: TokenBucket(l.route_rate, l.route_burst, now) for name, l in limits.items()}
+        self.limiters = {name: ConcurrencyLimiter(l.concurrency) for name, l in limits.items()}
+        self.monitors = {name: QueueDelayMonitor() for name in limits}
+        self.client_buckets: "collections.OrderedDict[Tuple[str, str], TokenBucket]" = collections.OrderedDict()
+
+    def classify(self, request: Request) -> Optional[str]:
+        for route_class, method, pattern in ROUTE_CLASSES:
+            if request.method == method and route_class in self.limits and pattern.match(request.url.path):
+                return route_class
+        return None
+
+    def client_bucket(self, route_class: str, client: str, now: float) -> TokenBucket:
+        key = (route_class, client)
+        bucket = self.client_buckets.get(key)
+        if bucket is None:
+            limits = self.limits[route_class]
+            bucket = self.client_buckets[key] = TokenBucket(limits.user_rate, limits.user_burst, now)
+            # Forgetting the least recently seen client only ever refills its bucket
+            while len(self.client_buckets) > MAX_TRACKED_CLIENTS:
+                self.client_buckets.popitem(last=False)
+        else:
+            self.client_buckets.move_to_end(key)
+        return bucket
+
+    def stats(self):
+        """Scrape-time gauges for /metrics."""
+        yield ("admission_in_flight", "Requests of the class currently running.", "gauge", [
+            ({"route_class": name}, limiter.active) for name, limiter in self.limiters.items()
+        ])
+        yield ("admission_queued", "Requests of the class waiting for a slot.", "gauge", [
+            ({"route_class": name}, limiter.queued) for name, limiter in self.limiters.items()
+        ])
+        yield ("admission_concurrency_limit", "Concurrency limit of the class.", "gauge", [
+            ({"route_class": name}, limiter.limit) for name, limiter in self.limiters.items()
+        ])
+        yield ("admission_shedding", "1 while the class is shedding load.", "gauge", [
+            ({"route_class": name}, int(monitor.overloaded)) for name, monitor in self.monitors.items()
+        ])
+        yield ("admission_route_tokens", "Tokens left in the class's shared bucket.", "gauge", [
+            ({"route_class": name}, round(bucket.tokens, 3)) for name, bucket in self.route_buckets.items()
+        ])
+        yield ("admission_tracked_clients", "Per-client token buckets held.", "gauge", [({}, len(self.client_buckets))])
+
+
+admission_controller = AdmissionController(LIMITS)
+registry.register_collector(admission_controller.stats)
+
+
+def _reject(route_class: str, reason: str, status_code: int, retry_after: float, detail: str) -> JSONResponse:
+    rejections.inc(route_class, reason)
+    return JSONResponse(
+        {"detail": detail}, status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def admission_control(request: Request, call_next):
+    """HTTP middleware applying the rate limits, concurrency limits and load shedding above."""
+    controller = admission_controller
+    route_class = controller.classify(request)
+    if route_class is None:
+        return await call_next(request)
+
+    limiter = controller.limiters[route_class]
+    monitor = controller.monitors[route_class]
+    now = time.monotonic()
+    if monitor.overloaded and limiter.active >= limiter.limit:
+        return _reject(route_class, "shed", 503, monitor.interval, "Server is overloaded, please retry shortly.")
+
+    user_id = user_id_from_request(request)
+    client = f"user:{user_id}" if user_id is not None else f"addr:{request.client.host if request.client else 'unknown'}"
+    # Tokens are only taken once both buckets have one, so a request turned away by the
+    # shared bucket doesn't cost the client any of its own budget
+    client_bucket = controller.client_bucket(route_class, client, now)
+    route_bucket = controller.route_buckets[route_class]
+    retry_after = client_bucket.wait(now)
+    if retry_after:
+        return _reject(route_class, "user_rate", 429, retry_after, "Too many requests, please slow down.")
+    retry_after = route_bucket.wait(now)
+    if retry_after:
+        return _reject(route_class, "route_rate", 429, retry_after, "This endpoint is busy, please retry shortly.")
+    client_bucket.take()
+    route_bucket.take()
+
+    if not await limiter.acquire(MAX_QUEUE_SECONDS):
+        monitor.record(MAX_QUEUE_SECONDS, time.monotonic())
+        return _reject(route_class, "queue_timeout", 503, MAX_QUEUE_SECONDS, "Server is overloaded, please retry shortly.")
+    admitted = time.monotonic()
+    waited = admitted - now
+    monitor.record(waited, admitted)
+    queue_wait.observe(waited, route_class)
+    try:
+        return await call_next(request)
+    finally:
+        limiter.release()
@@ -0,0 +1,50 @@
+from typing import Dict, Generic, Iterable, Optional, Type, TypeVar
+
+from sqlalchemy.orm import Session
+
+from database import models
+
+# Ids per IN query; keeps statements under the backends' bound-parameter limits
+LOAD_CHUNK_SIZE = 500
+
+T = TypeVar("T")
+
+
+class DataLoader(Generic[T]):
+    """
+    Batching identity map for one model, scoped to a session (i.e. a request). load_many()
+    fetches the ids it has not seen yet in IN queries of LOAD_CHUNK_SIZE, and results
+    (including misses) are memoized, so repeated lookups in one request hit the database once.
+    """
+
+    def __init__(self, db: Session, model: Type[T]):
+        self.db = db
+        self.model = model
+        self._loaded: Dict[int, Optional[T]] = {}
+
+    def load_many(self, ids: Iterable[int]) -> Dict[int, T]:
+        """The rows that exist among ids, by id."""
+        ids = [i for i in ids if i is not None]
+        pending = list({i for i in ids if i not in self._loaded})
+        primary_key = self.model.__mapper__.primary_key[0]
+        for start in range(0, len(pending), LOAD_CHUNK_SIZE):
+            chunk = pending[start:start + LOAD_CHUNK_SIZE]
+            found = {getattr(row, primary_key.key): row for row in self.db.query(self.model).filter(primary_key.in_(chunk)).all()}
+            for i in chunk:
+                self._loaded[i] = found.get(i)
+        return {i: self._loaded[i] for i in ids if self._loaded.get(i) is not None}
+
+
+class Loaders:
+    """The per-request loaders for the models that are looked up by id in loops."""
+
+    def __init__(self, db: Session):
+        self.skills: DataLoader[models.Skill] = DataLoader(db, models.Skill)
+
+
+def loaders_for(db: Session) -> Loaders:
+    """The session's loaders, created on first use. Sessions are per request (get_db), so these are too."""
+    loaders = db.info.get("loaders")
+    if loaders is None:
+        loaders = db.info["loaders"] = Loaders(db)
+    return loaders
@@ -0,0 +1,26 @@
+import os
+from typing import Dict, Sequence
+
+import numpy as np
+
+# Helpers for indexes that server.py preloads in the master before forking workers.
+# Forked workers share the master's pages until something writes to them, so a TTL reload
+# should only replace an index when its source rows changed (rows_digest), and large numpy
+# arrays are best moved into read-only memory-mapped files (map_arrays), whose pages stay
+# shared however the Python objects around them are touched.
+
+
+def rows_digest(*results: Sequence[Sequence]) -> int:
+    """Fingerprint of query results; an index built from rows with the same digest is the same index."""
+    return hash(tuple(tuple(tuple(row) for row in rows) for rows in results))
+
+
+def map_arrays(directory: str, prefix: str, arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Saves each array to <directory>/<prefix>_<name>.npy and returns read-only memory maps of them."""
+    os.makedirs(directory, exist_ok=True)
+    mapped = {}
+    for name, array in arrays.items():
+        path = os.path.join(directory, f"{prefix}_{name}.npy")
+        np.save(path, array)
+        mapped[name] = np.load(path, mmap_mode="r")
+    return mapped
@@ -0,0 +1,223 @@
+import collections
+import contextlib
+import contextvars
+import datetime
+import itertools
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from fastapi import Request
+
+from utils.metrics import registry
+from utils.query_stats import route_template
+
+# Opt-in sampling profiler. A background thread reads every profiled thread's stack each
+# SAMPLE_INTERVAL and counts identical stacks, giving flamegraph-ready collapsed output
+# ("frame;frame;frame count", e.g. for flamegraph.pl or speedscope).
+# Nothing samples unless a request carries PROFILE_HEADER with the PROFILING_TOKEN value, or
+# an admin opens a window through /api/profiling/window; otherwise only the stage timers run.
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN") # Header-triggered profiling is disabled when unset
+PROFILE_HEADER = "X-Profile"
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005))
+MAX_ACTIVE_PROFILES = int(os.getenv("MAX_ACTIVE_PROFILES", 2)) # Concurrent samplers per worker
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", 20)) # Finished profiles kept per worker
+MAX_STACK_DEPTH = 128
+
+stage_seconds = registry.histogram(
+    "http_request_stage_seconds", "Time spent in each named stage of a request.", ("route", "stage"),
+)
+
+# code object -> frame label. Code objects live as long as their functions, so this stays small.
+_labels: Dict[object, str] = {}
+_sampler_idents: Set[int] = set()
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        parts = path.replace("\\", "/").rsplit("/", 2)
+        label = f"{code.co_name} ({'/'.join(parts[-2:])}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+def _collapse(frame) -> str:
+    """Root-first 'a;b;c' rendering of a stack."""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of thread_ids (all threads when None) until stopped.
+    Threads can be added while it runs, e.g. the threadpool thread a sync endpoint lands on.
+    """
+
+    def __init__(self, label: str, thread_ids: Optional[Set[int]] = None, exclude: Set[int] = frozenset(),
+                 interval: float = SAMPLE_INTERVAL):
+        self.label = label
+        self.thread_ids = thread_ids
+        self.exclude = set(exclude)
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = datetime.datetime.now()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self):
+        own = threading.get_ident()
+        _sampler_idents.add(own)
+        try:
+            while not self._stop.wait(self.interval):
+                self.sample_count += 1
+                for ident, frame in sys._current_frames().items():
+                    if ident in _sampler_idents or ident in self.exclude:
+                        continue
+                    if self.thread_ids is not None and ident not in self.thread_ids:
+                        continue
+                    self.stacks[_collapse(frame)] += 1
+        finally:
+            _sampler_idents.discard(own)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """The most recent finished profiles of this worker, by id."""
+
+    def __init__(self, capacity: int = PROFILE_HISTORY):
+        self.capacity = capacity
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._profiles: "collections.OrderedDict[int, SamplingProfiler]" = collections.OrderedDict()
+
+    def reserve(self) -> bool:
+        """Claims a sampler slot; False when MAX_ACTIVE_PROFILES are already running."""
+        with self._lock:
+            if self._active >= MAX_ACTIVE_PROFILES:
+                return False
+            self._active += 1
+            return True
+
+    def release(self, profiler: Optional[SamplingProfiler]) -> Optional[int]:
+        """Frees the slot and keeps the finished profile. Returns its id."""
+        with self._lock:
+            self._active -= 1
+            if profiler is None:
+                return None
+            profile_id = next(self._ids)
+            self._profiles[profile_id] = profiler
+            while len(self._profiles) > self.capacity:
+                self._profiles.popitem(last=False)
+            return profile_id
+
+    def get(self, profile_id: int) -> Optional[SamplingProfiler]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def summaries(self) -> List[dict]:
+        with self._lock:
+            items = list(self._profiles.items())
+        return [{
+            "id": profile_id, "label": p.label, "started_at": p.started_at, "duration_ms": round(p.duration * 1000, 1),
+            "samples": sum(p.stacks.values()), "distinct_stacks": len(p.stacks),
+        } for profile_id, p in reversed(items)]
+
+
+profile_store = ProfileStore()
+
+# Per-request state. Sync endpoints run in a threadpool with a copy of the context, which
+# still points at the same (mutable) objects.
+_stages = contextvars.ContextVar("request_stages", default=None)
+_profiler = contextvars.ContextVar("request_profiler", default=None)
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """
+    Times a named stage of the current request (db, nlp, scoring, serialization, render, ...).
+    Repeated stages add up. Also marks the calling thread for the request's profiler, if any.
+    """
+    profiler = _profiler.get()
+    if profiler is not None:
+        profiler.thread_ids.add(threading.get_ident())
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages = _stages.get()
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - started
+
+
+def profile_window(seconds: float, interval: float = SAMPLE_INTERVAL) -> Optional[int]:
+    """Samples every thread of this worker (except the caller) for `seconds`. None when no slot is free."""
+    if not profile_store.reserve():
+        return None
+    profiler = SamplingProfiler(f"window {seconds:g}s", exclude={threading.get_ident()}, interval=interval)
+    profiler.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        profiler.stop()
+    return profile_store.release(profiler)
+
+
+async def profile_requests(request: Request, call_next):
+    """
+    HTTP middleware for the stage timers and header-triggered profiling. Stage times go to
+    the Server-Timing header and /metrics; a profiled request also gets an X-Profile-Id
+    header naming the profile to download from /api/profiling/profiles/{id}.
+    """
+    stages = {}
+    stages_token = _stages.set(stages)
+    profiler = None
+    if PROFILING_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILING_TOKEN and profile_store.reserve():
+        # The event loop thread, plus any threadpool thread that enters a stage()
+        profiler = SamplingProfiler(f"{request.method} {request.url.path}", thread_ids={threading.get_ident()})
+        profiler_token = _profiler.set(profiler)
+        profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        _stages.reset(stages_token)
+        if profiler is not None:
+            profiler.stop()
+            _profiler.reset(profiler_token)
+            profile_id = profile_store.release(profiler)
+
+    if stages:
+        route = route_template(request)
+        for name, seconds in stages.items():
+            stage_seconds.observe(seconds, route, name)
+        response.headers.append("Server-Timing", ", ".join(
+            f"stage-{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items()
+        ))
+    if profiler is not None:
+        response.headers["X-Profile-Id"] = str(profile_id)
+    return response
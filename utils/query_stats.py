@@ -0,0 +1,141 @@
+import contextvars
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Queries a request may run before a budget violation is logged. Per-route overrides
+# come from QUERY_BUDGETS, e.g. "GET /api/recommendations/for-student/me=15,POST /api/students/profiles/{user_id}/extract-skills=40".
+DEFAULT_QUERY_BUDGET = int(os.getenv("DEFAULT_QUERY_BUDGET", 30))
+SLOW_STATEMENT_CHARS = 200
+EXCLUDED_PATHS = {"/metrics"}
+
+
+def _parse_budgets(raw: str) -> Dict[str, int]:
+    budgets = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        route, _, budget = item.rpartition("=")
+        if route and budget.strip().isdigit():
+            budgets[route.strip()] = int(budget)
+        else:
+            logger.warning("Ignoring malformed QUERY_BUDGETS entry %r", item)
+    return budgets
+
+
+QUERY_BUDGETS = _parse_budgets(os.getenv("QUERY_BUDGETS", ""))
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route.", ("method", "route", "status"),
+)
+request_db_time = registry.histogram(
+    "http_request_db_seconds", "Time spent in SQL per request.", ("method", "route"),
+)
+request_queries = registry.histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("method", "route"),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+budget_violations = registry.counter(
+    "http_request_query_budget_violations_total", "Requests that ran more queries than their route's budget.", ("method", "route"),
+)
+
+
+class QueryStats:
+    """SQL activity of one request."""
+    __slots__ = ("count", "total_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+# The request's stats object. Sync endpoints run in a threadpool with a copy of the
+# context, which still points at the same (mutable) object.
+_current = contextvars.ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def route_template(request: Request) -> str:
+    """The matched route's path template, so /api/opportunities/1 and /2 share one series."""
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+async def instrument_requests(request: Request, call_next):
+    """
+    HTTP middleware recording per-request SQL count and time. Adds a Server-Timing header,
+    feeds the /metrics histograms and logs requests over their route's query budget.
+    """
+    if request.url.path in EXCLUDED_PATHS:
+        return await call_next(request)
+
+    stats = QueryStats()
+    token = _current.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+    elapsed = time.perf_counter() - started
+
+    route = route_template(request)
+    method = request.method
+    request_duration.observe(elapsed, method, route, str(response.status_code))
+    request_db_time.observe(stats.total_seconds, method, route)
+    request_queries.observe(stats.count, method, route)
+
+    budget = QUERY_BUDGETS.get(f"{method} {route}", DEFAULT_QUERY_BUDGET)
+    if stats.count > budget:
+        budget_violations.inc(method, route)
+        logger.warning(
+            "Query budget exceeded: %s %s ran %d queries (budget %d, %.1f ms in SQL); slowest %.1f ms: %s",
+            method, route, stats.count, budget, stats.total_seconds * 1000,
+            stats.slowest_seconds * 1000, (stats.slowest_statement or "")[:SLOW_STATEMENT_CHARS],
+        )
+
+    timings = [
+        f'db;dur={stats.total_seconds * 1000:.1f};desc="{stats.count} queries"',
+        f"db-slowest;dur={stats.slowest_seconds * 1000:.1f}",
+        f"app;dur={elapsed * 1000:.1f}",
+    ]
+    response.headers.append("Server-Timing", ", ".join(timings))
+    return response
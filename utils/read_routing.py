@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+from typing import Dict
+
+from fastapi import Request
+
+from database.connection import SessionLocal, replica_pool
+from utils.security import user_id_from_request
+
+# Read-your-writes: after a user's own successful write, their reads go to the primary for
+# READ_YOUR_WRITES_SECONDS so replica lag never hides the change from them. The window is
+# kept per user in this worker and in a cookie, so it also holds when the next request
+# lands on another worker (for clients that keep cookies).
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+STICKY_COOKIE = "read_primary_until"
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+PRUNE_AT = 10000 # Drop expired entries once this many users are tracked
+
+_sticky_until: Dict[int, float] = {} # user id -> epoch seconds
+_lock = threading.Lock()
+
+
+def reads_from_primary(request: Request) -> bool:
+    now = time.time()
+    try:
+        if float(request.cookies.get(STICKY_COOKIE, 0)) > now:
+            return True
+    except ValueError:
+        pass
+    user_id = user_id_from_request(request)
+    return user_id is not None and _sticky_until.get(user_id, 0) > now
+
+
+def get_read_db(request: Request):
+    """
+    Like get_db, for handlers that only read: the session is bound to a healthy replica
+    (round-robin), or to the primary when there is none or the caller just wrote something.
+    """
+    replica = None if reads_from_primary(request) else replica_pool.pick()
+    db = SessionLocal(bind=replica) if replica is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def track_writes(request: Request, call_next):
+    """HTTP middleware that opens the read-your-writes window after a successful write."""
+    response = await call_next(request)
+    if request.method in UNSAFE_METHODS and response.status_code < 400 and replica_pool.engines:
+        until = time.time() + READ_YOUR_WRITES_SECONDS
+        user_id = user_id_from_request(request)
+        if user_id is not None:
+            with _lock:
+                if len(_sticky_until) >= PRUNE_AT:
+                    now = time.time()
+                    for key in [key for key, expires in _sticky_until.items() if expires <= now]:
+                        del _sticky_until[key]
+                _sticky_until[user_id] = until
+        response.set_cookie(STICKY_COOKIE, f"{until:.3f}", max_age=int(READ_YOUR_WRITES_SECONDS) + 1,
+                            httponly=True, samesite="lax")
+    return response
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime, timedelta
 from typing import Optional
+from fastapi import Request
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from dotenv import load_dotenv
@@ -43,4 +44,19 @@ def decode_access_token(token: str):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def user_id_from_token(token: Optional[str]) -> Optional[int]:
+    """The user id of a valid access token (same claims get_current_user requires), without touching the database."""
+    payload = decode_access_token(token) if token else None
+    if not payload or payload.get("sub") is None:
+        return None
+    return payload.get("user_id")
+
+def user_id_from_request(request: Request) -> Optional[int]:
+    """Reads the user id from the bearer token without touching the database."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return user_id_from_token(token)